@@ -5,3 +5,6 @@ class AuthConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'auth'
     label = 'core_auth'
+
+    def ready(self):
+        from . import checks, signals  # noqa: F401
@@ -0,0 +1,97 @@
+from django.conf import settings
+from django.core.cache import cache
+from django.utils import timezone
+from django.utils.functional import cached_property
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.authentication import JWTStatelessUserAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken
+from rest_framework_simplejwt.models import TokenUser
+from rest_framework_simplejwt.settings import api_settings
+
+from .models import User
+from .tokens import revoke_user_refresh_tokens
+
+AUTH_TIME_CLAIM = 'auth_time'
+REVOKED_BEFORE_KEY = 'auth:revoked-before:{}'
+USER_CACHE_KEY = 'auth:user:{}'
+
+
+class ClaimsUser(TokenUser):
+    """
+    A user built only from the claims of an access token issued by /api/login/.
+    """
+
+    @cached_property
+    def roles(self):
+        roles = self.token.get('roles')
+        return frozenset(roles) if roles is not None else None
+
+    def load_user(self):
+        """
+        Loads the full User model for the rare paths that need it, cached for
+        AUTH_USER_CACHE_TIMEOUT seconds when that setting is non-zero.
+        """
+        timeout = getattr(settings, 'AUTH_USER_CACHE_TIMEOUT', 0)
+        if not timeout:
+            return User.objects.get(pk=self.pk)
+
+        key = USER_CACHE_KEY.format(self.pk)
+        user = cache.get(key)
+        if user is None:
+            user = User.objects.get(pk=self.pk)
+            cache.set(key, user, timeout)
+        return user
+
+
+class StatelessJWTAuthentication(JWTStatelessUserAuthentication):
+    """
+    Authenticates from the access token alone, without loading the user row.
+
+    Revocation is checked against a per-user "not before" time kept on the
+    users row; with TOKEN_REVOCATION_CACHE_TIMEOUT set it is read from the
+    shared cache, so it usually costs a cache lookup rather than a query.
+    """
+
+    def get_user(self, validated_token):
+        user = super().get_user(validated_token)
+        if is_revoked(validated_token):
+            raise InvalidToken(_('Token has been revoked'))
+        return user
+
+
+def is_revoked(token):
+    return token.get(AUTH_TIME_CLAIM, token.get('iat', 0)) <= revoked_before(token[api_settings.USER_ID_CLAIM])
+
+
+def revoked_before(user_id):
+    """
+    The time up to which the tokens of a user are revoked, as a Unix
+    timestamp, or 0. Read from users.tokens_revoked_at, going through the
+    shared cache when TOKEN_REVOCATION_CACHE_TIMEOUT is set.
+    """
+    timeout = getattr(settings, 'TOKEN_REVOCATION_CACHE_TIMEOUT', 0)
+    key = REVOKED_BEFORE_KEY.format(user_id)
+    if timeout:
+        cached = cache.get(key)
+        if cached is not None:
+            return cached
+
+    revoked_at = User.objects.filter(pk=user_id).values_list('tokens_revoked_at', flat=True).first()
+    value = revoked_at.timestamp() if revoked_at else 0
+    if timeout:
+        cache.set(key, value, timeout)
+    return value
+
+
+def revoke_user_tokens(user_ids):
+    """
+    Invalidates every token issued to the given users up to now, including
+    access tokens later minted from their refresh tokens.
+    """
+    user_ids = list(user_ids)
+    User.objects.filter(pk__in=user_ids).update(tokens_revoked_at=timezone.now())
+    cache.delete_many(
+        [REVOKED_BEFORE_KEY.format(user_id) for user_id in user_ids]
+        + [USER_CACHE_KEY.format(user_id) for user_id in user_ids]
+    )
+    revoke_user_refresh_tokens(user_ids)
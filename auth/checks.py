@@ -0,0 +1,30 @@
+from django.conf import settings
+from django.core.checks import Error, Tags, register
+
+# Cache backends whose entries other processes never see.
+PROCESS_LOCAL_CACHES = (
+    'django.core.cache.backends.locmem.LocMemCache',
+    'django.core.cache.backends.dummy.DummyCache',
+)
+
+SHARED_CACHE_SETTINGS = ('ROLE_CACHE_TIMEOUT', 'AUTH_USER_CACHE_TIMEOUT', 'TOKEN_REVOCATION_CACHE_TIMEOUT')
+
+
+@register(Tags.caches)
+def check_shared_cache(app_configs, **kwargs):
+    """
+    Caches that are invalidated when a user changes must be shared, or the
+    other workers keep serving the stale entries until they expire.
+    """
+    backend = settings.CACHES['default']['BACKEND']
+    if backend not in PROCESS_LOCAL_CACHES:
+        return []
+    return [
+        Error(
+            f'{name} is set, but the default cache ({backend}) is not shared between workers.',
+            hint=f'Configure a shared CACHE_BACKEND such as Redis, or set {name}=0.',
+            id='core_auth.E001',
+        )
+        for name in SHARED_CACHE_SETTINGS
+        if getattr(settings, name, 0)
+    ]
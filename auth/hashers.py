@@ -0,0 +1,102 @@
+"""
+Password hashers whose hashing runs on a small shared thread pool.
+
+Both argon2-cffi and hashlib release the GIL while hashing, so the pool
+threads run in parallel with request threads. Bounding the pool caps the CPU
+a burst of logins or sign-ups can take from the rest of the worker, and a
+bounded backlog turns a burst the pool cannot absorb into 429 responses
+instead of an ever-growing queue.
+"""
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.contrib.auth import hashers
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+from rest_framework.exceptions import Throttled
+
+_pool = None
+_slots = None
+_pool_lock = threading.Lock()
+_in_pool = threading.local()
+
+
+def get_hash_pool():
+    global _pool, _slots
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                workers = settings.PASSWORD_HASH_WORKERS
+                _slots = threading.BoundedSemaphore(workers + settings.PASSWORD_HASH_BACKLOG)
+                _pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='password-hash')
+    return _pool, _slots
+
+
+@receiver(setting_changed)
+def reset_hash_pool(*, setting, **kwargs):
+    global _pool, _slots
+    if setting in ('PASSWORD_HASH_WORKERS', 'PASSWORD_HASH_BACKLOG'):
+        with _pool_lock:
+            if _pool is not None:
+                _pool.shutdown(wait=False)
+            _pool = _slots = None
+
+
+def run_hash(func, *args):
+    """
+    Runs func on the hash pool and waits for it, or inline when the pool is
+    disabled. Raises Throttled when the pool and its backlog are full for
+    longer than PASSWORD_HASH_TIMEOUT seconds.
+    """
+    # PBKDF2 verify() calls encode(), which must not queue behind itself.
+    if not settings.PASSWORD_HASH_WORKERS or getattr(_in_pool, 'active', False):
+        return func(*args)
+    pool, slots = get_hash_pool()
+    if not slots.acquire(timeout=settings.PASSWORD_HASH_TIMEOUT):
+        raise Throttled(wait=settings.PASSWORD_HASH_TIMEOUT)
+    try:
+        return pool.submit(_run_in_pool, func, args).result()
+    finally:
+        slots.release()
+
+
+def _run_in_pool(func, args):
+    _in_pool.active = True
+    try:
+        return func(*args)
+    finally:
+        _in_pool.active = False
+
+
+class PooledHasherMixin:
+    def encode(self, password, salt, *args):
+        return run_hash(super().encode, password, salt, *args)
+
+    def verify(self, password, encoded):
+        return run_hash(super().verify, password, encoded)
+
+
+class Argon2PasswordHasher(PooledHasherMixin, hashers.Argon2PasswordHasher):
+    """
+    Argon2id with the ARGON2_* cost settings. Hashes made with other costs are
+    rehashed on the next successful login.
+    """
+
+    @property
+    def time_cost(self):
+        return settings.ARGON2_TIME_COST
+
+    @property
+    def memory_cost(self):
+        return settings.ARGON2_MEMORY_COST
+
+    @property
+    def parallelism(self):
+        return settings.ARGON2_PARALLELISM
+
+
+class PBKDF2PasswordHasher(PooledHasherMixin, hashers.PBKDF2PasswordHasher):
+    """
+    Verifies the PBKDF2 hashes stored before Argon2 became the default.
+    """
@@ -0,0 +1,8 @@
+from jobs.registry import task
+
+from .tokens import prune_refresh_tokens
+
+
+@task('auth.prune_refresh_tokens')
+def prune_expired_refresh_tokens(batch_size=5000):
+    return {'deleted': prune_refresh_tokens(batch_size=batch_size)}
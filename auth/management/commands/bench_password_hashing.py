@@ -0,0 +1,40 @@
+import os
+
+from django.contrib.auth.hashers import get_hasher, make_password
+from django.core.management.base import BaseCommand
+
+from dico_event_be.benchmarks import run_in_threads
+
+PASSWORD = 'bench-password'
+
+
+class Command(BaseCommand):
+    help = (
+        'Measures password verifications per second, the CPU cost of a login, for the PBKDF2 '
+        'hasher and the configured Argon2id hasher, on one thread and on several.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--verifications', type=int, default=50)
+        parser.add_argument('--threads', type=int, default=os.cpu_count() or 1)
+
+    def handle(self, *args, **options):
+        cores = len(os.sched_getaffinity(0)) if hasattr(os, 'sched_getaffinity') else os.cpu_count() or 1
+        threads = options['threads']
+        self.stdout.write(f'{cores} core(s) available, {threads} thread(s)')
+
+        for algorithm in ('pbkdf2_sha256', 'argon2'):
+            hasher = get_hasher(algorithm)
+            encoded = make_password(PASSWORD, hasher=algorithm)
+            single = self.measure(hasher, encoded, options['verifications'], 1)
+            parallel = self.measure(hasher, encoded, options['verifications'] * threads, threads)
+            self.stdout.write(
+                f'{algorithm:<14} {1000 / single:8.1f} ms/login  {single:8.1f} logins/s on 1 thread  '
+                f'{parallel:8.1f} logins/s on {threads}  ({parallel / min(threads, cores):.1f} per core)'
+            )
+
+    @staticmethod
+    def measure(hasher, encoded, verifications, threads):
+        results, elapsed = run_in_threads(lambda _: hasher.verify(PASSWORD, encoded), range(verifications), threads)
+        assert all(results)
+        return verifications / elapsed
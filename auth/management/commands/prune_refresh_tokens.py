@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+
+from dico_event_be.routers import primary
+from auth.tokens import prune_refresh_tokens
+
+
+class Command(BaseCommand):
+    help = 'Deletes expired refresh tokens in small batches, so it can run while the API is serving.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=5000)
+
+    def handle(self, *args, **options):
+        with primary():
+            deleted = prune_refresh_tokens(batch_size=options['batch_size'])
+        self.stdout.write(f'Deleted {deleted} expired refresh tokens.')
@@ -0,0 +1,35 @@
+# Generated by Django 4.2 on 2026-10-18 16:31
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core_auth', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='IssuedRefreshToken',
+            fields=[
+                ('jti', models.UUIDField(primary_key=True, serialize=False)),
+                ('expires_at', models.DateTimeField()),
+                ('revoked_at', models.DateTimeField(blank=True, null=True)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='refresh_tokens', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'db_table': 'refresh_tokens',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='issuedrefreshtoken',
+            index=models.Index(fields=['expires_at'], name='idx_refresh_tokens_expires_at'),
+        ),
+        migrations.AddIndex(
+            model_name='issuedrefreshtoken',
+            index=models.Index(condition=models.Q(('revoked_at__isnull', False)), fields=['revoked_at'], name='idx_refresh_tokens_revoked_at'),
+        ),
+    ]
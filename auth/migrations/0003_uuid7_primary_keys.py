@@ -0,0 +1,19 @@
+# Generated by Django 4.2 on 2026-10-18 16:38
+
+import dico_event_be.uuids
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core_auth', '0002_refresh_tokens'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='user',
+            name='id',
+            field=models.UUIDField(default=dico_event_be.uuids.uuid7, editable=False, primary_key=True, serialize=False, unique=True),
+        ),
+    ]
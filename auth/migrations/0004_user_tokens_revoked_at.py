@@ -0,0 +1,18 @@
+# Generated by Django 4.2 on 2026-10-18 17:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core_auth', '0003_uuid7_primary_keys'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='user',
+            name='tokens_revoked_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
@@ -1,16 +1,39 @@
 from django.db import models
 from django.contrib.auth.models import AbstractUser
-import uuid
+from dico_event_be.uuids import uuid7
 
 
 # Create your models here.
 class User(AbstractUser):
-    id = models.UUIDField(default=uuid.uuid4, unique=True, primary_key=True, editable=False)
+    id = models.UUIDField(default=uuid7, unique=True, primary_key=True, editable=False)
     username = models.CharField(max_length=255, unique=True, null=False, blank=False)
     email = models.EmailField(max_length=255, unique=True, null=False, blank=False)
+    # Tokens issued up to this time are rejected; set by auth.authentication.revoke_user_tokens().
+    tokens_revoked_at = models.DateTimeField(null=True, blank=True)
 
     def __str__(self):
         return self.username
 
     class Meta:
-        db_table = 'users'
\ No newline at end of file
+        db_table = 'users'
+
+class IssuedRefreshToken(models.Model):
+    """
+    A refresh token handed out by /api/login/ or /api/token/, kept until it
+    expires so it can be rotated and revoked.
+    """
+    jti = models.UUIDField(primary_key=True)
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='refresh_tokens')
+    expires_at = models.DateTimeField()
+    revoked_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        db_table = 'refresh_tokens'
+        indexes = [
+            models.Index(fields=['expires_at'], name='idx_refresh_tokens_expires_at'),
+            models.Index(
+                fields=['revoked_at'],
+                name='idx_refresh_tokens_revoked_at',
+                condition=models.Q(revoked_at__isnull=False),
+            ),
+        ]
@@ -1,5 +1,7 @@
 from rest_framework.permissions import BasePermission
 
+from .roles import ADMIN, EVENT_ORGANIZER, has_role
+
 
 class IsSuperUser(BasePermission):
     """
@@ -16,7 +18,7 @@ class IsAdmin(BasePermission):
     """
 
     def has_permission(self, request, view):
-        return request.user and request.user.is_authenticated and request.user.groups.filter(name='admin').exists()
+        return request.user and request.user.is_authenticated and has_role(request, ADMIN)
 
 
 class IsEventOrganizer(BasePermission):
@@ -25,8 +27,7 @@ class IsEventOrganizer(BasePermission):
     """
 
     def has_permission(self, request, view):
-        return request.user and request.user.is_authenticated and request.user.groups.filter(
-            name='event_organizer').exists()
+        return request.user and request.user.is_authenticated and has_role(request, EVENT_ORGANIZER)
 
 
 class IsAdminOrSuperUser(BasePermission):
@@ -38,7 +39,7 @@ class IsAdminOrSuperUser(BasePermission):
         return (
                 request.user and request.user.is_authenticated and (
                 request.user.is_superuser or
-                request.user.groups.filter(name='admin').exists()
+                has_role(request, ADMIN)
         )
         )
 
@@ -52,8 +53,7 @@ class IsAdminOrEventOrganizerOrSuperUser(BasePermission):
         return (
                 request.user and request.user.is_authenticated and (
                 request.user.is_superuser or
-                request.user.groups.filter(name='admin').exists() or
-                request.user.groups.filter(name='event_organizer').exists()
+                has_role(request, ADMIN, EVENT_ORGANIZER)
         )
         )
 
@@ -67,7 +67,7 @@ class IsOwnerOrAdminOrSuperUser(BasePermission):
         return (
                 request.user and request.user.is_authenticated and (
                 request.user.is_superuser or
-                request.user.groups.filter(name='admin').exists() or
-                obj == request.user
+                has_role(request, ADMIN) or
+                str(obj.pk) == str(request.user.pk)
         )
         )
\ No newline at end of file
@@ -0,0 +1,132 @@
+from django.conf import settings
+from django.contrib.auth.models import Group
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Q
+
+from .authentication import revoke_user_tokens
+from .models import User
+
+ADMIN = 'admin'
+EVENT_ORGANIZER = 'event_organizer'
+
+ROLE_CACHE_KEY = 'auth:roles:{}'
+
+UserGroup = User.groups.through
+
+
+def get_roles(request):
+    """
+    Returns the group names of the authenticated user, loaded at most once per request.
+    """
+    user = request.user
+    if not (user and user.is_authenticated):
+        return frozenset()
+
+    roles = getattr(request, '_roles', None)
+    if roles is None:
+        # Users authenticated from token claims carry their roles with them.
+        roles = getattr(user, 'roles', None)
+        if roles is None:
+            roles = load_roles(user.pk)
+        request._roles = roles
+    return roles
+
+
+def has_role(request, *names):
+    return not get_roles(request).isdisjoint(names)
+
+
+def load_roles(user_id):
+    """
+    Reads the roles of a user, going through the shared cache when ROLE_CACHE_TIMEOUT is set.
+    The cache has to be shared by every worker (see auth.checks), since a role
+    change only drops the entry from the cache of the worker that made it.
+    """
+    timeout = getattr(settings, 'ROLE_CACHE_TIMEOUT', 0)
+    if not timeout:
+        return _query_roles(user_id)
+
+    key = ROLE_CACHE_KEY.format(user_id)
+    roles = cache.get(key)
+    if roles is None:
+        roles = _query_roles(user_id)
+        cache.set(key, roles, timeout)
+    return roles
+
+
+def invalidate_roles(user_ids):
+    keys = [ROLE_CACHE_KEY.format(user_id) for user_id in user_ids]
+    if keys:
+        cache.delete_many(keys)
+
+
+def roles_changed(user_ids):
+    """
+    Drops the cached roles of the given users and revokes their tokens once
+    the current transaction commits. Doing it any earlier would let another
+    request cache the old memberships, or put them in a new token, after the
+    revocation; a change that is rolled back revokes nothing.
+
+    Tokens carry the roles they were issued with, so a user whose roles change
+    has to log in again.
+    """
+    user_ids = list(user_ids)
+    if user_ids:
+        transaction.on_commit(lambda: _roles_changed(user_ids))
+
+
+def _roles_changed(user_ids):
+    invalidate_roles(user_ids)
+    revoke_user_tokens(user_ids)
+
+
+def assign_roles(pairs):
+    """
+    Adds each (user_id, group_id) pair with one INSERT ... ON CONFLICT DO
+    NOTHING per batch. Pairs that already exist are skipped and leave the
+    tokens of their users alone.
+    """
+    pairs = set(pairs)
+    if not pairs:
+        return
+    with transaction.atomic():
+        existing = set(UserGroup.objects.filter(_pairs_condition(pairs)).values_list('user_id', 'group_id'))
+        added = pairs - existing
+        UserGroup.objects.bulk_create(
+            [UserGroup(user_id=user_id, group_id=group_id) for user_id, group_id in added],
+            ignore_conflicts=True,
+            batch_size=1000,
+        )
+        # bulk_create sends no m2m_changed, so the role caches are dropped here.
+        roles_changed({user_id for user_id, _ in added})
+
+
+def revoke_roles(pairs):
+    """
+    Removes each (user_id, group_id) pair with a single DELETE. Returns the
+    number of memberships removed.
+    """
+    pairs = set(pairs)
+    if not pairs:
+        return 0
+    with transaction.atomic():
+        memberships = UserGroup.objects.filter(_pairs_condition(pairs))
+        user_ids = set(memberships.values_list('user_id', flat=True))
+        deleted, _ = memberships.delete()
+        roles_changed(user_ids)
+    return deleted
+
+
+def _pairs_condition(pairs):
+    users_by_group = {}
+    for user_id, group_id in pairs:
+        users_by_group.setdefault(group_id, set()).add(user_id)
+    condition = Q()
+    for group_id, user_ids in users_by_group.items():
+        condition |= Q(group_id=group_id, user_id__in=user_ids)
+    return condition
+
+
+def _query_roles(user_id):
+    return frozenset(Group.objects.filter(user=user_id).values_list('name', flat=True))
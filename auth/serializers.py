@@ -1,11 +1,62 @@
 from django.contrib.auth.hashers import make_password
 from django.contrib.auth.models import Group
+from django.utils.translation import gettext_lazy as _
 from rest_framework import serializers
 from .models import User
+from rest_framework.exceptions import AuthenticationFailed
 from rest_framework.reverse import reverse
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.serializers import TokenObtainPairSerializer, TokenRefreshSerializer
+from rest_framework_simplejwt.settings import api_settings
+import time
+import uuid
+
+from .authentication import AUTH_TIME_CLAIM, is_revoked
+from .tokens import StoredRefreshToken
+
+
+class LinkTemplate:
+    """
+    A URL reversed once with a placeholder pk, then filled in for each object.
+    """
+
+    def __init__(self, view_name, request, placeholder=None):
+        if placeholder is None:
+            self.prefix, self.suffix = reverse(view_name, request=request), ''
+        else:
+            url = reverse(view_name, kwargs={'pk': placeholder}, request=request)
+            self.prefix, self.suffix = url.split(str(placeholder), 1)
+
+    def format(self, pk=''):
+        return f'{self.prefix}{pk}{self.suffix}'
+
+
+def link_template(context, view_name, placeholder=None):
+    """
+    The LinkTemplate of view_name, shared by every serializer under the same root.
+    """
+    templates = context.setdefault('link_templates', {})
+    if view_name not in templates:
+        templates[view_name] = LinkTemplate(view_name, context.get('request'), placeholder)
+    return templates[view_name]
+
+
+class GroupLinkField(serializers.HyperlinkedRelatedField):
+    view_name = 'group-detail'
+
+    def get_url(self, obj, view_name, request, format):
+        if format:
+            return super().get_url(obj, view_name, request, format)
+        return link_template(self.context, view_name, 2 ** 31 - 1).format(obj.pk)
 
 
 class UserSerializer(serializers.HyperlinkedModelSerializer):
+    """
+    Views must pass the request in the context and prefetch groups when
+    serializing many users. Groups are read-only; roles are granted through
+    the assign-roles endpoints.
+    """
+    groups = GroupLinkField(many=True, read_only=True)
     _links = serializers.SerializerMethodField()
 
     class Meta:
@@ -21,29 +72,30 @@ class UserSerializer(serializers.HyperlinkedModelSerializer):
         return User.objects.create(**validated_data)
 
     def get__links(self, obj):
-        request = self.context.get('request')
+        list_url = link_template(self.context, 'user-list').format()
+        detail_url = link_template(self.context, 'user-detail', uuid.UUID(int=0)).format(obj.pk)
         return [
             {
                 "rel": "self",
-                "href": reverse('user-list', request=request),
+                "href": list_url,
                 "action": "POST",
                 "types": ["application/json"]
             },
             {
                 "rel": "self",
-                "href": reverse('user-detail', kwargs={'pk': obj.pk}, request=request),
+                "href": detail_url,
                 "action": "GET",
                 "types": ["application/json"]
             },
             {
                 "rel": "self",
-                "href": reverse('user-detail', kwargs={'pk': obj.pk}, request=request),
+                "href": detail_url,
                 "action": "PUT",
                 "types": ["application/json"]
             },
             {
                 "rel": "self",
-                "href": reverse('user-detail', kwargs={'pk': obj.pk}, request=request),
+                "href": detail_url,
                 "action": "DELETE",
                 "types": ["application/json"]
             }
@@ -88,4 +140,77 @@ class GroupSerializer(serializers.HyperlinkedModelSerializer):
 
 class AssignRoleSerializer(serializers.Serializer):
     user_id = serializers.UUIDField()
-    group_id = serializers.IntegerField()
\ No newline at end of file
+    group_id = serializers.IntegerField()
+
+
+class BulkRoleSerializer(serializers.Serializer):
+    """
+    Many (user_id, group_id) pairs, checked against the users and groups
+    tables with one query each.
+    """
+    roles = AssignRoleSerializer(many=True, allow_empty=False, max_length=10000)
+
+    def validate_roles(self, roles):
+        user_ids = {role['user_id'] for role in roles}
+        group_ids = {role['group_id'] for role in roles}
+        missing_users = user_ids - set(User.objects.filter(pk__in=user_ids).values_list('pk', flat=True))
+        missing_groups = group_ids - set(Group.objects.filter(pk__in=group_ids).values_list('pk', flat=True))
+
+        errors = {}
+        if missing_users:
+            errors['user_id'] = [f'Unknown user {user_id}.' for user_id in sorted(map(str, missing_users))]
+        if missing_groups:
+            errors['group_id'] = [f'Unknown group {group_id}.' for group_id in sorted(missing_groups)]
+        if errors:
+            raise serializers.ValidationError(errors)
+        return [(role['user_id'], role['group_id']) for role in roles]
+
+
+class ClaimsTokenObtainPairSerializer(TokenObtainPairSerializer):
+    token_class = StoredRefreshToken
+
+    @classmethod
+    def get_token(cls, user):
+        token = super().get_token(user)
+        token['is_superuser'] = user.is_superuser
+        token['roles'] = sorted(user.groups.values_list('name', flat=True))
+        token[AUTH_TIME_CLAIM] = time.time()
+        token.outstand()
+        return token
+
+
+class RotatingTokenRefreshSerializer(TokenRefreshSerializer):
+    """
+    Exchanges a refresh token for an access token and its successor; the
+    presented token is revoked, so it works once.
+    """
+    token_class = StoredRefreshToken
+
+    def validate(self, attrs):
+        refresh = self.token_class(attrs['refresh'])
+        if is_revoked(refresh):
+            raise TokenError(_('Token has been revoked'))
+
+        user = User.objects.filter(pk=refresh[api_settings.USER_ID_CLAIM]).first()
+        if user is None or not api_settings.USER_AUTHENTICATION_RULE(user):
+            raise AuthenticationFailed(self.error_messages['no_active_account'], 'no_active_account')
+
+        refresh.blacklist()
+        data = {'access': str(refresh.access_token)}
+        refresh.set_jti()
+        refresh.set_exp()
+        refresh.set_iat()
+        refresh.outstand()
+        data['refresh'] = str(refresh)
+        return data
+
+
+class TokenRevokeSerializer(serializers.Serializer):
+    refresh = serializers.CharField()
+
+    def validate(self, attrs):
+        try:
+            StoredRefreshToken(attrs['refresh']).blacklist()
+        except TokenError as e:
+            raise serializers.ValidationError({'refresh': e.args[0]})
+        return attrs
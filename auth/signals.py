@@ -0,0 +1,45 @@
+from django.contrib.auth.models import Group
+from django.db.models.signals import m2m_changed, post_save, pre_delete, pre_save
+from django.dispatch import receiver
+
+from .models import User
+from .roles import UserGroup, roles_changed
+
+
+@receiver(m2m_changed, sender=User.groups.through)
+def user_groups_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    if action == 'post_add':
+        # add() only reports the memberships it actually created.
+        if pk_set:
+            roles_changed(pk_set if reverse else [instance.pk])
+    elif action in ('pre_remove', 'pre_clear'):
+        # remove() reports what it was asked to remove, so look up what exists.
+        if reverse:
+            memberships = UserGroup.objects.filter(group_id=instance.pk)
+            if action == 'pre_remove':
+                memberships = memberships.filter(user_id__in=pk_set)
+        else:
+            memberships = UserGroup.objects.filter(user_id=instance.pk)
+            if action == 'pre_remove':
+                memberships = memberships.filter(group_id__in=pk_set)
+        roles_changed(memberships.values_list('user_id', flat=True).distinct())
+
+
+@receiver(pre_save, sender=Group)
+def group_saving(sender, instance, update_fields=None, **kwargs):
+    if instance._state.adding or (update_fields is not None and 'name' not in update_fields):
+        instance._renamed = False
+    else:
+        instance._renamed = not Group.objects.filter(pk=instance.pk, name=instance.name).exists()
+
+
+@receiver(post_save, sender=Group)
+def group_saved(sender, instance, created, **kwargs):
+    # Roles are group names, so only a rename changes the roles of the members.
+    if not created and instance._renamed:
+        roles_changed(instance.user_set.values_list('pk', flat=True))
+
+
+@receiver(pre_delete, sender=Group)
+def group_deleted(sender, instance, **kwargs):
+    roles_changed(instance.user_set.values_list('pk', flat=True))
@@ -1,3 +1,366 @@
-from django.test import TestCase
+import uuid
+from datetime import timedelta
 
-# Create your tests here.
+from django.contrib.auth.hashers import identify_hasher, make_password
+from django.contrib.auth.models import AnonymousUser, Group
+from django.core.cache import cache
+from django.db import transaction
+from django.test import RequestFactory, TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.exceptions import Throttled
+from rest_framework.test import APITestCase
+from rest_framework_simplejwt.exceptions import InvalidToken
+from rest_framework_simplejwt.tokens import AccessToken
+
+from .authentication import ClaimsUser, StatelessJWTAuthentication
+from .checks import check_shared_cache
+from .hashers import get_hash_pool, run_hash
+from .models import IssuedRefreshToken, User
+from .roles import ROLE_CACHE_KEY, assign_roles, get_roles, has_role, invalidate_roles, load_roles
+from .tokens import BloomFilter, prune_refresh_tokens
+
+
+@override_settings(PASSWORD_HASH_WORKERS=1, PASSWORD_HASH_BACKLOG=0, PASSWORD_HASH_TIMEOUT=0.05)
+class PasswordHashingTests(APITestCase):
+    def login(self, username, password):
+        return self.client.post(reverse('token_obtain_pair'), {'username': username, 'password': password})
+
+    def test_pbkdf2_hash_is_upgraded_on_login(self):
+        user = User.objects.create(
+            username='legacy', email='legacy@example.com', password=make_password('secret', hasher='pbkdf2_sha256')
+        )
+        self.assertEqual(self.login('legacy', 'wrong').status_code, 401)
+        self.assertEqual(identify_hasher(User.objects.get(pk=user.pk).password).algorithm, 'pbkdf2_sha256')
+
+        self.assertEqual(self.login('legacy', 'secret').status_code, 200)
+        user.refresh_from_db()
+        self.assertEqual(identify_hasher(user.password).algorithm, 'argon2')
+        self.assertTrue(user.password.startswith('argon2$argon2id$'))
+        self.assertEqual(self.login('legacy', 'secret').status_code, 200)
+
+    def test_argon2_hash_is_upgraded_when_costs_change(self):
+        user = User.objects.create(username='member', email='member@example.com', password=make_password('secret'))
+        with override_settings(ARGON2_TIME_COST=3):
+            self.assertEqual(self.login('member', 'secret').status_code, 200)
+        user.refresh_from_db()
+        self.assertIn('t=3', user.password)
+
+    def test_full_pool_throttles(self):
+        _, slots = get_hash_pool()
+        slots.acquire()
+        try:
+            with self.assertRaises(Throttled):
+                run_hash(make_password, 'secret')
+        finally:
+            slots.release()
+        self.assertTrue(run_hash(make_password, 'secret').startswith('argon2$'))
+
+
+class UserListTests(APITestCase):
+    def setUp(self):
+        self.superuser = User.objects.create(username='superuser', email='superuser@example.com', is_superuser=True)
+        self.client.force_authenticate(self.superuser)
+        self.groups = [Group.objects.create(name='admin'), Group.objects.create(name='event_organizer')]
+        users = User.objects.bulk_create([
+            User(username=f'user{i:03}', email=f'user{i:03}@example.com') for i in range(120)
+        ])
+        User.groups.through.objects.bulk_create([
+            User.groups.through(user=user, group=group) for user in users for group in self.groups
+        ])
+
+    def test_query_count_does_not_grow_with_page_size(self):
+        # The page of users, then the groups of all of them.
+        with self.assertNumQueries(2):
+            response = self.client.get(reverse('user-list'), {'page_size': 5})
+        self.assertEqual(len(response.json()['users']), 5)
+
+        with self.assertNumQueries(2):
+            response = self.client.get(reverse('user-list'), {'page_size': 200})
+        users = response.json()['users']
+        self.assertEqual(len(users), 121)
+
+        user = next(user for user in users if user['username'] == 'user000')
+        self.assertCountEqual(user['groups'], [
+            f'http://testserver/api/groups/{group.pk}/' for group in self.groups
+        ])
+        self.assertEqual(user['_links'][0]['href'], 'http://testserver/api/users/')
+        self.assertEqual(user['_links'][1]['href'], f"http://testserver/api/users/{user['id']}/")
+
+    def test_detail_and_groups_are_read_only(self):
+        user = User.objects.get(username='user000')
+        url = reverse('user-detail', kwargs={'pk': user.pk})
+        with self.assertNumQueries(2):
+            response = self.client.get(url)
+        self.assertEqual(len(response.json()['groups']), 2)
+
+        self.client.force_authenticate(None)
+        response = self.client.post(reverse('user-list'), {
+            'username': 'signup', 'email': 'signup@example.com', 'password': 'secret',
+            'groups': [f'http://testserver/api/groups/{self.groups[0].pk}/'],
+        }, format='json')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.json()['groups'], [])
+        self.assertFalse(User.objects.get(username='signup').groups.exists())
+
+
+@override_settings(REFRESH_TOKEN_FILTER_SYNC_INTERVAL=0)
+class RefreshTokenStoreTests(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create(username='member', email='member@example.com', password=make_password('secret'))
+
+    def login(self):
+        response = self.client.post(reverse('token_obtain_pair'), {'username': 'member', 'password': 'secret'})
+        self.assertEqual(response.status_code, 200)
+        return response.json()['refresh']
+
+    def refresh(self, token):
+        return self.client.post(reverse('token_refresh'), {'refresh': token})
+
+    def test_refresh_tokens_rotate_and_work_once(self):
+        first = self.login()
+        self.assertEqual(IssuedRefreshToken.objects.filter(user=self.user, revoked_at__isnull=True).count(), 1)
+
+        response = self.refresh(first)
+        self.assertEqual(response.status_code, 200)
+        second = response.json()['refresh']
+        self.assertNotEqual(first, second)
+
+        self.assertEqual(self.refresh(first).status_code, 401)
+        self.assertEqual(self.refresh(second).status_code, 200)
+        self.assertEqual(IssuedRefreshToken.objects.filter(user=self.user, revoked_at__isnull=True).count(), 1)
+
+    def test_revocation_by_jti_and_by_user(self):
+        logged_out, other_device = self.login(), self.login()
+        response = self.client.post(reverse('token_revoke'), {'refresh': logged_out})
+        self.assertEqual(response.status_code, 204)
+        self.assertEqual(self.refresh(logged_out).status_code, 401)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.groups.add(Group.objects.create(name='admin'))
+        self.assertEqual(self.refresh(other_device).status_code, 401)
+        self.assertFalse(IssuedRefreshToken.objects.filter(user=self.user, revoked_at__isnull=True).exists())
+
+
+class RoleLookupTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create(username='member', email='member@example.com')
+        self.admin = Group.objects.create(name='admin')
+        self.user.groups.add(self.admin)
+
+    def request(self, user):
+        request = RequestFactory().get('/')
+        request.user = user
+        return request
+
+    def test_roles_are_loaded_once_per_request(self):
+        request = self.request(self.user)
+        with self.assertNumQueries(1):
+            self.assertEqual(get_roles(request), frozenset({'admin'}))
+            self.assertTrue(has_role(request, 'event_organizer', 'admin'))
+            self.assertFalse(has_role(request, 'event_organizer'))
+        # Without ROLE_CACHE_TIMEOUT, the next request reads them again.
+        with self.assertNumQueries(1):
+            get_roles(self.request(self.user))
+
+        self.assertEqual(get_roles(self.request(AnonymousUser())), frozenset())
+
+    def test_roles_in_token_claims_need_no_query(self):
+        token = AccessToken.for_user(self.user)
+        token['roles'] = ['event_organizer']
+        with self.assertNumQueries(0):
+            self.assertEqual(get_roles(self.request(ClaimsUser(token))), frozenset({'event_organizer'}))
+
+    @override_settings(ROLE_CACHE_TIMEOUT=60)
+    def test_cached_roles_are_dropped_when_memberships_change(self):
+        organizer = Group.objects.create(name='event_organizer')
+        with self.assertNumQueries(1):
+            self.assertEqual(load_roles(self.user.pk), frozenset({'admin'}))
+        with self.assertNumQueries(0):
+            self.assertEqual(get_roles(self.request(self.user)), frozenset({'admin'}))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.groups.add(organizer)
+        self.assertEqual(load_roles(self.user.pk), frozenset({'admin', 'event_organizer'}))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            organizer.name = 'organizer'
+            organizer.save()
+        self.assertEqual(load_roles(self.user.pk), frozenset({'admin', 'organizer'}))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.admin.delete()
+        self.assertEqual(load_roles(self.user.pk), frozenset({'organizer'}))
+
+        invalidate_roles([self.user.pk])
+        self.assertIsNone(cache.get(ROLE_CACHE_KEY.format(self.user.pk)))
+
+    def test_role_cache_requires_a_shared_cache(self):
+        with override_settings(ROLE_CACHE_TIMEOUT=60):
+            errors = check_shared_cache(None)
+        self.assertEqual([error.id for error in errors], ['core_auth.E001'])
+        self.assertIn('ROLE_CACHE_TIMEOUT', errors[0].msg)
+
+        shared = {'default': {'BACKEND': 'django.core.cache.backends.redis.RedisCache', 'LOCATION': 'redis://'}}
+        with override_settings(ROLE_CACHE_TIMEOUT=60, CACHES=shared):
+            self.assertEqual(check_shared_cache(None), [])
+        self.assertEqual(check_shared_cache(None), [])
+
+
+@override_settings(ROLE_CACHE_TIMEOUT=60)
+class BulkRoleTests(APITestCase):
+    def setUp(self):
+        self.client.force_authenticate(
+            User.objects.create(username='superuser', email='superuser@example.com', is_superuser=True)
+        )
+        self.admin = Group.objects.create(name='admin')
+        self.organizer = Group.objects.create(name='event_organizer')
+
+    def create_users(self, count):
+        first = User.objects.count()
+        return User.objects.bulk_create([
+            User(username=f'user{i}', email=f'user{i}@example.com') for i in range(first, first + count)
+        ])
+
+    def roles(self, users, *groups):
+        return {'roles': [{'user_id': str(user.pk), 'group_id': group.pk} for user in users for group in groups]}
+
+    def test_query_count_does_not_grow_with_batch_size(self):
+        few, many = self.create_users(2), self.create_users(50)
+        url = reverse('assign-roles-bulk')
+
+        with self.assertNumQueries(8), self.captureOnCommitCallbacks(execute=True):
+            self.assertEqual(self.client.post(url, self.roles(few, self.admin), format='json').status_code, 201)
+        with self.assertNumQueries(8), self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(url, self.roles(many, self.admin, self.organizer), format='json')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(User.groups.through.objects.count(), 102)
+
+    def test_assign_is_idempotent_and_revoke_invalidates_roles(self):
+        users = self.create_users(3)
+        self.assertEqual(load_roles(users[0].pk), frozenset())
+
+        for _ in range(2):
+            with self.captureOnCommitCallbacks(execute=True):
+                response = self.client.post(reverse('assign-roles-bulk'), self.roles(users, self.admin), format='json')
+            self.assertEqual(response.status_code, 201)
+        self.assertEqual(self.admin.user_set.count(), 3)
+        self.assertEqual(load_roles(users[0].pk), frozenset({'admin'}))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(
+                reverse('revoke-roles-bulk'), self.roles(users[:2], self.admin, self.organizer), format='json'
+            )
+        self.assertEqual(response.json()['revoked'], 2)
+        self.assertEqual(load_roles(users[0].pk), frozenset())
+        self.assertEqual(list(self.admin.user_set.all()), [users[2]])
+
+    def test_roles_change_only_when_the_transaction_commits(self):
+        user = User.objects.create(username='member', email='member@example.com', password=make_password('secret'))
+        response = self.client.post(reverse('token_obtain_pair'), {'username': 'member', 'password': 'secret'})
+        refresh = response.json()['refresh']
+        self.assertEqual(load_roles(user.pk), frozenset())
+
+        with self.captureOnCommitCallbacks() as callbacks:
+            with self.assertRaises(RuntimeError), transaction.atomic():
+                assign_roles([(user.pk, self.admin.pk)])
+                raise RuntimeError
+        self.assertEqual(callbacks, [])
+        self.assertEqual(cache.get(ROLE_CACHE_KEY.format(user.pk)), frozenset())
+
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            assign_roles([(user.pk, self.admin.pk)])
+        self.assertTrue(callbacks)
+        self.assertEqual(load_roles(user.pk), frozenset({'admin'}))
+        self.assertEqual(self.client.post(reverse('token_refresh'), {'refresh': refresh}).status_code, 401)
+
+    def test_only_actual_membership_changes_revoke_tokens(self):
+        user = self.create_users(1)[0]
+        user.groups.add(self.admin)
+
+        with self.captureOnCommitCallbacks() as callbacks:
+            assign_roles([(user.pk, self.admin.pk)])
+            user.groups.add(self.admin)
+            user.groups.remove(self.organizer)
+            self.organizer.save()
+            self.admin.save(update_fields=['name'])
+        self.assertEqual(callbacks, [])
+
+        with self.captureOnCommitCallbacks() as callbacks:
+            self.admin.name = 'administrator'
+            self.admin.save()
+        self.assertEqual(len(callbacks), 1)
+
+    def test_unknown_users_and_groups_are_rejected(self):
+        user = self.create_users(1)[0]
+        response = self.client.post(reverse('assign-roles-bulk'), {'roles': [
+            {'user_id': str(user.pk), 'group_id': self.admin.pk},
+            {'user_id': str(uuid.uuid4()), 'group_id': 0},
+        ]}, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(set(response.json()['roles']), {'user_id', 'group_id'})
+        self.assertFalse(user.groups.exists())
+
+
+class RefreshTokenPruneTests(TestCase):
+    def test_prune_deletes_only_expired_tokens(self):
+        user = User.objects.create(username='member', email='member@example.com')
+        now = timezone.now()
+        IssuedRefreshToken.objects.bulk_create([
+            IssuedRefreshToken(jti=uuid.uuid4(), user=user, expires_at=now + timedelta(days=offset))
+            for offset in (-3, -2, -1, 1, 2)
+        ])
+        self.assertEqual(prune_refresh_tokens(batch_size=2), 3)
+        self.assertEqual(IssuedRefreshToken.objects.count(), 2)
+
+    def test_bloom_filter_has_no_false_negatives(self):
+        bloom = BloomFilter(1000)
+        jtis = [uuid.uuid4().hex for _ in range(1000)]
+        for jti in jtis:
+            bloom.add(jti)
+        self.assertTrue(all(jti in bloom for jti in jtis))
+        self.assertLess(sum(uuid.uuid4().hex in bloom for _ in range(10000)), 100)
+
+
+class StatelessAuthenticationTests(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create(username='member', email='member@example.com', password=make_password('secret'))
+        self.admin = Group.objects.create(name='admin')
+        self.user.groups.add(self.admin)
+
+    def access_token(self):
+        response = self.client.post(reverse('token_obtain_pair'), {'username': 'member', 'password': 'secret'})
+        return response.json()['access']
+
+    def authenticate(self, token):
+        request = RequestFactory().get('/', HTTP_AUTHORIZATION=f'Bearer {token}')
+        user, _ = StatelessJWTAuthentication().authenticate(request)
+        return user
+
+    def test_demoted_user_is_rejected_by_a_fresh_cache(self):
+        token = self.access_token()
+        self.assertEqual(self.authenticate(token).roles, frozenset({'admin'}))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.groups.remove(self.admin)
+        # Another worker, or an evicted entry: nothing about the revocation is cached.
+        cache.clear()
+        with self.assertRaises(InvalidToken):
+            self.authenticate(token)
+        self.assertEqual(self.authenticate(self.access_token()).roles, frozenset())
+
+    @override_settings(TOKEN_REVOCATION_CACHE_TIMEOUT=60)
+    def test_revocation_reaches_a_cached_not_before_time(self):
+        token = self.access_token()
+        with self.assertNumQueries(1):
+            self.authenticate(token)
+        with self.assertNumQueries(0):
+            self.authenticate(token)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.groups.remove(self.admin)
+        with self.assertRaises(InvalidToken):
+            self.authenticate(token)
+        cache.clear()
+        with self.assertRaises(InvalidToken):
+            self.authenticate(token)
@@ -0,0 +1,187 @@
+"""
+Refresh-token store: every refresh token is recorded when issued, rotated on
+use and kept until it expires.
+
+Rotation revokes the presented token with a conditional UPDATE on its primary
+key, so a token can be used once even under concurrent requests. Replayed
+tokens are turned away before that by a per-process bloom filter of revoked
+jtis, which is brought up to date from the partial index on revoked_at.
+Tokens the filter has never seen cost no extra query.
+"""
+import hashlib
+import math
+import threading
+import time
+import uuid
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import RefreshToken
+from rest_framework_simplejwt.utils import datetime_from_epoch
+
+from .models import IssuedRefreshToken
+
+REVOCATIONS_VERSION_KEY = 'auth:refresh-revocations'
+
+# How far back an incremental sync looks, for clock skew between workers and
+# for revocations that commit after the previous sync.
+SYNC_OVERLAP = timedelta(seconds=60)
+
+
+class BloomFilter:
+    def __init__(self, capacity, error_rate=0.001):
+        self.capacity = capacity
+        self.size = max(int(-capacity * math.log(error_rate) / math.log(2) ** 2), 64)
+        self.hashes = max(round(self.size / capacity * math.log(2)), 1)
+        self.bits = bytearray((self.size + 7) // 8)
+        self.count = 0
+
+    def positions(self, key):
+        digest = hashlib.blake2b(key.encode(), digest_size=16).digest()
+        first, second = int.from_bytes(digest[:8], 'little'), int.from_bytes(digest[8:], 'little') | 1
+        return [(first + i * second) % self.size for i in range(self.hashes)]
+
+    def add(self, key):
+        for position in self.positions(key):
+            self.bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def __contains__(self, key):
+        return all(self.bits[position >> 3] & (1 << (position & 7)) for position in self.positions(key))
+
+
+class RevocationFilter:
+    """
+    The revoked, unexpired jtis, as a bloom filter. It is reloaded when the
+    shared cache reports a revocation or after REFRESH_TOKEN_FILTER_SYNC_INTERVAL
+    seconds, and rebuilt from scratch once it holds more than its capacity.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.bloom = None
+        self.version = None
+        self.checked_at = 0.0
+        self.synced_at = None
+
+    def might_contain(self, jti):
+        self.sync()
+        return uuid.UUID(str(jti)).hex in self.bloom
+
+    def sync(self):
+        version = cache.get(REVOCATIONS_VERSION_KEY)
+        now = time.monotonic()
+        if (
+            self.bloom is not None and version == self.version
+            and now - self.checked_at < settings.REFRESH_TOKEN_FILTER_SYNC_INTERVAL
+        ):
+            return
+
+        with self.lock:
+            started = timezone.now()
+            revoked = IssuedRefreshToken.objects.filter(revoked_at__isnull=False)
+            if self.bloom is None or self.bloom.count >= self.bloom.capacity:
+                jtis = list(revoked.filter(expires_at__gt=started).values_list('jti', flat=True))
+                bloom = BloomFilter(max(settings.REFRESH_TOKEN_FILTER_CAPACITY, 2 * len(jtis)))
+            else:
+                jtis = revoked.filter(revoked_at__gte=self.synced_at - SYNC_OVERLAP).values_list('jti', flat=True)
+                bloom = self.bloom
+            for jti in jtis:
+                bloom.add(jti.hex)
+            self.bloom, self.version, self.checked_at, self.synced_at = bloom, version, now, started
+
+
+revocation_filter = RevocationFilter()
+
+
+class StoredRefreshToken(RefreshToken):
+    """
+    A refresh token recorded in IssuedRefreshToken. The token refresh view
+    revokes it through blacklist() and records its successor through outstand().
+    """
+
+    def verify(self, *args, **kwargs):
+        super().verify(*args, **kwargs)
+        if is_refresh_token_revoked(self.payload[api_settings.JTI_CLAIM]):
+            raise TokenError(_('Token is blacklisted'))
+
+    def outstand(self):
+        return IssuedRefreshToken.objects.create(
+            jti=self.payload[api_settings.JTI_CLAIM],
+            user_id=self.payload[api_settings.USER_ID_CLAIM],
+            expires_at=datetime_from_epoch(self.payload['exp']),
+        )
+
+    def blacklist(self):
+        if not revoke_refresh_token(
+            self.payload[api_settings.JTI_CLAIM],
+            user_id=self.payload[api_settings.USER_ID_CLAIM],
+            expires_at=datetime_from_epoch(self.payload['exp']),
+        ):
+            raise TokenError(_('Token is blacklisted'))
+
+
+def is_refresh_token_revoked(jti):
+    return revocation_filter.might_contain(jti) and IssuedRefreshToken.objects.filter(
+        jti=jti, revoked_at__isnull=False
+    ).exists()
+
+
+def revoke_refresh_token(jti, user_id=None, expires_at=None):
+    """
+    Revokes one refresh token. Returns False when it was already revoked, so
+    only one of several concurrent uses of a token succeeds.
+    """
+    now = timezone.now()
+    revoked = IssuedRefreshToken.objects.filter(jti=jti, revoked_at__isnull=True).update(revoked_at=now)
+    if not revoked and user_id is not None and not IssuedRefreshToken.objects.filter(jti=jti).exists():
+        # Tokens issued before the store existed are recorded on their first use.
+        try:
+            with transaction.atomic():
+                IssuedRefreshToken.objects.create(jti=jti, user_id=user_id, expires_at=expires_at, revoked_at=now)
+            revoked = 1
+        except IntegrityError:
+            revoked = 0
+    if revoked:
+        revocations_changed()
+    return bool(revoked)
+
+
+def revoke_user_refresh_tokens(user_ids):
+    """
+    Revokes every unexpired refresh token of the given users.
+    """
+    now = timezone.now()
+    revoked = IssuedRefreshToken.objects.filter(
+        user_id__in=user_ids, revoked_at__isnull=True, expires_at__gt=now
+    ).update(revoked_at=now)
+    if revoked:
+        revocations_changed()
+    return revoked
+
+
+def revocations_changed():
+    transaction.on_commit(lambda: cache.set(REVOCATIONS_VERSION_KEY, uuid.uuid4().hex, None))
+
+
+def prune_refresh_tokens(batch_size=5000, before=None):
+    """
+    Deletes expired refresh tokens in batches of primary keys found through the
+    expires_at index, each batch in its own short transaction. Returns the
+    number of rows deleted.
+    """
+    before = before or timezone.now()
+    deleted = 0
+    while True:
+        batch = list(
+            IssuedRefreshToken.objects.filter(expires_at__lt=before).values_list('jti', flat=True)[:batch_size]
+        )
+        if not batch:
+            return deleted
+        deleted += IssuedRefreshToken.objects.filter(jti__in=batch).delete()[0]
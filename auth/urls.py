@@ -7,4 +7,6 @@ urlpatterns = [
   path('groups/', views.GroupListCreateView.as_view(), name='group-list'),
   path('groups/<int:pk>/', views.GroupDetailView.as_view(), name='group-detail'),
   path('assign-roles/', views.AssignRoleView.as_view(), name='assign-roles'),
+  path('assign-roles/bulk/', views.BulkAssignRoleView.as_view(), name='assign-roles-bulk'),
+  path('revoke-roles/bulk/', views.BulkRevokeRoleView.as_view(), name='revoke-roles-bulk'),
 ]
\ No newline at end of file
@@ -1,19 +1,24 @@
 from django.contrib.auth.models import Group
 from django.http import Http404
 from rest_framework.generics import get_object_or_404
-from rest_framework.permissions import IsAuthenticated
+from rest_framework.permissions import AllowAny, IsAuthenticated
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status
-from rest_framework_simplejwt.authentication import JWTAuthentication
 
+from dico_event_be.pagination import KeysetPagination
 from .permissions import IsOwnerOrAdminOrSuperUser, IsSuperUser, IsAdminOrSuperUser
-from .serializers import GroupSerializer, AssignRoleSerializer, UserSerializer
+from .roles import assign_roles, revoke_roles
+from .serializers import (
+    GroupSerializer, AssignRoleSerializer, BulkRoleSerializer, TokenRevokeSerializer, UserSerializer
+)
 from .models import User
 
-class UserListCreateView(APIView):
-    authentication_classes = [JWTAuthentication]
+# Each user costs no queries of its own, so the user list can serve larger pages.
+USER_LIST_MAX_PAGE_SIZE = 500
+
 
+class UserListCreateView(APIView):
     def get_permissions(self):
         if self.request.method == 'GET':
             return [IsAdminOrSuperUser(), IsAuthenticated()]
@@ -21,12 +26,13 @@ class UserListCreateView(APIView):
         return []
 
     def get(self, request):
-        users = User.objects.all().order_by('username')[:10]
-        serializer = UserSerializer(users, many=True)
-        return Response({'users': serializer.data})
+        paginator = KeysetPagination(ordering=('username',), max_page_size=USER_LIST_MAX_PAGE_SIZE)
+        users = paginator.paginate_queryset(User.objects.prefetch_related('groups'), request)
+        serializer = UserSerializer(users, many=True, context={'request': request})
+        return Response(paginator.get_paginated_data('users', serializer.data))
 
     def post(self, request):
-        serializer = UserSerializer(data=request.data)
+        serializer = UserSerializer(data=request.data, context={'request': request})
         if serializer.is_valid():
             serializer.save()
             return Response(serializer.data, status=status.HTTP_201_CREATED)
@@ -34,12 +40,11 @@ class UserListCreateView(APIView):
 
 
 class UserDetailView(APIView):
-    authentication_classes = [JWTAuthentication]
     permission_classes = [IsAuthenticated, IsOwnerOrAdminOrSuperUser]
 
     def get_object(self, pk):
         try:
-            user = User.objects.get(pk=pk)
+            user = User.objects.prefetch_related('groups').get(pk=pk)
             self.check_object_permissions(self.request, user)
             return user
         except User.DoesNotExist:
@@ -47,12 +52,12 @@ class UserDetailView(APIView):
 
     def get(self, request, pk):
         user = self.get_object(pk)
-        serializer = UserSerializer(user)
+        serializer = UserSerializer(user, context={'request': request})
         return Response(serializer.data)
 
     def put(self, request, pk):
         user = self.get_object(pk)
-        serializer = UserSerializer(user, data=request.data)
+        serializer = UserSerializer(user, data=request.data, context={'request': request})
         if serializer.is_valid():
             serializer.save()
             return Response(serializer.data)
@@ -65,13 +70,13 @@ class UserDetailView(APIView):
 
 
 class GroupListCreateView(APIView):
-    authentication_classes = [JWTAuthentication]
     permission_classes = [IsAuthenticated, IsSuperUser]
 
     def get(self, request):
-        groups = Group.objects.all().order_by('name')[:10]
+        paginator = KeysetPagination(ordering=('name',))
+        groups = paginator.paginate_queryset(Group.objects.all(), request)
         serializer = GroupSerializer(groups, many=True)
-        return Response({'groups': serializer.data})
+        return Response(paginator.get_paginated_data('groups', serializer.data))
 
     def post(self, request):
         serializer = GroupSerializer(data=request.data)
@@ -82,7 +87,6 @@ class GroupListCreateView(APIView):
 
 
 class GroupDetailView(APIView):
-    authentication_classes = [JWTAuthentication]
     permission_classes = [IsAuthenticated, IsSuperUser]
 
     def get_object(self, pk):
@@ -113,7 +117,6 @@ class GroupDetailView(APIView):
 
 
 class AssignRoleView(APIView):
-    authentication_classes = [JWTAuthentication]
     permission_classes = [IsAuthenticated, IsSuperUser]
 
     def post(self, request):
@@ -124,4 +127,39 @@ class AssignRoleView(APIView):
         group = get_object_or_404(Group, pk=serializer.validated_data['group_id'])
 
         user.groups.add(group)
-        return Response({'message': 'Role assigned successfully'}, status=status.HTTP_201_CREATED)
\ No newline at end of file
+        return Response({'message': 'Role assigned successfully'}, status=status.HTTP_201_CREATED)
+
+
+class BulkAssignRoleView(APIView):
+    permission_classes = [IsAuthenticated, IsSuperUser]
+
+    def post(self, request):
+        serializer = BulkRoleSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+
+        assign_roles(serializer.validated_data['roles'])
+        return Response({'message': 'Roles assigned successfully'}, status=status.HTTP_201_CREATED)
+
+
+class BulkRevokeRoleView(APIView):
+    permission_classes = [IsAuthenticated, IsSuperUser]
+
+    def post(self, request):
+        serializer = BulkRoleSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+
+        revoked = revoke_roles(serializer.validated_data['roles'])
+        return Response({'message': 'Roles revoked successfully', 'revoked': revoked}, status=status.HTTP_200_OK)
+
+
+class TokenRevokeView(APIView):
+    """
+    Revokes a refresh token, e.g. on logout. The token itself is the credential.
+    """
+    authentication_classes = []
+    permission_classes = [AllowAny]
+
+    def post(self, request):
+        serializer = TokenRevokeSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        return Response(status=status.HTTP_204_NO_CONTENT)
@@ -0,0 +1,98 @@
+"""
+Helpers shared by the bench_* and loadtest_* management commands: seeding
+throwaway rows, driving the WSGI handler in-process and running work on a
+thread pool whose database connections are closed afterwards.
+"""
+import io
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django.db import connections
+from django.utils import timezone
+
+from auth.models import User
+from event.models import Event, EventOrganizer, EventSession
+
+
+def seed_users(prefix, count, password=''):
+    """
+    Bulk creates count users named {prefix}-user-NNNNNN; password is an encoded password.
+    """
+    return User.objects.bulk_create([
+        User(username=f'{prefix}-user-{i:06}', email=f'{prefix}-user-{i:06}@example.com', password=password)
+        for i in range(count)
+    ])
+
+
+def seed_events(count, category, sessions=1, organizers=(), name='Benchmark event', quota=100):
+    """
+    Bulk creates count open events in category, each with sessions two-hour
+    sessions on consecutive days and, when organizers is given, one of them,
+    in turn, as its organizer.
+    """
+    start_time = timezone.now().replace(hour=9, minute=0, second=0, microsecond=0)
+    events = Event.objects.bulk_create([
+        Event(name=f'{name} {i}', description='Benchmark description', location='Jakarta', status='open',
+              quota=quota, category=category)
+        for i in range(count)
+    ])
+    EventSession.objects.bulk_create([
+        EventSession(event=event, start_time=start_time + timedelta(days=day),
+                     end_time=start_time + timedelta(days=day, hours=2))
+        for event in events
+        for day in range(sessions)
+    ], batch_size=2000)
+    if organizers:
+        EventOrganizer.objects.bulk_create([
+            EventOrganizer(event=event, user=organizers[i % len(organizers)]) for i, event in enumerate(events)
+        ], batch_size=2000)
+    return events
+
+
+def wsgi_environ(method, path, body=b'', headers=None):
+    """
+    The WSGI environ of a request to localhost; path may carry a query string
+    and headers are given as HTTP_* environ keys.
+    """
+    path, _, query = path.partition('?')
+    return {
+        'REQUEST_METHOD': method, 'PATH_INFO': path, 'QUERY_STRING': query, 'SERVER_NAME': 'localhost',
+        'SERVER_PORT': '80', 'SERVER_PROTOCOL': 'HTTP/1.1', 'wsgi.url_scheme': 'http', 'HTTP_HOST': 'localhost',
+        'CONTENT_TYPE': 'application/json', 'CONTENT_LENGTH': str(len(body)), 'wsgi.input': io.BytesIO(body),
+        **(headers or {}),
+    }
+
+
+def wsgi_request(handler, method, path, body=b'', headers=None):
+    """
+    Runs one request through a WSGIHandler and returns (status code, body).
+    """
+    response = {}
+    content = b''.join(handler(
+        wsgi_environ(method, path, body, headers), lambda status, response_headers: response.update(status=status)
+    ))
+    return int(response['status'].split()[0]), content
+
+
+def run_in_threads(func, items, workers):
+    """
+    Maps func over items on workers threads and returns the results with the
+    seconds the map took. Each thread then closes the database connections it
+    opened, which would otherwise be left for the server to time out.
+    """
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        started = time.perf_counter()
+        results = list(executor.map(func, items))
+        elapsed = time.perf_counter() - started
+
+        # The barrier holds each thread until all of them have taken one of these calls.
+        barrier = threading.Barrier(workers)
+
+        def close_connections(_):
+            barrier.wait()
+            connections.close_all()
+
+        list(executor.map(close_connections, range(workers)))
+    return results, elapsed
@@ -0,0 +1,116 @@
+"""
+PostgreSQL backend that checks connections out of a psycopg_pool.ConnectionPool.
+
+Django 4.2 has no built-in pooling: with CONN_MAX_AGE = 0 every request opens
+and closes its own connection. This wrapper keeps one pool per database alias
+and process, hands its connections to Django on connect and gives them back on
+close, so the end of a request returns the connection instead of closing it.
+"""
+import threading
+
+from django.core.exceptions import ImproperlyConfigured
+from django.db.backends.base.base import NO_DB_ALIAS
+from django.db.backends.postgresql import base
+from django.db.backends.postgresql.base import Cursor, ServerBindingCursor
+from psycopg import IsolationLevel
+
+from .creation import DatabaseCreation
+
+try:
+    from psycopg_pool import ConnectionPool
+except ImportError:
+    ConnectionPool = None
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    creation_class = DatabaseCreation
+
+    def __init__(self, settings_dict, alias=None):
+        super().__init__(settings_dict, alias)
+        if self.settings_dict['CONN_MAX_AGE'] != 0:
+            raise ImproperlyConfigured('Pooled connections are returned after every request; set CONN_MAX_AGE to 0.')
+
+    @property
+    def pool(self):
+        # The connection used to create and drop the test database is not pooled.
+        if self.alias == NO_DB_ALIAS:
+            return None
+        key = (self.alias, self.settings_dict['NAME'])
+        pool = _pools.get(key)
+        if pool is None:
+            with _pools_lock:
+                pool = _pools.get(key)
+                if pool is None:
+                    pool = _pools[key] = self._create_pool()
+        return pool
+
+    def _create_pool(self):
+        if ConnectionPool is None:
+            raise ImproperlyConfigured('The pooled PostgreSQL backend requires the psycopg_pool package.')
+        options = self.settings_dict['OPTIONS']
+        try:
+            isolation_level = IsolationLevel(options['isolation_level']) if 'isolation_level' in options else None
+        except ValueError:
+            raise ImproperlyConfigured(
+                f"Invalid transaction isolation level {options['isolation_level']} "
+                f"specified. Use one of the psycopg.IsolationLevel values."
+            )
+        cursor_factory = ServerBindingCursor if options.get('server_side_binding') is True else Cursor
+
+        def configure(connection):
+            # Runs once for every connection the pool opens.
+            if isolation_level is not None:
+                connection.isolation_level = isolation_level
+            connection.cursor_factory = cursor_factory
+
+        kwargs = self.get_connection_params()
+        # Django switches autocommit on or off itself after every checkout.
+        kwargs['autocommit'] = True
+        return ConnectionPool(
+            kwargs=kwargs,
+            configure=configure,
+            check=ConnectionPool.check_connection if self.settings_dict['CONN_HEALTH_CHECKS'] else None,
+            name=self.alias,
+            open=True,
+            **options.get('pool', {})
+        )
+
+    def get_connection_params(self):
+        conn_params = super().get_connection_params()
+        conn_params.pop('pool', None)
+        return conn_params
+
+    def get_new_connection(self, conn_params):
+        pool = self.pool
+        if pool is None:
+            return super().get_new_connection(conn_params)
+        connection = pool.getconn()
+        self.isolation_level = connection.isolation_level or IsolationLevel.READ_COMMITTED
+        return connection
+
+    def _close(self):
+        pool = self.pool
+        if pool is None or self.connection is None:
+            return super()._close()
+        with self.wrap_database_errors:
+            # The pool rolls back an open transaction before reusing the connection.
+            pool.putconn(self.connection)
+
+
+def close_pools(alias=None):
+    """
+    Closes the pools of one alias, or all of them, in this process.
+    """
+    with _pools_lock:
+        for key in [key for key in _pools if alias is None or key[0] == alias]:
+            _pools.pop(key).close()
+
+
+def pool_stats():
+    """
+    The psycopg_pool counters of every pool opened by this process, by alias.
+    """
+    return {alias: pool.get_stats() for (alias, _), pool in list(_pools.items())}
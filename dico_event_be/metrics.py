@@ -0,0 +1,235 @@
+"""
+Per-route request metrics in the Prometheus text format.
+
+MetricsMiddleware times every request, counts its SQL queries and the time
+spent in them through an execute wrapper, times the rendering of template
+responses (DRF's Response) and records the response size. It serves sync and
+async requests alike; the wrapper finds the request it belongs to through a
+context variable, which follows async views into their sync_to_async threads. The
+numbers are kept per worker process and served by metrics_view at /metrics.
+
+With METRICS_ENABLED off the middleware removes itself at startup, so it
+costs nothing per request.
+"""
+import bisect
+import logging
+import threading
+import time
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.http import Http404, HttpResponse
+from django.utils.crypto import constant_time_compare
+
+from .db.base import pool_stats
+
+logger = logging.getLogger(__name__)
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+QUERY_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576)
+
+
+class Histogram:
+    def __init__(self, name, documentation, buckets):
+        self.name = name
+        self.documentation = documentation
+        self.buckets = buckets
+        self.series = {}
+        self.lock = threading.Lock()
+
+    def observe(self, labels, value):
+        with self.lock:
+            series = self.series.get(labels)
+            if series is None:
+                series = self.series[labels] = [[0] * (len(self.buckets) + 1), 0, 0]
+            series[0][bisect.bisect_left(self.buckets, value)] += 1
+            series[1] += value
+            series[2] += 1
+
+    def expose(self):
+        yield f'# HELP {self.name} {self.documentation}'
+        yield f'# TYPE {self.name} histogram'
+        with self.lock:
+            series = [(labels, list(counts), total, count) for labels, (counts, total, count) in self.series.items()]
+        for labels, counts, total, count in sorted(series):
+            cumulative = 0
+            for bound, bucket_count in zip((*self.buckets, '+Inf'), counts):
+                cumulative += bucket_count
+                yield f'{self.name}_bucket{format_labels(labels, le=bound)} {cumulative}'
+            yield f'{self.name}_sum{format_labels(labels)} {total}'
+            yield f'{self.name}_count{format_labels(labels)} {count}'
+
+
+class Counter:
+    def __init__(self, name, documentation):
+        self.name = name
+        self.documentation = documentation
+        self.series = {}
+        self.lock = threading.Lock()
+
+    def inc(self, labels, value=1):
+        with self.lock:
+            self.series[labels] = self.series.get(labels, 0) + value
+
+    def expose(self):
+        yield f'# HELP {self.name} {self.documentation}'
+        yield f'# TYPE {self.name} counter'
+        with self.lock:
+            series = sorted(self.series.items())
+        for labels, value in series:
+            yield f'{self.name}{format_labels(labels)} {value}'
+
+
+# Labels are (method, route) tuples; requests_total adds the status code.
+requests_total = Counter('http_requests_total', 'Requests by route and status code.')
+request_duration = Histogram('http_request_duration_seconds', 'Time to produce the response.', LATENCY_BUCKETS)
+request_queries = Histogram('http_request_db_queries', 'SQL queries per request.', QUERY_BUCKETS)
+request_db_duration = Histogram('http_request_db_duration_seconds', 'Time spent in SQL per request.', LATENCY_BUCKETS)
+render_duration = Histogram(
+    'http_response_render_seconds', 'Time to render template and DRF responses.', LATENCY_BUCKETS
+)
+response_size = Histogram('http_response_size_bytes', 'Size of non-streaming response bodies.', SIZE_BUCKETS)
+
+METRICS = (requests_total, request_duration, request_queries, request_db_duration, render_duration, response_size)
+
+LABEL_NAMES = ('method', 'route', 'status')
+
+
+def format_labels(labels, **extra):
+    pairs = [*zip(LABEL_NAMES, labels), *extra.items()]
+    return '{' + ','.join(f'{name}="{escape(value)}"' for name, value in pairs) + '}'
+
+
+def escape(value):
+    return str(value).replace('\\', r'\\').replace('"', r'\"').replace('\n', r'\n')
+
+
+class QueryTimer:
+    """
+    execute_wrapper() hook counting the queries of one request and the time spent in them.
+    """
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.count = 0
+        self.duration = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.duration += time.perf_counter() - started
+            self.count += 1
+
+
+_request_queries = ContextVar('request_queries', default=None)
+
+
+def time_query(execute, sql, params, many, context):
+    """
+    Execute wrapper installed once on every connection, timing the query for
+    the QueryTimer of the current request, if any.
+    """
+    queries = _request_queries.get()
+    if queries is None:
+        return execute(sql, params, many, context)
+    return queries(execute, sql, params, many, context)
+
+
+def install_query_timer(connection, **kwargs):
+    if time_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(time_query)
+
+
+class MetricsMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not settings.METRICS_ENABLED:
+            raise MiddlewareNotUsed()
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+        # Connections opened later, in any thread, get the wrapper when they connect.
+        connection_created.connect(install_query_timer, dispatch_uid='metrics.install_query_timer')
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        for connection in connections.all(initialized_only=True):
+            install_query_timer(connection)
+        queries, token = self.start(request)
+        try:
+            response = self.get_response(request)
+        finally:
+            _request_queries.reset(token)
+        return self.record(request, response, queries)
+
+    async def __acall__(self, request):
+        queries, token = self.start(request)
+        try:
+            response = await self.get_response(request)
+        finally:
+            _request_queries.reset(token)
+        return self.record(request, response, queries)
+
+    def start(self, request):
+        queries = QueryTimer()
+        request._render_duration = 0.0
+        return queries, _request_queries.set(queries)
+
+    def record(self, request, response, queries):
+        duration = time.perf_counter() - queries.started
+        match = request.resolver_match
+        labels = (request.method, match.route if match is not None else 'unmatched')
+        requests_total.inc((*labels, response.status_code))
+        request_duration.observe(labels, duration)
+        request_queries.observe(labels, queries.count)
+        request_db_duration.observe(labels, queries.duration)
+        render_duration.observe(labels, request._render_duration)
+        if not response.streaming:
+            response_size.observe(labels, len(response.content))
+
+        if settings.METRICS_SLOW_REQUEST_MS and duration * 1000 >= settings.METRICS_SLOW_REQUEST_MS:
+            logger.warning(
+                'Slow request %s %s: %.1f ms, %d queries, %.1f ms in SQL, %.1f ms rendering',
+                request.method, request.get_full_path(), duration * 1000, queries.count, queries.duration * 1000,
+                request._render_duration * 1000,
+            )
+        return response
+
+    def process_template_response(self, request, response):
+        started = time.perf_counter()
+
+        def rendered(response):
+            request._render_duration = time.perf_counter() - started
+
+        response.add_post_render_callback(rendered)
+        return response
+
+
+def metrics_view(request):
+    """
+    The metrics of this worker process, in the Prometheus text format.
+    """
+    if not settings.METRICS_ENABLED:
+        raise Http404()
+    if settings.METRICS_TOKEN and not constant_time_compare(
+            request.headers.get('Authorization', ''), f'Bearer {settings.METRICS_TOKEN}'
+    ):
+        return HttpResponse(status=401)
+
+    lines = []
+    for metric in METRICS:
+        lines.extend(metric.expose())
+    for alias, stats in pool_stats().items():
+        for name, value in sorted(stats.items()):
+            lines.append(f'db_pool_{name.removeprefix("pool_")}{{alias="{escape(alias)}"}} {value}')
+    return HttpResponse('\n'.join(lines) + '\n', content_type='text/plain; version=0.0.4; charset=utf-8')
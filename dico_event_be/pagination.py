@@ -0,0 +1,125 @@
+import base64
+import json
+
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.utils.urls import replace_query_param
+
+
+class KeysetPagination:
+    """
+    Cursor pagination over a unique ordering, e.g. ('-created_at', '-id').
+
+    The cursor is an opaque token holding the ordering values of the last row
+    on the page, so every page is a single indexed range scan instead of an
+    OFFSET that grows with the page number.
+    """
+
+    ordering = ('-created_at', '-id')
+    page_size = 10
+    max_page_size = 100
+    page_size_query_param = 'page_size'
+    cursor_query_param = 'cursor'
+    invalid_cursor_message = 'Invalid cursor'
+
+    def __init__(self, ordering=None, max_page_size=None):
+        if ordering is not None:
+            self.ordering = tuple(ordering)
+        if max_page_size is not None:
+            self.max_page_size = max_page_size
+        self.next_cursor = None
+        self.request = None
+        self.limit = self.page_size
+
+    def paginate_queryset(self, queryset, request):
+        return self.get_page(list(self.page_queryset(queryset, request)))
+
+    async def apaginate_queryset(self, queryset, request):
+        return self.get_page([row async for row in self.page_queryset(queryset, request)])
+
+    def page_queryset(self, queryset, request):
+        """
+        The ordered slice after the cursor, holding the page plus one look-ahead row.
+        """
+        self.request = request
+        self.limit = self.get_page_size(request)
+
+        queryset = queryset.order_by(*self.ordering)
+
+        position = self.decode_cursor(request, queryset.model, self.fields)
+        if position is not None:
+            queryset = queryset.filter(self._after(position))
+        return queryset[:self.limit + 1]
+
+    def get_page(self, rows):
+        if len(rows) > self.limit:
+            rows = rows[:self.limit]
+            self.next_cursor = self.encode_cursor(rows[-1], self.fields)
+        return rows
+
+    @property
+    def fields(self):
+        return [self._field_name(order) for order in self.ordering]
+
+    def get_page_size(self, request):
+        try:
+            page_size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        if page_size <= 0:
+            return self.page_size
+        return min(page_size, self.max_page_size)
+
+    def get_next_link(self):
+        if self.next_cursor is None:
+            return None
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, self.next_cursor)
+
+    def get_paginated_data(self, key, data):
+        return {key: data, 'next': self.get_next_link()}
+
+    def encode_cursor(self, obj, fields):
+        values = [str(self._value(obj, field)) for field in fields]
+        raw = json.dumps(values, separators=(',', ':')).encode('utf-8')
+        return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+    def decode_cursor(self, request, model, fields):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+
+        try:
+            padded = encoded + '=' * (-len(encoded) % 4)
+            values = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+            if not isinstance(values, list) or len(values) != len(fields):
+                raise ValueError
+            return [
+                model._meta.get_field(field).to_python(value)
+                for field, value in zip(fields, values)
+            ]
+        except Exception:
+            raise NotFound(self.invalid_cursor_message)
+
+    def _after(self, position):
+        # (a, b) after (x, y) expands to: a > x OR (a = x AND b > y),
+        # with the comparison flipped for descending fields.
+        condition = Q()
+        equal = Q()
+        for order, value in zip(self.ordering, position):
+            field = self._field_name(order)
+            lookup = 'lt' if order.startswith('-') else 'gt'
+            condition |= equal & Q(**{f'{field}__{lookup}': value})
+            equal &= Q(**{field: value})
+        return condition
+
+    @staticmethod
+    def _field_name(order):
+        return order.lstrip('-')
+
+    @staticmethod
+    def _value(obj, field):
+        value = obj[field] if isinstance(obj, dict) else getattr(obj, field)
+        if hasattr(value, 'isoformat'):
+            return value.isoformat()
+        return value
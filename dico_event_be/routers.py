@@ -0,0 +1,181 @@
+"""
+Read-replica routing.
+
+Reads go to a random replica that is not lagging behind the primary; writes,
+migrations, reads inside a transaction and every query of a request or job
+that is pinned to the primary go to `default`. ReplicaPinningMiddleware pins unsafe requests, and for
+REPLICA_PIN_SECONDS after a successful write it pins the same client through
+a signed cookie, or a header for clients that do not keep cookies, so clients
+read their own writes. The middleware serves sync and async requests.
+"""
+import logging
+import random
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.exceptions import SynchronousOnlyOperation
+from django.core.signing import BadSignature, Signer
+from django.db import DEFAULT_DB_ALIAS, DatabaseError, connections
+
+logger = logging.getLogger(__name__)
+
+PIN_COOKIE = 'primary_until'
+PIN_HEADER = 'X-Primary-Until'
+
+# Zero when the replica has replayed everything it received, which also holds
+# for a primary standing in for a replica.
+REPLICA_LAG_SQL = """
+    SELECT CASE
+        WHEN NOT pg_is_in_recovery() OR pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+        ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0)
+    END
+"""
+
+_pinned = ContextVar('pinned_to_primary', default=False)
+_pin_signer = Signer(salt='dico_event_be.routers.pin')
+_lag_checks = {}
+
+
+def pin_to_primary():
+    """
+    Sends the reads of the current request or task to the primary. Returns a
+    token for unpin().
+    """
+    return _pinned.set(True)
+
+
+def unpin(token):
+    _pinned.reset(token)
+
+
+def is_pinned():
+    return _pinned.get()
+
+
+@contextmanager
+def primary():
+    """
+    Sends the reads inside the block to the primary, for code that runs
+    outside a request: job workers and batch commands.
+    """
+    token = pin_to_primary()
+    try:
+        yield
+    finally:
+        unpin(token)
+
+
+def replica_lag(alias):
+    """
+    Seconds the replica is behind the primary, or None when it cannot be asked.
+    """
+    try:
+        with connections[alias].cursor() as cursor:
+            cursor.execute(REPLICA_LAG_SQL)
+            return float(cursor.fetchone()[0])
+    except DatabaseError:
+        logger.warning('Replica %s is unavailable', alias, exc_info=True)
+        connections[alias].close()
+        return None
+
+
+def is_healthy(alias):
+    """
+    Whether the replica was within REPLICA_MAX_LAG the last time it was checked,
+    asking again at most every REPLICA_LAG_CHECK_INTERVAL seconds.
+    """
+    checked_at, healthy = _lag_checks.get(alias, (None, True))
+    now = time.monotonic()
+    if checked_at is None or now - checked_at >= settings.REPLICA_LAG_CHECK_INTERVAL:
+        try:
+            lag = replica_lag(alias)
+        except SynchronousOnlyOperation:
+            # Routed from an event loop; keep the last answer until a sync caller checks.
+            return healthy
+        healthy = lag is not None and lag <= settings.REPLICA_MAX_LAG
+        _lag_checks[alias] = (now, healthy)
+    return healthy
+
+
+class ReplicaRouter:
+    def __init__(self, replicas=None):
+        if replicas is None:
+            replicas = [alias for alias in settings.DATABASES if alias != DEFAULT_DB_ALIAS]
+        self.replicas = replicas
+
+    def db_for_read(self, model, **hints):
+        # Reads inside a transaction on the primary must see its uncommitted
+        # writes. select_for_update() querysets are routed as writes already.
+        if not self.replicas or is_pinned() or connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            return DEFAULT_DB_ALIAS
+        healthy = [alias for alias in self.replicas if is_healthy(alias)]
+        return random.choice(healthy) if healthy else DEFAULT_DB_ALIAS
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Replicas hold the same rows as the primary.
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db == DEFAULT_DB_ALIAS
+
+
+class ReplicaPinningMiddleware:
+    """
+    Pins unsafe requests, and the requests of a client that wrote in the last
+    REPLICA_PIN_SECONDS, to the primary.
+    """
+    safe_methods = ('GET', 'HEAD', 'OPTIONS')
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        token = self.pin(request)
+        try:
+            response = self.get_response(request)
+        finally:
+            if token is not None:
+                unpin(token)
+        return self.process_response(request, response)
+
+    async def __acall__(self, request):
+        token = self.pin(request)
+        try:
+            response = await self.get_response(request)
+        finally:
+            if token is not None:
+                unpin(token)
+        return self.process_response(request, response)
+
+    def pin(self, request):
+        if request.method not in self.safe_methods or self.pinned_until(request) > time.time():
+            return pin_to_primary()
+        return None
+
+    def process_response(self, request, response):
+        if request.method not in self.safe_methods and response.status_code < 400:
+            until = _pin_signer.sign(str(int(time.time() + settings.REPLICA_PIN_SECONDS)))
+            response.set_cookie(PIN_COOKIE, until, max_age=settings.REPLICA_PIN_SECONDS, httponly=True)
+            response[PIN_HEADER] = until
+        return response
+
+    def pinned_until(self, request):
+        value = request.headers.get(PIN_HEADER) or request.COOKIES.get(PIN_COOKIE)
+        try:
+            until = int(_pin_signer.unsign(value))
+        except (TypeError, ValueError, BadSignature):
+            return 0
+        # Signed by this service, and still no later than a write made now would pin the client.
+        return min(until, time.time() + settings.REPLICA_PIN_SECONDS)
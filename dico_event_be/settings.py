@@ -40,6 +40,7 @@ AUTH_USER_MODEL = 'core_auth.User'
 INSTALLED_APPS = [
     'auth.apps.AuthConfig',
     'event.apps.EventConfig',
+    'jobs.apps.JobsConfig',
     'rest_framework_simplejwt',
     'rest_framework',
     'django.contrib.admin',
@@ -48,10 +49,13 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.postgres',
 ]
 
 MIDDLEWARE = [
+    'dico_event_be.metrics.MetricsMiddleware',
     'django.middleware.security.SecurityMiddleware',
+    'dico_event_be.routers.ReplicaPinningMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -80,8 +84,13 @@ TEMPLATES = [
 
 WSGI_APPLICATION = 'dico_event_be.wsgi.application'
 
+# Stateless mode builds request.user from access token claims instead of loading the users row.
+JWT_STATELESS_AUTH = os.getenv('JWT_STATELESS_AUTH', 'False') == 'True'
+
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
+        'auth.authentication.StatelessJWTAuthentication'
+        if JWT_STATELESS_AUTH else
         'rest_framework_simplejwt.authentication.JWTAuthentication',
     )
 }
@@ -95,17 +104,81 @@ REST_FRAMEWORK = {
 #         'NAME': BASE_DIR / 'db.sqlite3',
 #     }
 # }
+DATABASE_POOL = os.getenv('DATABASE_POOL', 'False') == 'True'
+
 DATABASES = {
     'default': {
-        'ENGINE': 'django.db.backends.postgresql',
+        'ENGINE': 'dico_event_be.db' if DATABASE_POOL else 'django.db.backends.postgresql',
         'NAME': os.getenv('DATABASE_NAME'),
         'USER': os.getenv('DATABASE_USER'),
         'PASSWORD': os.getenv('DATABASE_PASSWORD'),
         'HOST': os.getenv('DATABASE_HOST'),
         'PORT': os.getenv('DATABASE_PORT'),
+        # Pooled connections go back to the pool at the end of every request.
+        'CONN_MAX_AGE': 0 if DATABASE_POOL else int(os.getenv('DATABASE_CONN_MAX_AGE', 0)),
+        'CONN_HEALTH_CHECKS': os.getenv('DATABASE_CONN_HEALTH_CHECKS', 'False') == 'True',
+        'OPTIONS': {
+            'pool': {
+                'min_size': int(os.getenv('DATABASE_POOL_MIN_SIZE', 2)),
+                'max_size': int(os.getenv('DATABASE_POOL_MAX_SIZE', 10)),
+                'max_idle': float(os.getenv('DATABASE_POOL_MAX_IDLE', 600)),
+                'max_lifetime': float(os.getenv('DATABASE_POOL_MAX_LIFETIME', 3600)),
+                'timeout': float(os.getenv('DATABASE_POOL_TIMEOUT', 30)),
+            },
+        } if DATABASE_POOL else {},
     }
 }
 
+# Comma-separated host[:port] list of read replicas, added as replica_1, replica_2, ...
+# with the credentials of the default database.
+DATABASE_REPLICA_HOSTS = [host for host in os.getenv('DATABASE_REPLICA_HOSTS', '').split(',') if host]
+
+for index, replica in enumerate(DATABASE_REPLICA_HOSTS, 1):
+    host, _, port = replica.partition(':')
+    DATABASES[f'replica_{index}'] = {
+        **DATABASES['default'],
+        'HOST': host,
+        'PORT': port or DATABASES['default']['PORT'],
+        'TEST': {'MIRROR': 'default'},
+    }
+
+DATABASE_ROUTERS = ['dico_event_be.routers.ReplicaRouter']
+
+# Seconds a client that wrote keeps reading from the primary.
+REPLICA_PIN_SECONDS = int(os.getenv('REPLICA_PIN_SECONDS', 5))
+
+# Replicas further behind the primary than REPLICA_MAX_LAG seconds are skipped;
+# each worker asks a replica for its lag at most every REPLICA_LAG_CHECK_INTERVAL seconds.
+REPLICA_MAX_LAG = float(os.getenv('REPLICA_MAX_LAG', 5))
+REPLICA_LAG_CHECK_INTERVAL = float(os.getenv('REPLICA_LAG_CHECK_INTERVAL', 5))
+
+
+# Revoked refresh tokens are mirrored in a per-process bloom filter sized for
+# REFRESH_TOKEN_FILTER_CAPACITY entries, re-synced at least this often (seconds).
+REFRESH_TOKEN_FILTER_CAPACITY = int(os.getenv('REFRESH_TOKEN_FILTER_CAPACITY', 100000))
+REFRESH_TOKEN_FILTER_SYNC_INTERVAL = float(os.getenv('REFRESH_TOKEN_FILTER_SYNC_INTERVAL', 5))
+
+# Argon2id first; hashes made by the other hashers are upgraded on the next login.
+PASSWORD_HASHERS = [
+    'auth.hashers.Argon2PasswordHasher',
+    'auth.hashers.PBKDF2PasswordHasher',
+    'django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher',
+    'django.contrib.auth.hashers.BCryptSHA256PasswordHasher',
+    'django.contrib.auth.hashers.ScryptPasswordHasher',
+]
+
+# Argon2id costs; memory is in KiB. The defaults follow the OWASP minimum of 19 MiB, 2 passes.
+ARGON2_TIME_COST = int(os.getenv('ARGON2_TIME_COST', 2))
+ARGON2_MEMORY_COST = int(os.getenv('ARGON2_MEMORY_COST', 19456))
+ARGON2_PARALLELISM = int(os.getenv('ARGON2_PARALLELISM', 1))
+
+# Threads per worker process that hash and verify passwords; 0 hashes in the request thread.
+# Up to PASSWORD_HASH_BACKLOG more requests wait for a thread; beyond that a request
+# waits PASSWORD_HASH_TIMEOUT seconds for room and then gets a 429.
+PASSWORD_HASH_WORKERS = int(os.getenv('PASSWORD_HASH_WORKERS', 0))
+PASSWORD_HASH_BACKLOG = int(os.getenv('PASSWORD_HASH_BACKLOG', 16))
+PASSWORD_HASH_TIMEOUT = float(os.getenv('PASSWORD_HASH_TIMEOUT', 5))
+
 
 # Password validation
 # https://docs.djangoproject.com/en/4.2/ref/settings/#auth-password-validators
@@ -148,7 +221,65 @@ STATIC_URL = 'static/'
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
+# The cache every worker shares, e.g. django.core.cache.backends.redis.RedisCache with a
+# redis:// LOCATION. The local-memory default is private to each process, so the
+# *_CACHE_TIMEOUT settings below must stay 0 with it (checked by manage.py check).
+CACHES = {
+    'default': {
+        'BACKEND': os.getenv('CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': os.getenv('CACHE_LOCATION', ''),
+    },
+}
+
+# Seconds a user's group names stay in the shared cache; 0 resolves them once per request only.
+ROLE_CACHE_TIMEOUT = int(os.getenv('ROLE_CACHE_TIMEOUT', 0))
+
+# Seconds ClaimsUser.load_user() keeps the full User model cached; 0 always reads the database.
+AUTH_USER_CACHE_TIMEOUT = int(os.getenv('AUTH_USER_CACHE_TIMEOUT', 0))
+
+# Seconds the time a user's tokens were last revoked stays in the shared cache; 0 reads
+# users.tokens_revoked_at on every request authenticated from a stateless token.
+TOKEN_REVOCATION_CACHE_TIMEOUT = int(os.getenv('TOKEN_REVOCATION_CACHE_TIMEOUT', 0))
+
+# Pre-rendered responses of the event list and detail endpoints; a TIMEOUT of 0 disables it.
+# Use event.cache.SharedCacheBackend (backed by a CACHES alias) when running several workers.
+EVENT_CACHE = {
+    'BACKEND': os.getenv('EVENT_CACHE_BACKEND', 'event.cache.LocMemLRUBackend'),
+    'TIMEOUT': int(os.getenv('EVENT_CACHE_TIMEOUT', 0)),
+    'OPTIONS': {
+        'max_entries': int(os.getenv('EVENT_CACHE_MAX_ENTRIES', 1024)),
+    },
+}
+
+# Deleted events stay in the database, hidden from the API, for this many days before
+# manage.py purge_deleted_events removes them.
+EVENT_PURGE_AFTER_DAYS = int(os.getenv('EVENT_PURGE_AFTER_DAYS', 7))
+
+# Background jobs, run by manage.py run_jobs. A job whose worker stops renewing its claim for
+# JOB_LEASE_SECONDS is run again; a failed attempt is retried after JOB_RETRY_BASE_DELAY seconds,
+# doubling each time up to JOB_RETRY_MAX_DELAY, until JOB_MAX_ATTEMPTS attempts have failed.
+JOB_WORKER_CONCURRENCY = int(os.getenv('JOB_WORKER_CONCURRENCY', 4))
+JOB_WORKER_POOL = os.getenv('JOB_WORKER_POOL', 'thread')
+JOB_POLL_INTERVAL = float(os.getenv('JOB_POLL_INTERVAL', 1))
+JOB_LEASE_SECONDS = int(os.getenv('JOB_LEASE_SECONDS', 300))
+JOB_MAX_ATTEMPTS = int(os.getenv('JOB_MAX_ATTEMPTS', 5))
+JOB_RETRY_BASE_DELAY = float(os.getenv('JOB_RETRY_BASE_DELAY', 5))
+JOB_RETRY_MAX_DELAY = float(os.getenv('JOB_RETRY_MAX_DELAY', 600))
+# Rows a job can be handed at once, e.g. by POST /api/events/bulk/?async=true; they are staged in job_chunks.
+JOB_INPUT_MAX_ROWS = int(os.getenv('JOB_INPUT_MAX_ROWS', 100000))
+
+# Per-route latency, SQL and response size metrics served at /metrics; when a token is set,
+# scrapers must send it as a bearer token. Requests slower than METRICS_SLOW_REQUEST_MS
+# are logged; 0 turns that off.
+METRICS_ENABLED = os.getenv('METRICS_ENABLED', 'False') == 'True'
+METRICS_TOKEN = os.getenv('METRICS_TOKEN', '')
+METRICS_SLOW_REQUEST_MS = int(os.getenv('METRICS_SLOW_REQUEST_MS', 0))
+
 SIMPLE_JWT = {
     "ACCESS_TOKEN_LIFETIME": timedelta(minutes=180),
     "REFRESH_TOKEN_LIFETIME": timedelta(days=30),
+    "ROTATE_REFRESH_TOKENS": True,
+    "TOKEN_OBTAIN_SERIALIZER": "auth.serializers.ClaimsTokenObtainPairSerializer",
+    "TOKEN_REFRESH_SERIALIZER": "auth.serializers.RotatingTokenRefreshSerializer",
+    "TOKEN_USER_CLASS": "auth.authentication.ClaimsUser",
 }
@@ -18,10 +18,19 @@ from django.contrib import admin
 from django.urls import path, include
 from rest_framework_simplejwt.views import TokenObtainPairView, TokenRefreshView
 
+from auth.views import TokenRevokeView
+from .metrics import metrics_view
+from .views import DatabasePoolStatsView
+
 urlpatterns = [
     path('admin/', admin.site.urls),
     path('api/login/', TokenObtainPairView.as_view(), name='token_obtain_pair'),
     path('api/token/', TokenRefreshView.as_view(), name='token_refresh'),
+    path('api/token/revoke/', TokenRevokeView.as_view(), name='token_revoke'),
     path('api/', include('auth.urls')),
     path('api/', include('event.urls')),
+    path('api/', include('jobs.urls')),
+    path('api/async/', include('event.async_urls')),
+    path('api/db/pool/', DatabasePoolStatsView.as_view(), name='db-pool-stats'),
+    path('metrics', metrics_view, name='metrics'),
     ]
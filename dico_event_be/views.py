@@ -0,0 +1,17 @@
+import os
+
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from auth.permissions import IsSuperUser
+from .db.base import pool_stats
+
+
+class DatabasePoolStatsView(APIView):
+    """
+    Connection pool counters of the worker process serving the request.
+    """
+    permission_classes = [IsSuperUser]
+
+    def get(self, request):
+        return Response({'pid': os.getpid(), 'pools': pool_stats()})
@@ -0,0 +1,7 @@
+from django.urls import path
+from . import async_views
+
+urlpatterns = [
+  path('events/', async_views.event_list, name='async-event-list'),
+  path('events/<uuid:pk>/', async_views.event_detail, name='async-event-detail'),
+]
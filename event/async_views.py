@@ -0,0 +1,75 @@
+from asgiref.sync import sync_to_async
+from django.http import HttpResponse
+from rest_framework import status
+from rest_framework.exceptions import APIException, NotAuthenticated, NotFound
+from rest_framework.request import Request
+from rest_framework.settings import api_settings
+
+from .cache import acached_response
+from .models import Event
+from .rendering import arender_event_detail, arender_event_list, dumps
+from .serializers import EventFilterSerializer
+from .updates import event_etag
+
+
+async def event_list(request):
+    """
+    Async twin of EventListCreateView.get, returning the same bytes.
+    """
+    try:
+        request = await authenticate(request)
+        filters = EventFilterSerializer(data=request.query_params)
+        if not filters.is_valid():
+            return json_response(filters.errors, status.HTTP_400_BAD_REQUEST)
+        queryset = filters.filter_queryset(Event.objects.all())
+        return await acached_response(request, lambda: arender_event_list(request, queryset))
+    except APIException as exc:
+        return error_response(request, exc)
+
+
+async def event_detail(request, pk):
+    """
+    Async twin of EventDetailView.get, returning the same bytes.
+    """
+    updated_at = None
+
+    async def render_json():
+        nonlocal updated_at
+        rendered = await arender_event_detail(pk)
+        if rendered is None:
+            raise NotFound()
+        body, updated_at = rendered
+        return body
+
+    try:
+        request = await authenticate(request)
+        return await acached_response(request, render_json, event_id=pk, etag=lambda: event_etag(updated_at))
+    except APIException as exc:
+        return error_response(request, exc)
+
+
+async def authenticate(request):
+    """
+    Runs the configured DRF authenticators, off the event loop since they may query the database.
+    """
+    request = Request(request, authenticators=[auth() for auth in api_settings.DEFAULT_AUTHENTICATION_CLASSES])
+    user = await sync_to_async(lambda: request.user)()
+    if not (user and user.is_authenticated):
+        raise NotAuthenticated()
+    return request
+
+
+def error_response(request, exc):
+    """
+    Shapes an APIException the way rest_framework.views.exception_handler does.
+    """
+    data = exc.detail if isinstance(exc.detail, (list, dict)) else {'detail': exc.detail}
+    response = json_response(data, exc.status_code)
+    if exc.status_code == status.HTTP_401_UNAUTHORIZED:
+        authenticator = api_settings.DEFAULT_AUTHENTICATION_CLASSES[0]()
+        response['WWW-Authenticate'] = authenticator.authenticate_header(request)
+    return response
+
+
+def json_response(data, status_code):
+    return HttpResponse(dumps(data), content_type='application/json', status=status_code)
@@ -0,0 +1,85 @@
+from itertools import islice
+
+from django.db import DatabaseError, transaction
+
+from auth.models import User
+from .cache import invalidate_event
+from .models import Event, EventOrganizer, EventSession
+from .serializers import EventBulkItemSerializer, event_sessions
+
+BULK_CHUNK_SIZE = 500
+
+
+def bulk_create_events(rows, chunk_size=BULK_CHUNK_SIZE, start=0):
+    """
+    Validates and inserts events in chunks, each chunk in its own transaction.
+
+    Rows that fail validation or that the database rejects are reported by
+    their position in the input, counted from start, and never abort the rest
+    of the batch. Returns (created_ids, errors).
+    """
+    created, errors = [], []
+    indexed_rows = enumerate(rows, start)
+
+    while True:
+        chunk = list(islice(indexed_rows, chunk_size))
+        if not chunk:
+            break
+
+        valid = []
+        for index, row in chunk:
+            serializer = EventBulkItemSerializer(data=row)
+            if serializer.is_valid():
+                valid.append((index, dict(serializer.validated_data)))
+            else:
+                errors.append({'index': index, 'errors': serializer.errors})
+
+        organizers = User.objects.in_bulk({data['organizer_id'] for _, data in valid})
+
+        rows_to_save = []
+        for index, data in valid:
+            organizer = organizers.get(data.pop('organizer_id'))
+            if organizer is None:
+                errors.append({'index': index, 'errors': {'organizer_id': ['Object does not exist.']}})
+                continue
+
+            times = event_sessions(data)
+            event = Event(**data)
+            sessions = [
+                EventSession(event=event, start_time=session['start_time'], end_time=session['end_time'])
+                for session in times
+            ]
+            rows_to_save.append((index, event, sessions, EventOrganizer(event=event, user=organizer)))
+
+        if not rows_to_save:
+            continue
+
+        try:
+            _save_events(rows_to_save)
+            saved = rows_to_save
+        except DatabaseError:
+            # Saved again one row at a time, so only the rows the database rejects fail.
+            saved = []
+            for row in rows_to_save:
+                try:
+                    _save_events([row])
+                except DatabaseError:
+                    errors.append({'index': row[0], 'errors': {'non_field_errors': ['Row could not be saved.']}})
+                else:
+                    saved.append(row)
+            if not saved:
+                continue
+
+        created.extend(str(event.pk) for _, event, _, _ in saved)
+        # bulk_create sends no post_save signals.
+        invalidate_event()
+
+    errors.sort(key=lambda error: error['index'])
+    return created, errors
+
+
+def _save_events(rows):
+    with transaction.atomic():
+        Event.objects.bulk_create([event for _, event, _, _ in rows])
+        EventSession.objects.bulk_create([session for _, _, sessions, _ in rows for session in sessions])
+        EventOrganizer.objects.bulk_create([organizer for _, _, _, organizer in rows])
@@ -0,0 +1,215 @@
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from urllib.parse import urlencode
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import caches
+from django.core.signals import setting_changed
+from django.db import transaction
+from django.dispatch import receiver
+from django.http import HttpResponse, HttpResponseNotModified
+from django.utils.cache import quote_etag
+from django.utils.http import parse_etags
+from django.utils.module_loading import import_string
+from rest_framework.renderers import JSONRenderer
+from rest_framework.response import Response
+
+LIST_GENERATION_KEY = 'events:gen:list'
+EVENT_GENERATION_KEY = 'events:gen:{}'
+
+
+class LocMemLRUBackend:
+    """
+    Process-local LRU with per-entry TTL, for single-process deployments.
+    """
+
+    def __init__(self, max_entries=1024, **kwargs):
+        self.max_entries = max_entries
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return None
+            value, expires_at = entry
+            if expires_at is not None and expires_at <= time.monotonic():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value, timeout=None):
+        expires_at = time.monotonic() + timeout if timeout else None
+        with self._lock:
+            self._data[key] = (value, expires_at)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+
+class SharedCacheBackend:
+    """
+    Stores entries in a Django cache alias (e.g. Redis or Memcached) shared by all workers.
+    """
+
+    def __init__(self, alias='default', **kwargs):
+        self.cache = caches[alias]
+
+    def get(self, key):
+        return self.cache.get(key)
+
+    def set(self, key, value, timeout=None):
+        self.cache.set(key, value, timeout)
+
+
+class EventResponseCache:
+    """
+    Pre-rendered JSON bodies of the event list and detail endpoints.
+
+    Keys embed a generation token that writes replace, so invalidation never has
+    to enumerate the cached query strings or cursors of a route.
+    """
+
+    def __init__(self, backend, timeout):
+        self.backend = backend
+        self.timeout = timeout
+
+    def get(self, key):
+        return self.backend.get(key)
+
+    def set(self, key, entry):
+        self.backend.set(key, entry, self.timeout)
+
+    def key(self, request, event_id=None):
+        params = urlencode(sorted(request.query_params.lists()), doseq=True)
+        url = f'{request.scheme}://{request.get_host()}{request.path}?{params}'
+        digest = hashlib.sha1(url.encode('utf-8')).hexdigest()
+
+        if event_id is None:
+            return f'events:list:{self._generation(LIST_GENERATION_KEY)}:{digest}'
+        generation = self._generation(EVENT_GENERATION_KEY.format(event_id))
+        return f'events:detail:{event_id}:{generation}:{digest}'
+
+    def invalidate(self, event_id=None):
+        self._bump(LIST_GENERATION_KEY)
+        if event_id is not None:
+            self._bump(EVENT_GENERATION_KEY.format(event_id))
+
+    def _generation(self, key):
+        generation = self.backend.get(key)
+        if generation is None:
+            # A missing generation must never fall back to one that was used before.
+            generation = self._bump(key)
+        return generation
+
+    def _bump(self, key):
+        generation = time.time_ns()
+        self.backend.set(key, generation, None)
+        return generation
+
+
+_response_cache = None
+
+
+def get_response_cache():
+    global _response_cache
+    config = getattr(settings, 'EVENT_CACHE', {})
+    if not config.get('TIMEOUT'):
+        return None
+
+    if _response_cache is None:
+        backend_class = import_string(config.get('BACKEND', 'event.cache.LocMemLRUBackend'))
+        backend = backend_class(**config.get('OPTIONS', {}))
+        _response_cache = EventResponseCache(backend, config['TIMEOUT'])
+    return _response_cache
+
+
+@receiver(setting_changed)
+def reset_response_cache(setting, **kwargs):
+    global _response_cache
+    if setting == 'EVENT_CACHE':
+        _response_cache = None
+
+
+def invalidate_event(event_id=None):
+    """
+    Drops cached responses for the event and every list page once the current transaction commits.
+    """
+    response_cache = get_response_cache()
+    if response_cache is not None:
+        transaction.on_commit(lambda: response_cache.invalidate(event_id))
+
+
+def cached_response(request, render, event_id=None, render_json=None, etag=None):
+    """
+    Serves render() through the response cache, answering If-None-Match with a 304.
+
+    render_json, when given, must return the JSON bytes of render() directly.
+    etag, when given, is called after rendering and returns the ETag to send
+    instead of a digest of the body.
+    """
+    response_cache = get_response_cache()
+    if request.accepted_renderer.format != 'json' or (response_cache is None and render_json is None):
+        response = Response(render())
+        if etag is not None:
+            response['ETag'] = etag()
+        return response
+    if render_json is None:
+        render_json = lambda: JSONRenderer().render(render())  # noqa: E731
+    if response_cache is None:
+        response = HttpResponse(render_json(), content_type='application/json')
+        if etag is not None:
+            response['ETag'] = etag()
+        return response
+
+    key = response_cache.key(request, event_id)
+    entry = response_cache.get(key)
+    if entry is None:
+        body = render_json()
+        entry = (etag() if etag is not None else body_etag(body), body)
+        response_cache.set(key, entry)
+    return conditional_response(request, *entry)
+
+
+async def acached_response(request, arender_json, event_id=None, etag=None):
+    """
+    cached_response() for async views, which always render JSON: arender_json
+    is a coroutine function returning the body's bytes. The cache backend is
+    reached off the event loop, as it may do network I/O.
+    """
+    response_cache = get_response_cache()
+    if response_cache is None:
+        response = HttpResponse(await arender_json(), content_type='application/json')
+        if etag is not None:
+            response['ETag'] = etag()
+        return response
+
+    key = await sync_to_async(response_cache.key)(request, event_id)
+    entry = await sync_to_async(response_cache.get)(key)
+    if entry is None:
+        body = await arender_json()
+        entry = (etag() if etag is not None else body_etag(body), body)
+        await sync_to_async(response_cache.set)(key, entry)
+    return conditional_response(request, *entry)
+
+
+def body_etag(body):
+    return quote_etag(hashlib.md5(body).hexdigest())
+
+
+def conditional_response(request, etag, body):
+    """
+    The cached body, or a 304 when the request's If-None-Match already holds etag.
+    """
+    if_none_match = parse_etags(request.headers.get('If-None-Match', ''))
+    if etag in if_none_match or '*' in if_none_match:
+        response = HttpResponseNotModified()
+    else:
+        response = HttpResponse(body, content_type='application/json')
+    response['ETag'] = etag
+    return response
@@ -0,0 +1,48 @@
+"""
+Event deletion in two steps: the API only marks an event deleted, which is a
+single-row UPDATE however many sessions, organizers and registrations it has;
+purge_deleted_events() later removes the rows in batches, leaving the
+dependent rows to the ON DELETE CASCADE foreign keys.
+"""
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import connections, router, transaction
+from django.http import Http404
+from django.utils import timezone
+
+from .cache import invalidate_event
+from .models import Event
+
+PURGE_SQL = (
+    'DELETE FROM {table} WHERE id IN ('
+    'SELECT id FROM {table} WHERE deleted_at < %s ORDER BY deleted_at LIMIT %s FOR UPDATE SKIP LOCKED)'
+)
+
+
+def delete_event(pk):
+    now = timezone.now()
+    if not Event.objects.filter(pk=pk).update(deleted_at=now, updated_at=now):
+        raise Http404
+    invalidate_event(pk)
+
+
+def purge_deleted_events(batch_size=500, before=None):
+    """
+    Deletes events marked deleted before the given time, by default
+    EVENT_PURGE_AFTER_DAYS ago, each batch in its own short transaction.
+    Returns the number of events deleted.
+    """
+    if before is None:
+        before = timezone.now() - timedelta(days=settings.EVENT_PURGE_AFTER_DAYS)
+    using = router.db_for_write(Event)
+    sql = PURGE_SQL.format(table=connections[using].ops.quote_name(Event._meta.db_table))
+
+    deleted = 0
+    while True:
+        with transaction.atomic(using=using), connections[using].cursor() as cursor:
+            cursor.execute(sql, [before, batch_size])
+            count = cursor.rowcount
+        deleted += count
+        if count < batch_size:
+            return deleted
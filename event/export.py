@@ -0,0 +1,98 @@
+import csv
+
+from django.db.models import Prefetch
+
+from .models import Event, EventOrganizer, EventSession
+from .rendering import dumps, format_datetime
+
+EXPORT_CHUNK_SIZE = 2000
+
+CSV_HEADER = [
+    'event_id', 'name', 'status', 'category', 'description', 'location', 'quota', 'created_at', 'updated_at',
+    'organizer_ids', 'event_session_id', 'start_time', 'end_time',
+]
+
+
+def export_queryset(queryset=None):
+    """
+    Events with their sessions and organizers, in a stable order for export.
+    """
+    if queryset is None:
+        queryset = Event.objects.all()
+    return queryset.order_by('created_at', 'id').prefetch_related(
+        Prefetch('sessions', queryset=EventSession.objects.order_by('start_time', 'event_session_id')),
+        Prefetch('eventorganizer_set', queryset=EventOrganizer.objects.order_by('created_at')),
+    )
+
+
+def iter_events(queryset):
+    # iterator() streams rows through a server-side cursor; with chunk_size set,
+    # the prefetches run once per chunk instead of over the whole table.
+    return queryset.iterator(chunk_size=EXPORT_CHUNK_SIZE)
+
+
+def export_ndjson(queryset):
+    for event in iter_events(queryset):
+        yield dumps({
+            'id': str(event.pk),
+            'name': event.name,
+            'status': event.status,
+            'category': event.category,
+            'description': event.description,
+            'location': event.location,
+            'quota': event.quota,
+            'created_at': format_datetime(event.created_at),
+            'updated_at': format_datetime(event.updated_at),
+            'sessions': [
+                {
+                    'event_session_id': str(session.pk),
+                    'start_time': format_datetime(session.start_time),
+                    'end_time': format_datetime(session.end_time),
+                }
+                for session in event.sessions.all()
+            ],
+            'organizers': [
+                {
+                    'event_organizer_id': str(organizer.pk),
+                    'user_id': str(organizer.user_id),
+                }
+                for organizer in event.eventorganizer_set.all()
+            ],
+        }) + b'\n'
+
+
+class Echo:
+    """
+    A file-like object that hands back what csv.writer writes to it.
+    """
+
+    def write(self, value):
+        return value
+
+
+def export_csv(queryset):
+    """
+    One row per session, repeating the event columns; events without sessions get a single row.
+    """
+    writer = csv.writer(Echo())
+    yield writer.writerow(CSV_HEADER)
+
+    for event in iter_events(queryset):
+        columns = [
+            event.pk, event.name, event.status, event.category, event.description, event.location, event.quota,
+            format_datetime(event.created_at), format_datetime(event.updated_at),
+            ';'.join(str(organizer.user_id) for organizer in event.eventorganizer_set.all()),
+        ]
+        sessions = event.sessions.all()
+        if not sessions:
+            yield writer.writerow(columns + ['', '', ''])
+        for session in sessions:
+            yield writer.writerow(
+                columns + [session.pk, format_datetime(session.start_time), format_datetime(session.end_time)]
+            )
+
+
+EXPORT_FORMATS = {
+    'ndjson': (export_ndjson, 'application/x-ndjson'),
+    'csv': (export_csv, 'text/csv'),
+}
@@ -0,0 +1,23 @@
+from jobs.queue import process_chunks
+from jobs.registry import task
+
+from .bulk import bulk_create_events
+from .deletion import purge_deleted_events
+
+
+@task('events.bulk_import')
+def bulk_import(job_id):
+    def import_chunk(rows, first_row):
+        created, errors = bulk_create_events(rows, start=first_row)
+        return {'created': created, 'errors': errors}
+
+    results = process_chunks(job_id, import_chunk)
+    return {
+        'created': [pk for result in results for pk in result['created']],
+        'errors': [error for result in results for error in result['errors']],
+    }
+
+
+@task('events.purge_deleted')
+def purge_deleted(batch_size=500):
+    return {'purged': purge_deleted_events(batch_size=batch_size)}
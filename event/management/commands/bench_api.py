@@ -0,0 +1,219 @@
+import json
+import random
+import statistics
+import subprocess
+import time
+import uuid
+from contextlib import ExitStack
+from datetime import timedelta
+
+from django.conf import settings
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import Group
+from django.core.handlers.wsgi import WSGIHandler
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, connections
+from django.utils import timezone
+
+from auth.models import User
+from dico_event_be.benchmarks import run_in_threads, seed_events, seed_users, wsgi_request
+from dico_event_be.metrics import QueryTimer
+from event.models import Event
+
+SCENARIOS = (
+    'login', 'event_list', 'event_detail', 'event_create', 'event_update', 'user_list', 'role_assign',
+)
+
+PASSWORD = 'bench-password'
+
+
+class Command(BaseCommand):
+    help = (
+        'Seeds users and events, then drives the API hot paths through the WSGI handler and '
+        'reports throughput, p50/p99 latency and SQL queries per request for each scenario.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=1000)
+        parser.add_argument('--events', type=int, default=5000)
+        parser.add_argument('--sessions', type=int, default=1, help='Sessions per seeded event.')
+        parser.add_argument('--requests', type=int, default=200, help='Measured requests per scenario.')
+        parser.add_argument('--warmup', type=int, default=10, help='Unmeasured requests per scenario.')
+        parser.add_argument('--concurrency', type=int, default=1, help='Client threads.')
+        parser.add_argument('--scenarios', default=','.join(SCENARIOS), help='Comma-separated subset to run.')
+        parser.add_argument('--seed', type=int, default=0, help='Random seed for picking rows.')
+        parser.add_argument('--format', choices=('text', 'json'), default='text')
+        parser.add_argument('--output', help='Also write the JSON results to this file.')
+        parser.add_argument('--compare', help='JSON results of an earlier run to compare against.')
+        parser.add_argument('--max-regression', type=float, default=0.2,
+                            help='Fail when a p50 grows by more than this fraction of the baseline.')
+        parser.add_argument('--keep', action='store_true', help='Keep the seeded rows.')
+
+    def handle(self, *args, **options):
+        scenarios = [name for name in options['scenarios'].split(',') if name]
+        unknown = set(scenarios) - set(SCENARIOS)
+        if unknown:
+            raise CommandError(f"Unknown scenarios: {', '.join(sorted(unknown))}")
+
+        self.random = random.Random(options['seed'])
+        self.run_id = uuid.uuid4().hex[:8]
+        self.handler = WSGIHandler()
+        self.seed(options)
+        try:
+            self.token = self.login()
+            results = {name: self.run(name, options) for name in scenarios}
+        finally:
+            if not options['keep']:
+                self.cleanup()
+
+        report = {'meta': self.meta(options), 'results': results}
+        data = json.dumps(report, indent=2)
+        if options['output']:
+            with open(options['output'], 'w') as file:
+                file.write(data + '\n')
+        if options['format'] == 'json':
+            self.stdout.write(data)
+        else:
+            self.write_table(results)
+        if options['compare']:
+            self.compare(results, options['compare'], options['max_regression'])
+
+    def seed(self, options):
+        prefix = f'bench-{self.run_id}'
+        password = make_password(PASSWORD)
+        self.admin = User.objects.create(
+            username=f'{prefix}-admin', email=f'{prefix}-admin@example.com', password=password, is_superuser=True
+        )
+        self.users = seed_users(prefix, options['users'], password)
+        self.groups = [Group.objects.create(name=f'{prefix}-role-{i}') for i in range(3)]
+        self.events = seed_events(
+            options['events'], prefix, sessions=options['sessions'], organizers=self.users or [self.admin]
+        )
+        # Filled by event_create and updated by event_update, which edits a single session.
+        self.created_events = []
+
+    def cleanup(self):
+        prefix = f'bench-{self.run_id}'
+        Event.objects.filter(category=prefix).delete()
+        User.objects.filter(username__startswith=f'{prefix}-').delete()
+        Group.objects.filter(name__startswith=f'{prefix}-').delete()
+
+    def login(self):
+        status, body = self.request('POST', '/api/login/', {'username': self.admin.username, 'password': PASSWORD})
+        if status != 200:
+            raise CommandError(f'Login failed with {status}: {body[:200]!r}')
+        return json.loads(body)['access']
+
+    def event_body(self, i):
+        start_time = timezone.now() + timedelta(days=30)
+        return {
+            'name': f'Created benchmark event {i}', 'status': 'open', 'category': f'bench-{self.run_id}',
+            'description': 'Benchmark description', 'location': 'Bandung', 'quota': 50 + i % 50,
+            'start_time': start_time.isoformat(), 'end_time': (start_time + timedelta(hours=2)).isoformat(),
+            'organizer_id': str(self.admin.pk),
+        }
+
+    def scenario(self, name, i):
+        """
+        The (method, path, body, expected status) of the i-th request of a scenario.
+        """
+        if name == 'login':
+            return 'POST', '/api/login/', {'username': self.admin.username, 'password': PASSWORD}, 200
+        if name == 'event_list':
+            return 'GET', '/api/events/?page_size=20', None, 200
+        if name == 'event_detail':
+            return 'GET', f'/api/events/{self.random.choice(self.events).pk}/', None, 200
+        if name == 'event_create':
+            return 'POST', '/api/events/', self.event_body(i), 201
+        if name == 'event_update':
+            if not self.created_events:
+                raise CommandError('event_update edits the events of event_create; run both.')
+            event_id = self.created_events[i % len(self.created_events)]
+            return 'PUT', f'/api/events/{event_id}/', self.event_body(i + 1), 200
+        if name == 'user_list':
+            return 'GET', '/api/users/', None, 200
+        if name == 'role_assign':
+            user = self.random.choice(self.users or [self.admin])
+            group = self.random.choice(self.groups)
+            return 'POST', '/api/assign-roles/', {'user_id': str(user.pk), 'group_id': group.pk}, 201
+
+    def run(self, name, options):
+        calls = [self.scenario(name, i) for i in range(options['warmup'] + options['requests'])]
+        for call in calls[:options['warmup']]:
+            self.measure(name, *call)
+
+        samples, elapsed = run_in_threads(
+            lambda call: self.measure(name, *call), calls[options['warmup']:], options['concurrency']
+        )
+
+        latencies = sorted(latency for latency, _ in samples)
+        queries = [count for _, count in samples]
+        return {
+            'requests': len(samples),
+            'throughput': round(len(samples) / elapsed, 2),
+            'p50_ms': round(statistics.median(latencies) * 1000, 3),
+            'p99_ms': round(latencies[max(int(len(latencies) * 0.99) - 1, 0)] * 1000, 3),
+            'mean_ms': round(statistics.fmean(latencies) * 1000, 3),
+            'queries': round(statistics.fmean(queries), 2),
+            'max_queries': max(queries),
+        }
+
+    def measure(self, name, method, path, body, expected_status):
+        queries = QueryTimer()
+        started = time.perf_counter()
+        with ExitStack() as stack:
+            for alias_connection in connections.all():
+                stack.enter_context(alias_connection.execute_wrapper(queries))
+            status, content = self.request(method, path, body)
+        latency = time.perf_counter() - started
+        if status != expected_status:
+            raise CommandError(f'{name}: {method} {path} returned {status}: {content[:200]!r}')
+        if name == 'event_create':
+            self.created_events.append(json.loads(content)['id'])
+        return latency, queries.count
+
+    def request(self, method, path, body=None):
+        payload = json.dumps(body).encode() if body is not None else b''
+        headers = {'HTTP_AUTHORIZATION': f'Bearer {self.token}'} if getattr(self, 'token', None) else None
+        return wsgi_request(self.handler, method, path, payload, headers)
+
+    def meta(self, options):
+        try:
+            commit = subprocess.run(
+                ['git', 'rev-parse', 'HEAD'], capture_output=True, text=True, cwd=settings.BASE_DIR, check=True
+            ).stdout.strip()
+        except (OSError, subprocess.CalledProcessError):
+            commit = None
+        return {
+            'commit': commit,
+            'timestamp': timezone.now().isoformat(),
+            'database': connection.vendor,
+            **{key: options[key] for key in ('users', 'events', 'sessions', 'requests', 'warmup', 'concurrency')},
+        }
+
+    def write_table(self, results):
+        self.stdout.write(f"{'scenario':<14}{'req/s':>10}{'p50 ms':>10}{'p99 ms':>10}{'queries':>10}")
+        for name, result in results.items():
+            self.stdout.write(
+                f"{name:<14}{result['throughput']:>10.1f}{result['p50_ms']:>10.2f}"
+                f"{result['p99_ms']:>10.2f}{result['queries']:>10.2f}"
+            )
+
+    def compare(self, results, path, max_regression):
+        with open(path) as file:
+            baseline = json.load(file)['results']
+
+        regressions = []
+        for name, result in results.items():
+            before = baseline.get(name)
+            if before is None:
+                continue
+            change = result['p50_ms'] / before['p50_ms'] - 1
+            self.stdout.write(
+                f"{name:<14} p50 {before['p50_ms']:.2f} -> {result['p50_ms']:.2f} ms ({change:+.0%}), "
+                f"queries {before['queries']:.2f} -> {result['queries']:.2f}"
+            )
+            if change > max_regression or result['queries'] > before['queries']:
+                regressions.append(name)
+        if regressions:
+            raise CommandError(f"Regressed against {path}: {', '.join(regressions)}")
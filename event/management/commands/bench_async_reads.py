@@ -0,0 +1,94 @@
+import asyncio
+import statistics
+import time
+import uuid
+
+from django.core.handlers.asgi import ASGIHandler
+from django.core.handlers.wsgi import WSGIHandler
+from django.core.management.base import BaseCommand
+from rest_framework_simplejwt.tokens import AccessToken
+
+from auth.models import User
+from dico_event_be.benchmarks import run_in_threads, seed_events, wsgi_request
+from event.models import Event
+
+
+class Command(BaseCommand):
+    help = (
+        'Drives the event list through the WSGI handler with a thread pool and the async '
+        'endpoint through the ASGI handler at the same concurrency, in-process.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=500)
+        parser.add_argument('--concurrency', type=int, default=50,
+                            help='In-flight ASGI requests; each holds its own database connection.')
+        parser.add_argument('--threads', type=int, default=8, help='WSGI worker threads.')
+        parser.add_argument('--client-delay', type=float, default=0.05,
+                            help='Seconds each simulated client takes to read its response.')
+        parser.add_argument('--events', type=int, default=200)
+
+    def handle(self, *args, **options):
+        run_id = uuid.uuid4().hex[:8]
+        user = User.objects.create(username=f'bench-{run_id}', email=f'bench-{run_id}@example.com', is_superuser=True)
+        seed_events(options['events'], f'bench-{run_id}', sessions=0)
+        headers = {'HTTP_AUTHORIZATION': f'Bearer {AccessToken.for_user(user)}', 'HTTP_HOST': 'localhost'}
+        query = f'category=bench-{run_id}&page_size=20'
+
+        try:
+            wsgi = self.bench_wsgi('/api/events/', query, headers, options)
+            asgi = asyncio.run(self.bench_asgi('/api/async/events/', query, headers, options))
+        finally:
+            Event.objects.filter(category=f'bench-{run_id}').delete()
+            user.delete()
+
+        for name, (elapsed, latencies) in (('wsgi', wsgi), ('asgi', asgi)):
+            latencies.sort()
+            self.stdout.write(
+                f"{name}: {options['requests'] / elapsed:8.1f} req/s  "
+                f"p50 {statistics.median(latencies) * 1000:7.1f} ms  "
+                f"p99 {latencies[int(len(latencies) * 0.99) - 1] * 1000:7.1f} ms"
+            )
+
+    def bench_wsgi(self, path, query, headers, options):
+        handler = WSGIHandler()
+
+        def request(_):
+            started = time.perf_counter()
+            wsgi_request(handler, 'GET', f'{path}?{query}', headers=headers)
+            # A slow client keeps the worker thread busy while the response drains.
+            time.sleep(options['client_delay'])
+            return time.perf_counter() - started
+
+        # Requests beyond the thread count queue up, as they would behind a threaded WSGI server.
+        latencies, elapsed = run_in_threads(request, range(options['requests']), options['threads'])
+        return elapsed, latencies
+
+    async def bench_asgi(self, path, query, headers, options):
+        handler = ASGIHandler()
+        scope = {
+            'type': 'http', 'asgi': {'version': '3.0'}, 'http_version': '1.1', 'method': 'GET', 'scheme': 'http',
+            'path': path, 'raw_path': path.encode(), 'query_string': query.encode(), 'root_path': '',
+            'server': ('localhost', 80), 'client': ('127.0.0.1', 50000),
+            'headers': [
+                (name[5:].lower().replace('_', '-').encode(), value.encode()) for name, value in headers.items()
+            ],
+        }
+        semaphore = asyncio.Semaphore(options['concurrency'])
+
+        async def receive():
+            return {'type': 'http.request', 'body': b'', 'more_body': False}
+
+        async def send(message):
+            if message['type'] == 'http.response.body' and not message.get('more_body'):
+                await asyncio.sleep(options['client_delay'])
+
+        async def request():
+            async with semaphore:
+                started = time.perf_counter()
+                await handler(dict(scope), receive, send)
+                return time.perf_counter() - started
+
+        started = time.perf_counter()
+        latencies = await asyncio.gather(*(request() for _ in range(options['requests'])))
+        return time.perf_counter() - started, list(latencies)
@@ -0,0 +1,48 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from dico_event_be.benchmarks import seed_events
+from event.rendering import render_event_list
+from event.views import EventListCreateView
+
+
+class Command(BaseCommand):
+    help = 'Compares EventReadSerializer rendering of the event list against the fast path.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--events', type=int, default=1000, help='Events to seed (rolled back afterwards).')
+        parser.add_argument('--page-size', type=int, default=100)
+        parser.add_argument('--iterations', type=int, default=200)
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            seed_events(options['events'], 'tech')
+            request = Request(APIRequestFactory().get(
+                '/api/events/', {'page_size': options['page_size']}, HTTP_HOST='localhost'
+            ))
+            view = EventListCreateView(request=request)
+
+            serializer_body = JSONRenderer().render(view.list_events())
+            fast_body = render_event_list(request)
+            if serializer_body != fast_body:
+                raise CommandError('Fast path output differs from the serializer output.')
+
+            serializer_time = self.measure(lambda: JSONRenderer().render(view.list_events()), options['iterations'])
+            fast_time = self.measure(lambda: render_event_list(request), options['iterations'])
+            transaction.set_rollback(True)
+
+        self.stdout.write(f"serializer: {serializer_time * 1000:.3f} ms/page")
+        self.stdout.write(f"fast path:  {fast_time * 1000:.3f} ms/page")
+        self.stdout.write(f"speedup:    {serializer_time / fast_time:.2f}x")
+
+    @staticmethod
+    def measure(func, iterations):
+        started = time.perf_counter()
+        for _ in range(iterations):
+            func()
+        return (time.perf_counter() - started) / iterations
@@ -0,0 +1,104 @@
+import time
+import uuid
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.utils import timezone
+
+from dico_event_be.uuids import uuid7
+
+KEY_GENERATORS = {'uuid4': uuid.uuid4, 'uuid7': uuid7}
+
+# The key and foreign-key layout of the events and event_sessions tables.
+SCHEMA = (
+    'CREATE TABLE bench_{key}_events (id uuid PRIMARY KEY, name varchar(255) NOT NULL, '
+    'created_at timestamptz NOT NULL)',
+    'CREATE TABLE bench_{key}_event_sessions (event_session_id uuid PRIMARY KEY, '
+    'event_id uuid NOT NULL REFERENCES bench_{key}_events (id) ON DELETE CASCADE, '
+    'start_time timestamptz NOT NULL, end_time timestamptz NOT NULL)',
+    'CREATE INDEX bench_{key}_event_sessions_event_id ON bench_{key}_event_sessions (event_id)',
+)
+
+INDEXES = (
+    ('events pkey', 'bench_{key}_events_pkey'),
+    ('sessions pkey', 'bench_{key}_event_sessions_pkey'),
+    ('sessions event_id', 'bench_{key}_event_sessions_event_id'),
+)
+
+
+class Command(BaseCommand):
+    help = (
+        'Inserts events and their sessions into scratch copies of the events and event_sessions tables, '
+        'keyed once by uuid4 and once by uuid7, and reports insert throughput and index sizes.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--events', type=int, default=2_000_000)
+        parser.add_argument('--sessions', type=int, default=2, help='Sessions per event.')
+        parser.add_argument('--batch-size', type=int, default=5000, help='Events per INSERT statement.')
+        parser.add_argument('--keep', action='store_true', help='Leave the scratch tables in place.')
+
+    def handle(self, *args, **options):
+        results = {}
+        for key, generate in KEY_GENERATORS.items():
+            self.create_tables(key)
+            try:
+                results[key] = self.run(key, generate, options)
+            finally:
+                if not options['keep']:
+                    self.drop_tables(key)
+
+        rows = options['events'] * (1 + options['sessions'])
+        self.stdout.write(f"{options['events']} events, {rows} rows per key type")
+        self.stdout.write(f"{'':<20}{'uuid4':>14}{'uuid7':>14}")
+        for label in ('rows/s', 'rows/s last 10%'):
+            self.stdout.write(f'{label:<20}' + ''.join(f'{results[key][label]:>14,.0f}' for key in KEY_GENERATORS))
+        for label, _ in INDEXES:
+            self.stdout.write(
+                f'{label:<20}' + ''.join(f'{results[key][label] / 2 ** 20:>11,.1f} MB' for key in KEY_GENERATORS)
+            )
+
+    def run(self, key, generate, options):
+        batch_size, sessions = options['batch_size'], options['sessions']
+        batches = -(-options['events'] // batch_size)
+        tail = max(batches // 10, 1)
+        now = timezone.now()
+
+        started = tail_started = time.perf_counter()
+        with connection.cursor() as cursor:
+            for batch in range(batches):
+                if batch == batches - tail:
+                    tail_started = time.perf_counter()
+                count = min(batch_size, options['events'] - batch * batch_size)
+                event_ids = [generate() for _ in range(count)]
+                cursor.execute(
+                    f'INSERT INTO bench_{key}_events (id, name, created_at) '
+                    "SELECT id, 'Benchmark event', %s FROM unnest(%s::uuid[]) AS id",
+                    [now, event_ids],
+                )
+                cursor.execute(
+                    f'INSERT INTO bench_{key}_event_sessions (event_session_id, event_id, start_time, end_time) '
+                    'SELECT session_id, event_id, %s, %s FROM unnest(%s::uuid[], %s::uuid[]) AS s (session_id, event_id)',
+                    [now, now, [generate() for _ in range(count * sessions)], event_ids * sessions],
+                )
+            elapsed, tail_elapsed = time.perf_counter() - started, time.perf_counter() - tail_started
+
+            result = {
+                'rows/s': options['events'] * (1 + sessions) / elapsed,
+                'rows/s last 10%': min(tail * batch_size, options['events']) * (1 + sessions) / tail_elapsed,
+            }
+            for label, index in INDEXES:
+                cursor.execute('SELECT pg_relation_size(%s::regclass)', [index.format(key=key)])
+                result[label] = cursor.fetchone()[0]
+        return result
+
+    @staticmethod
+    def create_tables(key):
+        with connection.cursor() as cursor:
+            for statement in SCHEMA:
+                cursor.execute(statement.format(key=key))
+
+    @staticmethod
+    def drop_tables(key):
+        with connection.cursor() as cursor:
+            cursor.execute(f'DROP TABLE IF EXISTS bench_{key}_event_sessions, bench_{key}_events')
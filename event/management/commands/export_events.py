@@ -0,0 +1,43 @@
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+from event.export import EXPORT_FORMATS, export_queryset
+from event.models import Event
+from event.serializers import EventFilterSerializer
+
+
+class Command(BaseCommand):
+    help = 'Streams events with their sessions and organizers as NDJSON or CSV.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--output', choices=list(EXPORT_FORMATS), default='ndjson')
+        parser.add_argument('--file', help='Write to this path instead of stdout.')
+        parser.add_argument('--status')
+        parser.add_argument('--category')
+        parser.add_argument('--created-after', help='ISO 8601 datetime, inclusive.')
+        parser.add_argument('--created-before', help='ISO 8601 datetime, exclusive.')
+
+    def handle(self, *args, **options):
+        params = {
+            name: options[name]
+            for name in ('status', 'category', 'created_after', 'created_before')
+            if options[name] is not None
+        }
+        filters = EventFilterSerializer(data=params)
+        if not filters.is_valid():
+            raise CommandError(filters.errors)
+
+        export, _ = EXPORT_FORMATS[options['output']]
+        chunks = export(export_queryset(filters.filter_queryset(Event.objects.all())))
+
+        if options['file']:
+            with open(options['file'], 'wb') as stream:
+                self.write(stream, chunks)
+        else:
+            self.write(sys.stdout.buffer, chunks)
+
+    @staticmethod
+    def write(stream, chunks):
+        for chunk in chunks:
+            stream.write(chunk if isinstance(chunk, bytes) else chunk.encode('utf-8'))
@@ -0,0 +1,55 @@
+import uuid
+
+from django.core.management.base import BaseCommand, CommandError
+
+from auth.models import User
+from dico_event_be.benchmarks import run_in_threads, seed_users
+from event.models import Event, EventRegistration, EventSeatShard
+from event.registrations import EventFullyBooked, register
+
+
+class Command(BaseCommand):
+    help = 'Registers many users for one event concurrently and checks that no seat is oversold.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--quota', type=int, default=1000)
+        parser.add_argument('--attendees', type=int, default=2000)
+        parser.add_argument('--workers', type=int, default=32)
+        parser.add_argument('--keep', action='store_true', help='Keep the generated event and users.')
+
+    def handle(self, *args, **options):
+        run_id = uuid.uuid4().hex[:8]
+        event = Event.objects.create(
+            name=f'Load test {run_id}',
+            description='Registration load test',
+            location='Load test',
+            status='open',
+            quota=options['quota'],
+            category='loadtest',
+        )
+        users = seed_users(f'loadtest-{run_id}', options['attendees'])
+
+        def attempt(user_id):
+            try:
+                register(event, user_id)
+                return True
+            except EventFullyBooked:
+                return False
+
+        try:
+            results, elapsed = run_in_threads(attempt, [user.pk for user in users], options['workers'])
+
+            registered = EventRegistration.objects.filter(event=event).count()
+            remaining = sum(EventSeatShard.objects.filter(event=event).values_list('remaining', flat=True))
+            expected = min(options['quota'], options['attendees'])
+
+            self.stdout.write(f"attempts:     {len(results)}")
+            self.stdout.write(f"registered:   {registered} (expected {expected})")
+            self.stdout.write(f"remaining:    {remaining}")
+            self.stdout.write(f"throughput:   {len(results) / elapsed:.0f} attempts/s")
+            if registered != expected or results.count(True) != expected or registered + remaining != options['quota']:
+                raise CommandError('Seat accounting is inconsistent.')
+        finally:
+            if not options['keep']:
+                event.delete()
+                User.objects.filter(pk__in=[user.pk for user in users]).delete()
@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+
+from dico_event_be.routers import primary
+from event.deletion import purge_deleted_events
+
+
+class Command(BaseCommand):
+    help = (
+        'Removes events deleted more than EVENT_PURGE_AFTER_DAYS ago, with their sessions, organizers and '
+        'registrations, in small batches so it can run while the API is serving.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500)
+
+    def handle(self, *args, **options):
+        with primary():
+            deleted = purge_deleted_events(batch_size=options['batch_size'])
+        self.stdout.write(f'Purged {deleted} deleted events.')
@@ -0,0 +1,17 @@
+# Generated by Django 4.2 on 2026-10-18 16:04
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('event', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='event',
+            index=models.Index(fields=['-created_at', '-id'], name='idx_events_created_at_id'),
+        ),
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 4.2 on 2026-10-18 16:12
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('event', '0002_events_created_at_id_index'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='event',
+            index=models.Index(fields=['status', '-created_at', '-id'], name='idx_events_status_created_at'),
+        ),
+        migrations.AddIndex(
+            model_name='event',
+            index=models.Index(fields=['category', '-created_at', '-id'], name='idx_events_category_created_at'),
+        ),
+        migrations.AddIndex(
+            model_name='event',
+            index=models.Index(fields=['location', '-created_at', '-id'], name='idx_events_location_created_at'),
+        ),
+        migrations.AddIndex(
+            model_name='event',
+            index=django.contrib.postgres.indexes.GinIndex(django.contrib.postgres.search.SearchVector('name', 'description', config='english'), name='idx_events_search'),
+        ),
+        migrations.AddIndex(
+            model_name='eventsession',
+            index=models.Index(fields=['event', 'start_time'], name='idx_event_sessions_event_start'),
+        ),
+    ]
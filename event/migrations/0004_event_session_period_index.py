@@ -0,0 +1,19 @@
+# Generated by Django 4.2 on 2026-10-18 16:13
+
+import django.contrib.postgres.fields.ranges
+import django.contrib.postgres.indexes
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('event', '0003_event_filter_indexes'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='eventsession',
+            index=django.contrib.postgres.indexes.GistIndex(models.Func(models.F('start_time'), models.F('end_time'), function='TSTZRANGE', output_field=django.contrib.postgres.fields.ranges.DateTimeRangeField()), name='idx_event_sessions_period'),
+        ),
+    ]
@@ -0,0 +1,54 @@
+# Generated by Django 4.2 on 2026-10-18 16:14
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+import uuid
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('event', '0004_event_session_period_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EventSeatShard',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('shard', models.PositiveSmallIntegerField()),
+                ('remaining', models.IntegerField()),
+                ('event', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='seat_shards', to='event.event')),
+            ],
+            options={
+                'db_table': 'event_seat_shards',
+            },
+        ),
+        migrations.CreateModel(
+            name='EventRegistration',
+            fields=[
+                ('event_registration_id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False, unique=True)),
+                ('shard', models.PositiveSmallIntegerField()),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('event', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='registrations', to='event.event')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'db_table': 'event_registrations',
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='eventseatshard',
+            constraint=models.UniqueConstraint(fields=('event', 'shard'), name='uq_event_seat_shards'),
+        ),
+        migrations.AddConstraint(
+            model_name='eventseatshard',
+            constraint=models.CheckConstraint(check=models.Q(('remaining__gte', 0)), name='chk_event_seat_shards_remaining'),
+        ),
+        migrations.AddConstraint(
+            model_name='eventregistration',
+            constraint=models.UniqueConstraint(fields=('event', 'user'), name='uq_event_registrations'),
+        ),
+    ]
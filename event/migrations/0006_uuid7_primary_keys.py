@@ -0,0 +1,34 @@
+# Generated by Django 4.2 on 2026-10-18 16:38
+
+import dico_event_be.uuids
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('event', '0005_event_registrations'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='event',
+            name='id',
+            field=models.UUIDField(default=dico_event_be.uuids.uuid7, editable=False, primary_key=True, serialize=False, unique=True),
+        ),
+        migrations.AlterField(
+            model_name='eventorganizer',
+            name='event_organizer_id',
+            field=models.UUIDField(default=dico_event_be.uuids.uuid7, editable=False, primary_key=True, serialize=False, unique=True),
+        ),
+        migrations.AlterField(
+            model_name='eventregistration',
+            name='event_registration_id',
+            field=models.UUIDField(default=dico_event_be.uuids.uuid7, editable=False, primary_key=True, serialize=False, unique=True),
+        ),
+        migrations.AlterField(
+            model_name='eventsession',
+            name='event_session_id',
+            field=models.UUIDField(default=dico_event_be.uuids.uuid7, editable=False, primary_key=True, serialize=False, unique=True),
+        ),
+    ]
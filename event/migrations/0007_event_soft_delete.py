@@ -0,0 +1,89 @@
+# Generated by Django 4.2 on 2026-10-18 16:50
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.db import migrations, models
+
+# Rows referencing events are removed by Postgres when an event is purged, so
+# the purge never loads them. Django 4.2 cannot declare ON DELETE on a foreign
+# key, so the constraints it created are rewritten in place.
+CASCADE_FOREIGN_KEYS = r"""
+DO $$
+DECLARE
+    fk record;
+BEGIN
+    FOR fk IN
+        SELECT conrelid::regclass AS tbl, conname, pg_get_constraintdef(oid) AS def
+        FROM pg_constraint
+        WHERE contype = 'f' AND confrelid = 'events'::regclass AND confdeltype <> %(action)s
+    LOOP
+        EXECUTE format(
+            'ALTER TABLE %%s DROP CONSTRAINT %%I, ADD CONSTRAINT %%I %%s', fk.tbl, fk.conname, fk.conname,
+            regexp_replace(fk.def, 'REFERENCES events\(id\)( ON DELETE CASCADE)?', %(references)s)
+        );
+    END LOOP;
+END $$;
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('event', '0006_uuid7_primary_keys'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='event',
+            name='idx_events_created_at_id',
+        ),
+        migrations.RemoveIndex(
+            model_name='event',
+            name='idx_events_status_created_at',
+        ),
+        migrations.RemoveIndex(
+            model_name='event',
+            name='idx_events_category_created_at',
+        ),
+        migrations.RemoveIndex(
+            model_name='event',
+            name='idx_events_location_created_at',
+        ),
+        migrations.RemoveIndex(
+            model_name='event',
+            name='idx_events_search',
+        ),
+        migrations.AddField(
+            model_name='event',
+            name='deleted_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='event',
+            index=models.Index(condition=models.Q(('deleted_at__isnull', True)), fields=['-created_at', '-id'], name='idx_events_created_at_id'),
+        ),
+        migrations.AddIndex(
+            model_name='event',
+            index=models.Index(condition=models.Q(('deleted_at__isnull', True)), fields=['status', '-created_at', '-id'], name='idx_events_status_created_at'),
+        ),
+        migrations.AddIndex(
+            model_name='event',
+            index=models.Index(condition=models.Q(('deleted_at__isnull', True)), fields=['category', '-created_at', '-id'], name='idx_events_category_created_at'),
+        ),
+        migrations.AddIndex(
+            model_name='event',
+            index=models.Index(condition=models.Q(('deleted_at__isnull', True)), fields=['location', '-created_at', '-id'], name='idx_events_location_created_at'),
+        ),
+        migrations.AddIndex(
+            model_name='event',
+            index=django.contrib.postgres.indexes.GinIndex(django.contrib.postgres.search.SearchVector('name', 'description', config='english'), condition=models.Q(('deleted_at__isnull', True)), name='idx_events_search'),
+        ),
+        migrations.AddIndex(
+            model_name='event',
+            index=models.Index(condition=models.Q(('deleted_at__isnull', False)), fields=['deleted_at'], name='idx_events_deleted_at'),
+        ),
+        migrations.RunSQL(
+            CASCADE_FOREIGN_KEYS % {'action': "'c'", 'references': "'REFERENCES events(id) ON DELETE CASCADE'"},
+            CASCADE_FOREIGN_KEYS % {'action': "'a'", 'references': "'REFERENCES events(id)'"},
+        ),
+    ]
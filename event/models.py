@@ -1,10 +1,48 @@
+from django.contrib.postgres.fields import DateTimeRangeField
+from django.contrib.postgres.indexes import GinIndex, GistIndex
+from django.contrib.postgres.search import SearchVector
 from django.db import models
-import uuid
 
 from auth.models import User
+from dico_event_be.uuids import uuid7
+
+EVENT_SEARCH_CONFIG = 'english'
+# Queries must use this exact expression for Postgres to match it against idx_events_search.
+EVENT_SEARCH_VECTOR = SearchVector('name', 'description', config=EVENT_SEARCH_CONFIG)
+# The [start_time, end_time) range of a session, indexed by idx_event_sessions_period.
+SESSION_PERIOD = models.Func(
+    models.F('start_time'), models.F('end_time'), function='TSTZRANGE', output_field=DateTimeRangeField()
+)
+
+
+def sessions_prefetch():
+    """
+    The sessions of events in the order every representation lists them.
+    """
+    return models.Prefetch('sessions', queryset=EventSession.objects.order_by('start_time', 'event_session_id'))
+
+
+class EventQuerySet(models.QuerySet):
+    def with_sessions(self):
+        return self.prefetch_related(sessions_prefetch())
+
+
+class EventManager(models.Manager.from_queryset(EventQuerySet)):
+    """
+    Events that have not been deleted. Event.all_objects includes the deleted
+    ones until purge_deleted_events() removes them.
+    """
+
+    def get_queryset(self):
+        return super().get_queryset().filter(deleted_at__isnull=True)
+
+
+# Indexes on events only cover live rows; EventManager adds the matching condition.
+LIVE_EVENTS = models.Q(deleted_at__isnull=True)
+
 
 class Event(models.Model):
-    id = models.UUIDField(default=uuid.uuid4, unique=True, primary_key=True, editable=False)
+    id = models.UUIDField(default=uuid7, unique=True, primary_key=True, editable=False)
     name = models.CharField(max_length=255, null=False, blank=False)
     description = models.TextField()
     location = models.CharField(max_length=100, null=False, blank=False)
@@ -13,15 +51,35 @@ class Event(models.Model):
     category = models.CharField(max_length=100, null=False, blank=False)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
+    deleted_at = models.DateTimeField(null=True, blank=True)
+
+    objects = EventManager()
+    all_objects = EventQuerySet.as_manager()
 
     def __str__(self):
         return self.name
 
     class Meta:
         db_table = 'events'
+        indexes = [
+            models.Index(fields=['-created_at', '-id'], name='idx_events_created_at_id', condition=LIVE_EVENTS),
+            models.Index(
+                fields=['status', '-created_at', '-id'], name='idx_events_status_created_at', condition=LIVE_EVENTS
+            ),
+            models.Index(
+                fields=['category', '-created_at', '-id'], name='idx_events_category_created_at', condition=LIVE_EVENTS
+            ),
+            models.Index(
+                fields=['location', '-created_at', '-id'], name='idx_events_location_created_at', condition=LIVE_EVENTS
+            ),
+            GinIndex(EVENT_SEARCH_VECTOR, name='idx_events_search', condition=LIVE_EVENTS),
+            models.Index(
+                fields=['deleted_at'], name='idx_events_deleted_at', condition=models.Q(deleted_at__isnull=False)
+            ),
+        ]
 
 class EventOrganizer(models.Model):
-    event_organizer_id = models.UUIDField(default=uuid.uuid4, unique=True, primary_key=True, editable=False)
+    event_organizer_id = models.UUIDField(default=uuid7, unique=True, primary_key=True, editable=False)
     user = models.ForeignKey(User, on_delete=models.CASCADE, db_index=True)
     event = models.ForeignKey(Event, on_delete=models.CASCADE, db_index=True)
     created_at = models.DateTimeField(auto_now_add=True)
@@ -40,7 +98,7 @@ class EventOrganizer(models.Model):
         ]
 
 class EventSession(models.Model):
-    event_session_id = models.UUIDField(default=uuid.uuid4, unique=True, primary_key=True, editable=False)
+    event_session_id = models.UUIDField(default=uuid7, unique=True, primary_key=True, editable=False)
     event = models.ForeignKey(Event, related_name='sessions', on_delete=models.CASCADE)
     start_time = models.DateTimeField()
     end_time = models.DateTimeField()
@@ -59,5 +117,46 @@ class EventSession(models.Model):
         ]
         indexes = [
             models.Index(fields=['event'], name='idx_event_sessions_event_id'),
+            models.Index(fields=['event', 'start_time'], name='idx_event_sessions_event_start'),
+            GistIndex(SESSION_PERIOD, name='idx_event_sessions_period'),
+        ]
+
+
+class EventRegistration(models.Model):
+    event_registration_id = models.UUIDField(default=uuid7, unique=True, primary_key=True, editable=False)
+    event = models.ForeignKey(Event, related_name='registrations', on_delete=models.CASCADE)
+    user = models.ForeignKey(User, on_delete=models.CASCADE)
+    shard = models.PositiveSmallIntegerField()
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        db_table = 'event_registrations'
+        constraints = [
+            models.UniqueConstraint(
+                fields=["event", "user"],
+                name="uq_event_registrations"
+            )
         ]
 
+class EventSeatShard(models.Model):
+    """
+    One slice of an event's remaining seats. Spreading the counter over several
+    rows lets concurrent registrations lock different rows instead of queueing
+    on a single one.
+    """
+    event = models.ForeignKey(Event, related_name='seat_shards', on_delete=models.CASCADE)
+    shard = models.PositiveSmallIntegerField()
+    remaining = models.IntegerField()
+
+    class Meta:
+        db_table = 'event_seat_shards'
+        constraints = [
+            models.UniqueConstraint(
+                fields=["event", "shard"],
+                name="uq_event_seat_shards"
+            ),
+            models.CheckConstraint(
+                check=models.Q(remaining__gte=0),
+                name='chk_event_seat_shards_remaining'
+            )
+        ]
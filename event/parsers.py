@@ -0,0 +1,31 @@
+import json
+
+from django.conf import settings
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import BaseParser
+
+
+class NDJSONParser(BaseParser):
+    """
+    Parses newline-delimited JSON lazily, one object per line, so large uploads
+    are consumed as they are read instead of being buffered in full.
+    """
+
+    media_type = 'application/x-ndjson'
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        parser_context = parser_context or {}
+        encoding = parser_context.get('encoding', settings.DEFAULT_CHARSET)
+        return (self.parse_line(line, number, encoding) for number, line in enumerate(stream, 1) if line.strip())
+
+    @staticmethod
+    def parse_line(line, number, encoding):
+        try:
+            line = line.decode(encoding)
+        except UnicodeDecodeError:
+            raise ParseError(f'Line {number} is not valid {encoding}.')
+        try:
+            return json.loads(line)
+        except ValueError:
+            # Left as a string so the row fails validation on its own.
+            return line
@@ -0,0 +1,108 @@
+import random
+
+from django.db import IntegrityError, transaction
+from django.db.models import F, Sum
+from rest_framework import status
+from rest_framework.exceptions import APIException
+
+from .models import EventRegistration, EventSeatShard
+
+SEAT_SHARDS = 8
+
+
+class EventFullyBooked(APIException):
+    status_code = status.HTTP_409_CONFLICT
+    default_detail = 'Event is fully booked.'
+    default_code = 'fully_booked'
+
+
+class AlreadyRegistered(APIException):
+    status_code = status.HTTP_409_CONFLICT
+    default_detail = 'Already registered for this event.'
+    default_code = 'already_registered'
+
+
+def register(event, user_id):
+    """
+    Reserves a seat and records the registration in one short transaction.
+
+    Seats are taken with a conditional UPDATE on a random shard, so overselling
+    is impossible and the events row itself is never locked.
+    """
+    try:
+        with transaction.atomic():
+            shard = take_seat(event.pk)
+            if shard is None and create_seat_shards(event):
+                shard = take_seat(event.pk)
+            if shard is None:
+                raise EventFullyBooked()
+            return EventRegistration.objects.create(event=event, user_id=user_id, shard=shard)
+    except IntegrityError:
+        # The seat decrement was rolled back together with the duplicate insert.
+        raise AlreadyRegistered()
+
+
+def cancel(event, user_id):
+    with transaction.atomic():
+        registration = EventRegistration.objects.filter(event=event, user_id=user_id).first()
+        if registration is None:
+            return False
+        registration.delete()
+        # After a quota cut there can be more registrations than seats (see
+        # rebalance_seat_shards); such a cancellation frees no seat.
+        if EventRegistration.objects.filter(event=event).count() < event.quota:
+            EventSeatShard.objects.filter(event=event, shard=registration.shard).update(remaining=F('remaining') + 1)
+    return True
+
+
+def take_seat(event_id):
+    shards = list(range(SEAT_SHARDS))
+    random.shuffle(shards)
+    for shard in shards:
+        updated = EventSeatShard.objects.filter(
+            event_id=event_id, shard=shard, remaining__gt=0
+        ).update(remaining=F('remaining') - 1)
+        if updated:
+            return shard
+    return None
+
+
+def create_seat_shards(event):
+    """
+    Creates the seat shards of an event on its first registration. Returns
+    False when they already existed.
+    """
+    if EventSeatShard.objects.filter(event=event).exists():
+        return False
+    EventSeatShard.objects.bulk_create(
+        [
+            EventSeatShard(event=event, shard=shard, remaining=remaining)
+            for shard, remaining in enumerate(split_seats(event.quota))
+        ],
+        ignore_conflicts=True
+    )
+    return True
+
+
+def rebalance_seat_shards(event):
+    """
+    Redistributes the remaining seats after the quota of an event changes.
+    """
+    with transaction.atomic():
+        shards = list(EventSeatShard.objects.select_for_update().filter(event=event).order_by('shard'))
+        if not shards:
+            return
+        remaining = max(event.quota - EventRegistration.objects.filter(event=event).count(), 0)
+        for shard, seats in zip(shards, split_seats(remaining)):
+            shard.remaining = seats
+        EventSeatShard.objects.bulk_update(shards, ['remaining'])
+
+
+def remaining_seats(event):
+    remaining = EventSeatShard.objects.filter(event=event).aggregate(remaining=Sum('remaining'))['remaining']
+    return event.quota if remaining is None else remaining
+
+
+def split_seats(seats):
+    base, extra = divmod(max(seats, 0), SEAT_SHARDS)
+    return [base + (1 if shard < extra else 0) for shard in range(SEAT_SHARDS)]
@@ -0,0 +1,188 @@
+import json
+import uuid
+
+from django.db.models import F, OuterRef, Subquery
+from rest_framework.reverse import reverse
+
+from dico_event_be.pagination import KeysetPagination
+from .models import Event, EventSession
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+EVENT_ROW_FIELDS = ('id', 'name', 'status', 'category', 'description', 'location', 'quota', 'created_at')
+
+_PLACEHOLDER = str(uuid.UUID(int=0))
+
+
+def event_rows(queryset=None, *fields):
+    """
+    Events as plain dicts with the times of their first session joined in,
+    using the same session ordering as Event.objects.with_sessions(). fields
+    names any Event fields to read besides EVENT_ROW_FIELDS.
+    """
+    if queryset is None:
+        queryset = Event.objects.all()
+    first_session = EventSession.objects.filter(event=OuterRef('pk')).order_by('start_time', 'event_session_id')
+    return queryset.annotate(
+        start_time=Subquery(first_session.values('start_time')[:1]),
+        end_time=Subquery(first_session.values('end_time')[:1]),
+    ).values(*EVENT_ROW_FIELDS, *fields, 'start_time', 'end_time')
+
+
+def attach_sessions(rows):
+    """
+    Adds every session of each row's event under 'sessions', read with one
+    query for the whole page.
+    """
+    rows = list(rows)
+    if rows:
+        _group_sessions(rows, _page_sessions(rows))
+    return rows
+
+
+async def aattach_sessions(rows):
+    """
+    attach_sessions() reading through the async ORM.
+    """
+    if rows:
+        _group_sessions(rows, [session async for session in _page_sessions(rows)])
+    return rows
+
+
+def _page_sessions(rows):
+    return EventSession.objects.filter(event_id__in={row['id'] for row in rows}).order_by(
+        'event_id', 'start_time', 'event_session_id'
+    ).values('event_id', 'event_session_id', 'start_time', 'end_time')
+
+
+def _group_sessions(rows, sessions):
+    by_event = {}
+    for session in sessions:
+        by_event.setdefault(session['event_id'], []).append(session)
+    for row in rows:
+        row['sessions'] = by_event.get(row['id'], [])
+
+
+class EventLinkBuilder:
+    """
+    Builds the _links of EventReadSerializer from URLs reversed once per request.
+    """
+
+    def __init__(self, request):
+        self.list_url = reverse('event-list', request=request)
+        detail_url = reverse('event-detail', kwargs={'pk': _PLACEHOLDER}, request=request)
+        self.detail_prefix, self.detail_suffix = detail_url.split(_PLACEHOLDER)
+
+    def links(self, event_id):
+        detail_url = f'{self.detail_prefix}{event_id}{self.detail_suffix}'
+        return [
+            {"rel": "self", "href": self.list_url, "action": "POST", "types": ["application/json"]},
+            {"rel": "self", "href": detail_url, "action": "GET", "types": ["application/json"]},
+            {"rel": "self", "href": detail_url, "action": "PUT", "types": ["application/json"]},
+            {"rel": "self", "href": detail_url, "action": "DELETE", "types": ["application/json"]},
+        ]
+
+
+def render_event_list(request, queryset=None):
+    """
+    Renders the event list page to the exact bytes EventReadSerializer and
+    JSONRenderer would produce, without instantiating either.
+    """
+    paginator = KeysetPagination(ordering=('-created_at', '-id'))
+    rows = attach_sessions(paginator.paginate_queryset(event_rows(queryset), request))
+    return _render_event_page(request, paginator, rows)
+
+
+async def arender_event_list(request, queryset=None):
+    """
+    render_event_list() reading its rows through the async ORM.
+    """
+    paginator = KeysetPagination(ordering=('-created_at', '-id'))
+    rows = await aattach_sessions(await paginator.apaginate_queryset(event_rows(queryset), request))
+    return _render_event_page(request, paginator, rows)
+
+
+async def arender_event_detail(pk):
+    """
+    The bytes of EventDetailView.get for one event and its updated_at, or None
+    when it does not exist.
+    """
+    row = await event_rows(Event.objects.filter(pk=pk), 'updated_at').afirst()
+    if row is None:
+        return None
+    await aattach_sessions([row])
+    # EventDetailView serializes without a request, so its links are relative.
+    return dumps(event_item(row, EventLinkBuilder(None))), row['updated_at']
+
+
+def _render_event_page(request, paginator, rows):
+    links = EventLinkBuilder(request)
+    events = [event_item(row, links) for row in rows]
+    return dumps(paginator.get_paginated_data('events', events))
+
+
+def event_window_page(request, sessions):
+    """
+    One page of the sessions overlapping a time window, ordered by start time,
+    each rendered as its event with that session's times.
+    """
+    paginator = KeysetPagination(ordering=('start_time', 'event_session_id'))
+    rows = attach_sessions(paginator.paginate_queryset(sessions.values(
+        'event_session_id',
+        'start_time',
+        'end_time',
+        id=F('event_id'),
+        **{field: F(f'event__{field}') for field in ('name', 'status', 'category', 'description', 'location', 'quota')}
+    ), request))
+    links = EventLinkBuilder(request)
+    return paginator.get_paginated_data('events', [event_item(row, links) for row in rows])
+
+
+def event_item(row, links):
+    event_id = str(row['id'])
+    return {
+        'id': event_id,
+        'name': row['name'],
+        'status': row['status'],
+        'category': row['category'],
+        'description': row['description'],
+        'location': row['location'],
+        'start_time': format_datetime(row['start_time']),
+        'end_time': format_datetime(row['end_time']),
+        'sessions': [
+            {
+                'event_session_id': str(session['event_session_id']),
+                'start_time': format_datetime(session['start_time']),
+                'end_time': format_datetime(session['end_time']),
+            }
+            for session in row['sessions']
+        ],
+        'quota': row['quota'],
+        '_links': links.links(event_id),
+    }
+
+
+def dumps(data):
+    """
+    Compact UTF-8 JSON matching rest_framework.renderers.JSONRenderer, using orjson when installed.
+    """
+    if orjson is not None:
+        ret = orjson.dumps(data)
+    else:
+        ret = json.dumps(data, ensure_ascii=False, separators=(',', ':')).encode()
+    return ret.replace('\u2028'.encode(), b'\\u2028').replace('\u2029'.encode(), b'\\u2029')
+
+
+def format_datetime(value):
+    """
+    Formats a datetime the way rest_framework.utils.encoders.JSONEncoder does.
+    """
+    if value is None:
+        return None
+    representation = value.isoformat()
+    if representation.endswith('+00:00'):
+        representation = representation[:-6] + 'Z'
+    return representation
@@ -1,13 +1,53 @@
 from rest_framework import serializers
 from rest_framework.reverse import reverse
+from django.contrib.postgres.search import SearchQuery
 from django.db import transaction
+from django.db.backends.postgresql.psycopg_any import DateTimeTZRange
+from django.db.models import Exists, OuterRef, prefetch_related_objects
+from django.utils import timezone
 
-from .models import Event, EventSession, EventOrganizer
+from .models import (
+    Event, EventSession, EventOrganizer, EventRegistration, EVENT_SEARCH_CONFIG, EVENT_SEARCH_VECTOR, SESSION_PERIOD,
+    sessions_prefetch
+)
+from .registrations import rebalance_seat_shards
+from .updates import sync_sessions, write_first_session
 from auth.models import User
 
+MAX_EVENT_SESSIONS = 200
+
+
+class EventSessionWriteSerializer(serializers.Serializer):
+    event_session_id = serializers.UUIDField(required=False)
+    start_time = serializers.DateTimeField()
+    end_time = serializers.DateTimeField()
+
+    def validate(self, data):
+        if data['end_time'] <= data['start_time']:
+            raise serializers.ValidationError(
+                "end_time must be greater than start_time"
+            )
+        # chk_event_session_time compares the dates in the database time zone.
+        if timezone.localtime(data['end_time']).date() != timezone.localtime(data['start_time']).date():
+            raise serializers.ValidationError(
+                "end_time must be on the same day as start_time"
+            )
+        return data
+
+
+def validate_sessions(sessions):
+    ids = [session['event_session_id'] for session in sessions if 'event_session_id' in session]
+    if len(ids) != len(set(ids)):
+        raise serializers.ValidationError("a session can only be listed once")
+    return sessions
+
+
 class EventWriteSerializer(serializers.ModelSerializer):
-    start_time = serializers.DateTimeField(write_only=True)
-    end_time = serializers.DateTimeField(write_only=True)
+    start_time = serializers.DateTimeField(write_only=True, required=False)
+    end_time = serializers.DateTimeField(write_only=True, required=False)
+    sessions = EventSessionWriteSerializer(
+        many=True, write_only=True, required=False, allow_empty=False, max_length=MAX_EVENT_SESSIONS
+    )
     organizer_id = serializers.PrimaryKeyRelatedField(
         queryset=User.objects.all(),
         write_only=True
@@ -24,11 +64,25 @@ class EventWriteSerializer(serializers.ModelSerializer):
             'location',
             'start_time',
             'end_time',
+            'sessions',
             'quota',
             'organizer_id',
         ]
 
+    def validate_sessions(self, sessions):
+        return validate_sessions(sessions)
+
     def validate(self, data):
+        if 'sessions' in data:
+            if 'start_time' in data or 'end_time' in data:
+                raise serializers.ValidationError(
+                    "send either sessions or start_time and end_time"
+                )
+            return data
+        if 'start_time' not in data or 'end_time' not in data:
+            raise serializers.ValidationError(
+                "start_time and end_time are required without sessions"
+            )
         if data['end_time'] <= data['start_time']:
             raise serializers.ValidationError(
                 "end_time must be greater than start_time"
@@ -36,18 +90,16 @@ class EventWriteSerializer(serializers.ModelSerializer):
         return data
 
     def create(self, validated_data):
-        start_time = validated_data.pop('start_time')
-        end_time = validated_data.pop('end_time')
+        sessions = event_sessions(validated_data)
         organizer = validated_data.pop('organizer_id')
 
         with transaction.atomic():
             event = Event.objects.create(**validated_data)
 
-            EventSession.objects.create(
-                event=event,
-                start_time=start_time,
-                end_time=end_time
-            )
+            EventSession.objects.bulk_create([
+                EventSession(event=event, start_time=session['start_time'], end_time=session['end_time'])
+                for session in sessions
+            ])
 
             EventOrganizer.objects.create(
                 event=event,
@@ -57,31 +109,26 @@ class EventWriteSerializer(serializers.ModelSerializer):
         return event
 
     def update(self, instance, validated_data):
+        sessions = validated_data.pop('sessions', None)
         start_time = validated_data.pop('start_time', None)
         end_time = validated_data.pop('end_time', None)
         organizer = validated_data.pop('organizer_id', None)
 
+        quota_changed = 'quota' in validated_data and validated_data['quota'] != instance.quota
+
         with transaction.atomic():
             for attr, value in validated_data.items():
                 setattr(instance, attr, value)
+            # Saving the event also moves its updated_at, the ETag, for session changes.
             instance.save()
 
-            if start_time or end_time:
-                session, _ = EventSession.objects.get_or_create(
-                    event=instance
-                )
-
-                if start_time:
-                    session.start_time = start_time
-                if end_time:
-                    session.end_time = end_time
-
-                if session.end_time <= session.start_time:
-                    raise serializers.ValidationError(
-                        "end_time must be greater than start_time"
-                    )
+            if quota_changed:
+                rebalance_seat_shards(instance)
 
-                session.save()
+            if sessions is not None:
+                sync_sessions(instance.pk, sessions, instance.updated_at)
+            elif start_time or end_time:
+                write_first_session(instance.pk, start_time, end_time, instance.updated_at)
 
             if organizer:
                 EventOrganizer.objects.update_or_create(
@@ -91,10 +138,79 @@ class EventWriteSerializer(serializers.ModelSerializer):
 
         return instance
 
+
+def event_sessions(validated_data):
+    """
+    Pops the sessions of a validated event, given either as a list or as a
+    single start_time and end_time.
+    """
+    start_time = validated_data.pop('start_time', None)
+    end_time = validated_data.pop('end_time', None)
+    return validated_data.pop('sessions', None) or [{'start_time': start_time, 'end_time': end_time}]
+
+class EventBulkItemSerializer(EventWriteSerializer):
+    organizer_id = serializers.UUIDField(write_only=True)
+
+    def validate(self, data):
+        data = super().validate(data)
+        if 'start_time' in data and data['end_time'].date() != data['start_time'].date():
+            raise serializers.ValidationError(
+                "end_time must be on the same day as start_time"
+            )
+        return data
+
+
+class EventPatchSerializer(serializers.ModelSerializer):
+    """
+    A partial update of an event; only the fields sent are written.
+    """
+    start_time = serializers.DateTimeField(required=False)
+    end_time = serializers.DateTimeField(required=False)
+    sessions = EventSessionWriteSerializer(many=True, required=False, allow_empty=False, max_length=MAX_EVENT_SESSIONS)
+    organizer_id = serializers.PrimaryKeyRelatedField(queryset=User.objects.all(), required=False)
+
+    class Meta:
+        model = Event
+        fields = [
+            'name',
+            'status',
+            'category',
+            'description',
+            'location',
+            'start_time',
+            'end_time',
+            'sessions',
+            'quota',
+            'organizer_id',
+        ]
+
+    def validate_sessions(self, sessions):
+        return validate_sessions(sessions)
+
+    def validate(self, data):
+        if not data:
+            raise serializers.ValidationError("no fields to update")
+        if 'sessions' in data and ('start_time' in data or 'end_time' in data):
+            raise serializers.ValidationError(
+                "send either sessions or start_time and end_time"
+            )
+        if 'start_time' in data and 'end_time' in data:
+            if data['end_time'] <= data['start_time']:
+                raise serializers.ValidationError(
+                    "end_time must be greater than start_time"
+                )
+            if timezone.localtime(data['end_time']).date() != timezone.localtime(data['start_time']).date():
+                raise serializers.ValidationError(
+                    "end_time must be on the same day as start_time"
+                )
+        return data
+
+
 class EventReadSerializer(serializers.HyperlinkedModelSerializer):
     _links = serializers.SerializerMethodField()
     start_time = serializers.SerializerMethodField()
     end_time = serializers.SerializerMethodField()
+    sessions = serializers.SerializerMethodField()
     organizer_id = serializers.PrimaryKeyRelatedField(
         queryset=User.objects.all(),
         write_only=True,
@@ -112,19 +228,40 @@ class EventReadSerializer(serializers.HyperlinkedModelSerializer):
             'location',
             'start_time',
             'end_time',
+            'sessions',
             'quota',
             'organizer_id',
             '_links'
         ]
 
+    def _sessions(self, obj):
+        # Iterating .all() reuses the prefetch cache from Event.objects.with_sessions();
+        # events loaded without it get the same prefetch once for all the session fields.
+        if 'sessions' not in getattr(obj, '_prefetched_objects_cache', {}):
+            prefetch_related_objects([obj], sessions_prefetch())
+        return obj.sessions.all()
+
+    def _first_session(self, obj):
+        return next(iter(self._sessions(obj)), None)
+
     def get_start_time(self, obj):
-        session = obj.sessions.first()
+        session = self._first_session(obj)
         return session.start_time if session else None
 
     def get_end_time(self, obj):
-        session = obj.sessions.first()
+        session = self._first_session(obj)
         return session.end_time if session else None
 
+    def get_sessions(self, obj):
+        return [
+            {
+                'event_session_id': str(session.pk),
+                'start_time': session.start_time,
+                'end_time': session.end_time,
+            }
+            for session in self._sessions(obj)
+        ]
+
     def get__links(self, obj):
         request = self.context.get('request')
         return [
@@ -152,4 +289,60 @@ class EventReadSerializer(serializers.HyperlinkedModelSerializer):
                 "action": "DELETE",
                 "types": ["application/json"]
             }
-        ]
\ No newline at end of file
+        ]
+
+class EventFilterSerializer(serializers.Serializer):
+    status = serializers.CharField(required=False)
+    category = serializers.CharField(required=False)
+    location = serializers.CharField(required=False)
+    created_after = serializers.DateTimeField(required=False)
+    created_before = serializers.DateTimeField(required=False)
+    starts_after = serializers.DateTimeField(required=False)
+    starts_before = serializers.DateTimeField(required=False)
+    search = serializers.CharField(required=False)
+
+    def filter_queryset(self, queryset):
+        filters = self.validated_data
+        for field in ('status', 'category', 'location'):
+            if field in filters:
+                queryset = queryset.filter(**{field: filters[field]})
+        if 'created_after' in filters:
+            queryset = queryset.filter(created_at__gte=filters['created_after'])
+        if 'created_before' in filters:
+            queryset = queryset.filter(created_at__lt=filters['created_before'])
+
+        if 'starts_after' in filters or 'starts_before' in filters:
+            sessions = EventSession.objects.filter(event=OuterRef('pk'))
+            if 'starts_after' in filters:
+                sessions = sessions.filter(start_time__gte=filters['starts_after'])
+            if 'starts_before' in filters:
+                sessions = sessions.filter(start_time__lt=filters['starts_before'])
+            queryset = queryset.filter(Exists(sessions))
+
+        if 'search' in filters:
+            queryset = queryset.alias(search_vector=EVENT_SEARCH_VECTOR).filter(
+                search_vector=SearchQuery(filters['search'], config=EVENT_SEARCH_CONFIG, search_type='websearch')
+            )
+        return queryset
+
+
+class EventWindowSerializer(serializers.Serializer):
+    start = serializers.DateTimeField()
+    end = serializers.DateTimeField()
+
+    def validate(self, data):
+        if data['end'] <= data['start']:
+            raise serializers.ValidationError(
+                "end must be greater than start"
+            )
+        return data
+
+    def filter_queryset(self, queryset):
+        window = DateTimeTZRange(self.validated_data['start'], self.validated_data['end'])
+        return queryset.alias(period=SESSION_PERIOD).filter(period__overlap=window)
+
+
+class EventRegistrationSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = EventRegistration
+        fields = ['event_registration_id', 'event', 'user', 'created_at']
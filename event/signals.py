@@ -0,0 +1,16 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .cache import invalidate_event
+from .models import Event, EventOrganizer, EventSession
+
+
+@receiver([post_save, post_delete], sender=Event)
+def event_changed(sender, instance, **kwargs):
+    invalidate_event(instance.pk)
+
+
+@receiver([post_save, post_delete], sender=EventSession)
+@receiver([post_save, post_delete], sender=EventOrganizer)
+def event_child_changed(sender, instance, **kwargs):
+    invalidate_event(instance.event_id)
@@ -1,3 +1,924 @@
-from django.test import TestCase
+import csv
+import io
+import json
+import os
+import tempfile
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from http.cookies import SimpleCookie
+from unittest import mock
 
-# Create your tests here.
+from asgiref.sync import iscoroutinefunction, sync_to_async
+from django.core.management import CommandError, call_command
+from django.db import DataError, IntegrityError, connection, connections, router, transaction
+from django.db.models import F
+from django.http import HttpResponse
+from django.test import RequestFactory, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+from rest_framework.test import APIClient, APIRequestFactory, APITestCase
+from rest_framework_simplejwt.tokens import AccessToken
+
+from auth.models import User
+from dico_event_be import routers
+from dico_event_be.metrics import MetricsMiddleware
+from . import rendering, views
+from .cache import LocMemLRUBackend
+from .deletion import delete_event, purge_deleted_events
+from .export import CSV_HEADER
+from .models import Event, EventSession, EventOrganizer, EventRegistration, EventSeatShard
+from .registrations import (
+    AlreadyRegistered, EventFullyBooked, cancel, rebalance_seat_shards, register, remaining_seats
+)
+from .rendering import event_rows, render_event_list
+from .serializers import EventFilterSerializer, EventWindowSerializer
+from .views import EventListCreateView
+
+
+class EventTestMixin:
+    def setUp(self):
+        self.user = User.objects.create(username='superuser', email='superuser@example.com', is_superuser=True)
+        self.client.force_authenticate(self.user)
+
+    def create_events(self, count):
+        start_time = timezone.now().replace(hour=9, minute=0, second=0, microsecond=0)
+        events = []
+        for i in range(count):
+            event = Event.objects.create(
+                name=f'Event {i}',
+                description='Description',
+                location='Jakarta',
+                status='open',
+                quota=100,
+                category='tech',
+            )
+            EventSession.objects.create(event=event, start_time=start_time, end_time=start_time + timedelta(hours=2))
+            EventOrganizer.objects.create(event=event, user=self.user)
+            events.append(event)
+        return events
+
+
+class EventReadQueryCountTests(EventTestMixin, APITestCase):
+    def test_list_query_count_does_not_grow_with_page_size(self):
+        self.create_events(10)
+
+        # The page, then the sessions of all its events.
+        with self.assertNumQueries(2):
+            response = self.client.get(reverse('event-list'), {'page_size': 3})
+        self.assertEqual(len(response.json()['events']), 3)
+
+        with self.assertNumQueries(2):
+            response = self.client.get(reverse('event-list'), {'page_size': 10})
+        self.assertEqual(len(response.json()['events']), 10)
+        self.assertIsNotNone(response.json()['events'][0]['start_time'])
+
+    def test_detail_query_count(self):
+        event = self.create_events(1)[0]
+
+        with self.assertNumQueries(2):
+            response = self.client.get(reverse('event-detail', kwargs={'pk': event.pk}))
+        self.assertEqual(response.status_code, 200)
+        self.assertIsNotNone(response.data['end_time'])
+
+
+class EventListFastPathTests(EventTestMixin, APITestCase):
+    def test_fast_path_matches_serializer_output(self):
+        session = EventSession.objects.get(event=self.create_events(4)[0])
+        EventSession.objects.create(
+            event_id=session.event_id, start_time=session.end_time, end_time=session.end_time + timedelta(hours=1)
+        )
+        Event.objects.create(
+            name='Konser "Musik" \u2028 \u2615',
+            description='Line\nbreak \\ \x07',
+            location='Bandung',
+            status='draft',
+            quota=0,
+            category='music',
+        )
+
+        for params in ({'page_size': 3}, {'page_size': 10}):
+            request = Request(APIRequestFactory().get(reverse('event-list'), params))
+            expected = JSONRenderer().render(EventListCreateView(request=request).list_events())
+            self.assertEqual(render_event_list(request), expected)
+            # Without orjson, the standard library renders the same bytes.
+            with mock.patch.object(rendering, 'orjson', None):
+                self.assertEqual(render_event_list(request), expected)
+
+    def test_dumps_matches_json_renderer_with_either_encoder(self):
+        data = {
+            'text': 'Konser "Musik" \u2028 \u2029 \u2615 \x07 \\ </script>', 'nested': [{'a': None, 'b': True}],
+            'number': -12, 'empty': [], 'float': 1.5,
+        }
+        expected = JSONRenderer().render(data)
+        self.assertIsNotNone(rendering.orjson)
+        self.assertEqual(rendering.dumps(data), expected)
+        with mock.patch.object(rendering, 'orjson', None):
+            self.assertEqual(rendering.dumps(data), expected)
+
+
+@override_settings(EVENT_CACHE={'TIMEOUT': 60})
+class EventResponseCacheTests(EventTestMixin, APITestCase):
+    def setUp(self):
+        super().setUp()
+        self.event = self.create_events(2)[0]
+        self.list_url = reverse('event-list')
+        self.detail_url = reverse('event-detail', kwargs={'pk': self.event.pk})
+
+    def assertCached(self, url, response, params=None):
+        with self.assertNumQueries(0):
+            cached = self.client.get(url, params)
+        self.assertEqual((cached.content, cached['ETag']), (response.content, response['ETag']))
+
+    def test_responses_are_served_from_the_cache(self):
+        for url in (self.list_url, self.detail_url):
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            self.assertCached(url, response)
+
+        # Query strings are cached separately, in any order.
+        response = self.client.get(self.list_url, {'status': 'open', 'category': 'tech'})
+        self.assertEqual(len(response.json()['events']), 2)
+        self.assertCached(self.list_url, response, {'category': 'tech', 'status': 'open'})
+        self.assertEqual(self.client.get(self.list_url, {'status': 'closed'}).json()['events'], [])
+
+        # The browsable API is rendered afresh.
+        with self.assertNumQueries(2):
+            self.client.get(self.list_url, HTTP_ACCEPT='text/html')
+
+    def test_if_none_match_is_answered_with_304(self):
+        for url in (self.list_url, self.detail_url):
+            etag = self.client.get(url)['ETag']
+            with self.assertNumQueries(0):
+                response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+            self.assertEqual((response.status_code, response.content, response['ETag']), (304, b'', etag))
+            self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH='"other"').status_code, 200)
+            self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH='*').status_code, 304)
+
+    def test_writes_invalidate_the_event_and_every_list(self):
+        other_url = reverse('event-detail', kwargs={'pk': Event.objects.exclude(pk=self.event.pk).get().pk})
+        other = self.client.get(other_url)
+        self.client.get(self.list_url)
+        self.client.get(self.detail_url)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.patch(self.detail_url, {'name': 'Renamed'})
+        self.assertEqual(self.client.get(self.detail_url).json()['name'], 'Renamed')
+        self.assertIn('Renamed', [event['name'] for event in self.client.get(self.list_url).json()['events']])
+        # Other events keep their cached detail.
+        self.assertCached(other_url, other)
+
+        # Nothing is dropped before the write commits.
+        response = self.client.get(self.detail_url)
+        with self.captureOnCommitCallbacks() as callbacks:
+            self.client.patch(self.detail_url, {'name': 'Renamed again'})
+        self.assertCached(self.detail_url, response)
+        for callback in callbacks:
+            callback()
+        self.assertEqual(self.client.get(self.detail_url).json()['name'], 'Renamed again')
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.delete(self.detail_url)
+        self.assertEqual(self.client.get(self.detail_url).status_code, 404)
+        self.assertEqual(len(self.client.get(self.list_url).json()['events']), 1)
+
+    def test_bulk_import_invalidates_every_list(self):
+        self.client.get(self.list_url)
+        detail = self.client.get(self.detail_url)
+        start_time = timezone.now().replace(hour=9, minute=0, second=0, microsecond=0)
+        row = {
+            'name': 'Imported', 'description': 'Description', 'location': 'Jakarta', 'status': 'open',
+            'category': 'tech', 'quota': 10, 'organizer_id': str(self.user.pk),
+            'start_time': start_time.isoformat(), 'end_time': (start_time + timedelta(hours=1)).isoformat(),
+        }
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertEqual(self.client.post(reverse('event-bulk'), [row], format='json').status_code, 201)
+        self.assertEqual(len(self.client.get(self.list_url).json()['events']), 3)
+        self.assertCached(self.detail_url, detail)
+
+
+class LocMemLRUBackendTests(TestCase):
+    def test_evicts_the_least_recently_used_entry(self):
+        backend = LocMemLRUBackend(max_entries=2)
+        backend.set('a', 1)
+        backend.set('b', 2)
+        backend.get('a')
+        backend.set('c', 3)
+        self.assertEqual((backend.get('a'), backend.get('b'), backend.get('c')), (1, None, 3))
+
+    def test_entries_expire(self):
+        backend = LocMemLRUBackend()
+        with mock.patch('event.cache.time.monotonic', return_value=100):
+            backend.set('a', 1, timeout=10)
+            backend.set('b', 2)
+        with mock.patch('event.cache.time.monotonic', return_value=110):
+            self.assertEqual((backend.get('a'), backend.get('b')), (None, 2))
+
+
+class EventPartialUpdateTests(EventTestMixin, APITestCase):
+    def setUp(self):
+        super().setUp()
+        self.event = self.create_events(1)[0]
+        self.url = reverse('event-detail', kwargs={'pk': self.event.pk})
+
+    def test_patch_writes_only_the_sent_fields(self):
+        # SAVEPOINT, UPDATE, RELEASE SAVEPOINT, then the event and its sessions.
+        with self.assertNumQueries(5):
+            response = self.client.patch(self.url, {'name': 'Renamed'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['name'], 'Renamed')
+        self.assertEqual(response.data['location'], 'Jakarta')
+        self.assertIsNotNone(response.data['start_time'])
+
+        self.event.refresh_from_db()
+        self.assertEqual(self.event.name, 'Renamed')
+        self.assertEqual(response['ETag'], f'"{self.event.updated_at.isoformat()}"')
+
+    def test_if_match_rejects_stale_versions(self):
+        etag = self.client.get(self.url)['ETag']
+        self.assertEqual(self.client.patch(self.url, {'quota': 50}, HTTP_IF_MATCH=etag).status_code, 200)
+
+        response = self.client.patch(self.url, {'quota': 60}, HTTP_IF_MATCH=etag)
+        self.assertEqual(response.status_code, 412)
+        self.event.refresh_from_db()
+        self.assertEqual(self.event.quota, 50)
+        self.assertEqual(remaining_seats(self.event), 50)
+
+        etag = self.client.get(self.url)['ETag']
+        self.assertEqual(self.client.patch(self.url, {'quota': 60}, HTTP_IF_MATCH=etag).status_code, 200)
+        self.assertEqual(self.client.patch(self.url, {'quota': 70}, HTTP_IF_MATCH='*').status_code, 200)
+        self.assertEqual(
+            self.client.patch(reverse('event-detail', kwargs={'pk': self.user.pk}), {'quota': 1}).status_code, 404
+        )
+
+    def test_patch_of_an_event_deleted_before_the_read_back_is_not_found(self):
+        patch_event = views.patch_event
+
+        def deleted_after_update(pk, *args, **kwargs):
+            updated_at = patch_event(pk, *args, **kwargs)
+            delete_event(pk)
+            return updated_at
+
+        with mock.patch.object(views, 'patch_event', deleted_after_update):
+            self.assertEqual(self.client.patch(self.url, {'name': 'Renamed'}).status_code, 404)
+
+    def test_patch_session_and_organizer(self):
+        organizer = User.objects.create(username='organizer', email='organizer@example.com')
+        session = EventSession.objects.get(event=self.event)
+
+        response = self.client.patch(self.url, {'end_time': session.start_time - timedelta(hours=1)})
+        self.assertEqual(response.status_code, 400)
+
+        end_time = session.end_time + timedelta(hours=1)
+        response = self.client.patch(self.url, {'end_time': end_time, 'organizer_id': organizer.pk})
+        self.assertEqual(response.status_code, 200)
+        session.refresh_from_db()
+        self.assertEqual(session.end_time, end_time)
+        self.assertEqual(list(EventOrganizer.objects.filter(event=self.event).values_list('user', flat=True)), [organizer.pk])
+
+        self.assertEqual(self.client.patch(self.url, {'organizer_id': organizer.pk}).status_code, 200)
+        self.assertEqual(EventOrganizer.objects.filter(event=self.event).count(), 1)
+
+    def test_only_the_session_constraint_is_reported_as_a_date_error(self):
+        session = EventSession.objects.get(event=self.event)
+        response = self.client.patch(self.url, {'end_time': session.start_time + timedelta(days=1)})
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('same day', response.json()[0])
+
+        def next_day(event_id, *args):
+            EventSession.objects.filter(event_id=event_id).update(end_time=F('start_time') + timedelta(days=1))
+
+        with mock.patch('event.updates.write_first_session', next_day):
+            response = self.client.patch(self.url, {'end_time': session.end_time})
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('same day', response.json()[0])
+
+        with mock.patch('event.updates.replace_organizer', side_effect=IntegrityError('organizer is gone')):
+            with self.assertRaisesMessage(IntegrityError, 'organizer is gone'):
+                self.client.patch(self.url, {'organizer_id': self.user.pk})
+
+
+class EventSessionsTests(EventTestMixin, APITestCase):
+    def event_body(self, sessions):
+        return {
+            'name': 'Conference',
+            'description': 'Description',
+            'location': 'Jakarta',
+            'status': 'open',
+            'category': 'tech',
+            'quota': 100,
+            'organizer_id': str(self.user.pk),
+            'sessions': sessions,
+        }
+
+    def session(self, hour, event_session_id=None):
+        start_time = timezone.now().replace(hour=hour, minute=0, second=0, microsecond=0)
+        session = {'start_time': start_time.isoformat(), 'end_time': (start_time + timedelta(minutes=45)).isoformat()}
+        if event_session_id:
+            session['event_session_id'] = event_session_id
+        return session
+
+    def test_create_and_diff_sessions(self):
+        response = self.client.post(
+            reverse('event-list'), self.event_body([self.session(hour) for hour in (13, 9, 11)]), format='json'
+        )
+        self.assertEqual(response.status_code, 201)
+        sessions = response.json()['sessions']
+        self.assertEqual([session['start_time'][11:13] for session in sessions], ['09', '11', '13'])
+        self.assertEqual(response.json()['start_time'], sessions[0]['start_time'])
+
+        url = reverse('event-detail', kwargs={'pk': response.json()['id']})
+        kept, moved, dropped = (session['event_session_id'] for session in sessions)
+        body = self.event_body([self.session(9, kept), self.session(15, moved), self.session(8)])
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(self.client.put(url, body, format='json').status_code, 200)
+        writes = [
+            query['sql'].split()[0] for query in queries.captured_queries
+            if '"event_sessions"' in query['sql'] and not query['sql'].startswith('SELECT')
+        ]
+        self.assertEqual(sorted(writes), ['DELETE', 'INSERT', 'UPDATE'])
+
+        sessions = self.client.get(url).json()['sessions']
+        self.assertEqual([session['start_time'][11:13] for session in sessions], ['08', '09', '15'])
+        self.assertEqual([session['event_session_id'] for session in sessions][1:], [kept, moved])
+        self.assertFalse(EventSession.objects.filter(pk=dropped).exists())
+
+        response = self.client.patch(url, {'sessions': [self.session(10, kept)]}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([session['event_session_id'] for session in response.json()['sessions']], [kept])
+
+    def test_invalid_sessions_are_rejected(self):
+        event = self.create_events(1)[0]
+        session_id = str(EventSession.objects.get(event=event).pk)
+        url = reverse('event-detail', kwargs={'pk': event.pk})
+
+        for sessions in (
+            [],
+            [self.session(9, session_id), self.session(10, session_id)],
+            [self.session(9, str(uuid.uuid4()))],
+            [{**self.session(9), 'end_time': self.session(8)['end_time']}],
+        ):
+            response = self.client.patch(url, {'sessions': sessions}, format='json')
+            self.assertEqual(response.status_code, 400, sessions)
+        self.assertEqual(
+            list(EventSession.objects.filter(event=event).values_list('pk', flat=True)), [uuid.UUID(session_id)]
+        )
+
+
+class EventFilterTests(EventTestMixin, APITestCase):
+    def test_filters_and_search(self):
+        events = self.create_events(3)
+        Event.objects.filter(pk=events[0].pk).update(status='closed', name='Python conference')
+        EventSession.objects.filter(event=events[1]).update(
+            start_time=timezone.now() + timedelta(days=30),
+            end_time=timezone.now() + timedelta(days=30, minutes=1)
+        )
+
+        def ids(params):
+            response = self.client.get(reverse('event-list'), params)
+            self.assertEqual(response.status_code, 200)
+            return {event['id'] for event in response.json()['events']}
+
+        self.assertEqual(ids({'status': 'closed'}), {str(events[0].pk)})
+        self.assertEqual(ids({'search': 'conferences'}), {str(events[0].pk)})
+        self.assertEqual(ids({'starts_after': (timezone.now() + timedelta(days=7)).isoformat()}), {str(events[1].pk)})
+        self.assertEqual(ids({'location': 'Jakarta', 'category': 'tech'}), {str(event.pk) for event in events})
+        self.assertEqual(self.client.get(reverse('event-list'), {'starts_after': 'soon'}).status_code, 400)
+
+
+class EventIndexUsageTests(TestCase):
+    def explain(self, params):
+        filters = EventFilterSerializer(data=params)
+        filters.is_valid(raise_exception=True)
+        queryset = event_rows(filters.filter_queryset(Event.objects.all())).order_by('-created_at', '-id')[:11]
+        with connection.cursor() as cursor:
+            # The test tables are tiny, so a sequential scan would always win otherwise.
+            cursor.execute('SET LOCAL enable_seqscan = off')
+        return queryset.explain()
+
+    def test_status_filter_uses_composite_index(self):
+        self.assertIn('idx_events_status_created_at', self.explain({'status': 'open'}))
+
+    def test_category_filter_uses_composite_index(self):
+        self.assertIn('idx_events_category_created_at', self.explain({'category': 'tech'}))
+
+    def test_location_filter_uses_composite_index(self):
+        self.assertIn('idx_events_location_created_at', self.explain({'location': 'Jakarta'}))
+
+    def test_search_uses_gin_index(self):
+        # With every index partial, an empty table makes the created_at index look as cheap.
+        Event.objects.bulk_create([
+            Event(name=f'Event {i}', description='Description', location='Jakarta', status='open', quota=1)
+            for i in range(2000)
+        ])
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE events')
+        self.assertIn('idx_events_search', self.explain({'search': 'python'}))
+
+    def test_window_uses_period_gist_index(self):
+        window = EventWindowSerializer(data={'start': '2026-01-01T00:00:00Z', 'end': '2026-01-02T00:00:00Z'})
+        window.is_valid(raise_exception=True)
+        with connection.cursor() as cursor:
+            cursor.execute('SET LOCAL enable_seqscan = off')
+        plan = window.filter_queryset(EventSession.objects.all()).order_by('start_time')[:11].explain()
+        self.assertIn('idx_event_sessions_period', plan)
+
+    def test_session_range_uses_session_index(self):
+        plan = self.explain({'starts_after': '2026-01-01T00:00:00Z', 'starts_before': '2026-02-01T00:00:00Z'})
+        self.assertIn('idx_event_sessions_event_start', plan)
+
+
+class EventDeletionTests(EventTestMixin, APITestCase):
+    def add_sessions(self, event, count):
+        session = EventSession.objects.get(event=event)
+        EventSession.objects.bulk_create([
+            EventSession(event=event, start_time=session.start_time, end_time=session.end_time) for _ in range(count)
+        ])
+
+    def test_delete_hides_the_event_with_one_update(self):
+        deleted, kept = self.create_events(2)
+        self.add_sessions(deleted, 50)
+        register(deleted, self.user.pk)
+        url = reverse('event-detail', kwargs={'pk': deleted.pk})
+
+        with self.assertNumQueries(1):
+            self.assertEqual(self.client.delete(url).status_code, 204)
+        self.assertEqual(self.client.delete(url).status_code, 404)
+        self.assertEqual(EventSession.objects.filter(event=deleted).count(), 51)
+
+        self.assertEqual(self.client.get(url).status_code, 404)
+        self.assertEqual(self.client.patch(url, {'name': 'Renamed'}).status_code, 404)
+        registrations = reverse('event-registrations', kwargs={'pk': deleted.pk})
+        self.assertEqual(self.client.get(registrations).status_code, 404)
+        events = self.client.get(reverse('event-list')).json()['events']
+        self.assertEqual([event['id'] for event in events], [str(kept.pk)])
+
+        session = EventSession.objects.filter(event=kept).first()
+        window = self.client.get(reverse('event-window'), {
+            'start': session.start_time.isoformat(), 'end': session.end_time.isoformat()
+        }).json()['events']
+        self.assertEqual({event['id'] for event in window}, {str(kept.pk)})
+
+    def test_purge_relies_on_cascading_foreign_keys(self):
+        old, recent, kept = self.create_events(3)
+        self.add_sessions(old, 5)
+        register(old, self.user.pk)
+        Event.objects.filter(pk=old.pk).update(deleted_at=timezone.now() - timedelta(days=30))
+        self.client.delete(reverse('event-detail', kwargs={'pk': recent.pk}))
+
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(purge_deleted_events(batch_size=1), 1)
+        # Only DELETE statements on events; Postgres removes the dependent rows.
+        statements = {query['sql'][:20] for query in queries.captured_queries if 'SAVEPOINT' not in query['sql']}
+        self.assertEqual(statements, {'DELETE FROM "events"'})
+        self.assertEqual(
+            list(Event.all_objects.values_list('pk', flat=True).order_by('created_at')), [recent.pk, kept.pk]
+        )
+        self.assertFalse(EventSession.objects.filter(event=old.pk).exists())
+        self.assertFalse(EventOrganizer.objects.filter(event=old.pk).exists())
+        self.assertFalse(EventRegistration.objects.filter(event=old.pk).exists())
+        self.assertFalse(EventSeatShard.objects.filter(event=old.pk).exists())
+
+        self.assertEqual(purge_deleted_events(before=timezone.now()), 1)
+        self.assertEqual(list(Event.all_objects.values_list('pk', flat=True)), [kept.pk])
+
+
+class EventBulkCreateTests(EventTestMixin, APITestCase):
+    def setUp(self):
+        super().setUp()
+        self.url = reverse('event-bulk')
+
+    def row(self, name, **fields):
+        start_time = timezone.now().replace(hour=9, minute=0, second=0, microsecond=0)
+        return {
+            'name': name, 'description': 'Description', 'location': 'Jakarta', 'status': 'open',
+            'category': 'tech', 'quota': 10, 'organizer_id': str(self.user.pk),
+            'start_time': start_time.isoformat(), 'end_time': (start_time + timedelta(hours=1)).isoformat(),
+            **fields,
+        }
+
+    def test_invalid_rows_fail_on_their_own(self):
+        rows = [
+            self.row('Valid'), self.row('No quota', quota=None), self.row('Unknown', organizer_id=str(uuid.uuid4()))
+        ]
+        response = self.client.post(self.url, rows, format='json')
+        self.assertEqual(response.status_code, 207)
+        self.assertEqual(response.data['created'], [str(Event.objects.get(name='Valid').pk)])
+        self.assertEqual(response.data['errors'], [
+            {'index': 1, 'errors': {'quota': ['This field may not be null.']}},
+            {'index': 2, 'errors': {'organizer_id': ['Object does not exist.']}},
+        ])
+        self.assertTrue(EventOrganizer.objects.filter(event__name='Valid', user=self.user).exists())
+        self.assertEqual(EventSession.objects.filter(event__name='Valid').count(), 1)
+
+        self.assertEqual(self.client.post(self.url, rows[1:], format='json').status_code, 400)
+        self.assertEqual(self.client.post(self.url, rows[:1], format='json').status_code, 201)
+        self.assertEqual(self.client.post(self.url, rows[0], format='json').status_code, 400)
+
+    def test_rows_the_database_rejects_fail_on_their_own(self):
+        bulk_create = EventOrganizer.objects.bulk_create
+
+        def rejects(organizers):
+            if any(organizer.event.name == 'Rejected' for organizer in organizers):
+                raise DataError('rejected')
+            return bulk_create(organizers)
+
+        rows = [self.row('First'), self.row('Rejected'), self.row('Last')]
+        with mock.patch.object(EventOrganizer.objects, 'bulk_create', rejects):
+            response = self.client.post(self.url, rows, format='json')
+        self.assertEqual(response.status_code, 207)
+        self.assertEqual(response.data['errors'], [
+            {'index': 1, 'errors': {'non_field_errors': ['Row could not be saved.']}}
+        ])
+        self.assertEqual(sorted(Event.objects.values_list('name', flat=True)), ['First', 'Last'])
+        self.assertEqual(len(response.data['created']), 2)
+
+    def test_ndjson(self):
+        lines = [json.dumps(self.row('First')), '{"name": ', '', json.dumps(self.row('Second'))]
+        response = self.client.post(self.url, '\n'.join(lines).encode(), content_type='application/x-ndjson')
+        self.assertEqual(response.status_code, 207)
+        self.assertEqual(len(response.data['created']), 2)
+        self.assertEqual([error['index'] for error in response.data['errors']], [1])
+
+        body = json.dumps(self.row('Third')).encode() + b'\n\xff\xfe\n'
+        response = self.client.post(self.url, body, content_type='application/x-ndjson')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data, {'detail': 'Line 2 is not valid utf-8.'})
+
+
+class EventExportTests(EventTestMixin, APITestCase):
+    def setUp(self):
+        super().setUp()
+        self.open_event, self.closed_event = self.create_events(2)
+        Event.objects.filter(pk=self.closed_event.pk).update(status='closed')
+        self.closed_event.refresh_from_db()
+        session = EventSession.objects.get(event=self.open_event)
+        self.late_session = EventSession.objects.create(
+            event=self.open_event, start_time=session.start_time + timedelta(hours=3),
+            end_time=session.end_time + timedelta(hours=3)
+        )
+        self.organizer = User.objects.create(username='organizer', email='organizer@example.com')
+        EventOrganizer.objects.create(event=self.open_event, user=self.organizer)
+        self.no_sessions = Event.objects.create(
+            name='No sessions', description='Description', location='Bandung', status='draft', quota=5, category='art'
+        )
+
+    def export(self, **params):
+        # Nothing is read until the body is iterated.
+        with self.assertNumQueries(0):
+            response = self.client.get(reverse('event-export'), params)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        return response, b''.join(response.streaming_content)
+
+    def test_ndjson_export(self):
+        response, body = self.export()
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson')
+        self.assertEqual(response['Content-Disposition'], 'attachment; filename="events.ndjson"')
+
+        events = [json.loads(line) for line in body.decode().splitlines()]
+        self.assertEqual(
+            [event['id'] for event in events],
+            [str(self.open_event.pk), str(self.closed_event.pk), str(self.no_sessions.pk)]
+        )
+        first = events[0]
+        self.assertEqual(
+            (first['name'], first['status'], first['category'], first['location'], first['quota']),
+            ('Event 0', 'open', 'tech', 'Jakarta', 100)
+        )
+        self.assertEqual(first['updated_at'], self.open_event.updated_at.isoformat().replace('+00:00', 'Z'))
+        self.assertEqual(len(first['sessions']), 2)
+        self.assertEqual(first['sessions'][1]['event_session_id'], str(self.late_session.pk))
+        self.assertEqual(
+            [organizer['user_id'] for organizer in first['organizers']], [str(self.user.pk), str(self.organizer.pk)]
+        )
+        self.assertEqual(events[2]['sessions'], [])
+
+        _, body = self.export(status='closed')
+        self.assertEqual([json.loads(line)['id'] for line in body.decode().splitlines()], [str(self.closed_event.pk)])
+
+    def test_csv_export(self):
+        response, body = self.export(output='csv')
+        self.assertEqual(response['Content-Type'], 'text/csv')
+        self.assertEqual(response['Content-Disposition'], 'attachment; filename="events.csv"')
+
+        header, *rows = list(csv.reader(io.StringIO(body.decode())))
+        first_session = EventSession.objects.filter(event=self.open_event).earliest('start_time')
+        self.assertEqual(header, CSV_HEADER)
+        # One row per session; an event without sessions still gets one.
+        self.assertEqual(
+            [(row[0], row[10]) for row in rows],
+            [
+                (str(self.open_event.pk), str(first_session.pk)),
+                (str(self.open_event.pk), str(self.late_session.pk)),
+                (str(self.closed_event.pk), str(EventSession.objects.get(event=self.closed_event).pk)),
+                (str(self.no_sessions.pk), ''),
+            ]
+        )
+        self.assertEqual(rows[0][9], f'{self.user.pk};{self.organizer.pk}')
+        self.assertEqual(rows[3][1:7], ['No sessions', 'draft', 'art', 'Description', 'Bandung', '5'])
+        self.assertEqual(rows[3][10:], ['', '', ''])
+
+        _, body = self.export(output='csv', category='art', location='Bandung')
+        self.assertEqual([row[0] for row in csv.reader(io.StringIO(body.decode()))][1:], [str(self.no_sessions.pk)])
+
+    def test_invalid_requests(self):
+        response = self.client.get(reverse('event-export'), {'output': 'xml'})
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json(), {'output': ['Must be one of: ndjson, csv.']})
+        self.assertEqual(self.client.get(reverse('event-export'), {'created_after': 'soon'}).status_code, 400)
+
+        self.client.force_authenticate(self.organizer)
+        self.assertEqual(self.client.get(reverse('event-export')).status_code, 403)
+
+    def test_export_events_command(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'events.csv')
+            call_command('export_events', output='csv', file=path, status='closed')
+            with open(path, newline='') as stream:
+                rows = list(csv.reader(stream))
+        self.assertEqual(rows[0], CSV_HEADER)
+        self.assertEqual([row[0] for row in rows[1:]], [str(self.closed_event.pk)])
+
+        stdout = io.TextIOWrapper(io.BytesIO())
+        with mock.patch('sys.stdout', stdout):
+            call_command('export_events', category='tech')
+        _, body = self.export(category='tech')
+        self.assertEqual(stdout.buffer.getvalue(), body)
+        self.assertEqual(len(body.splitlines()), 2)
+
+        with self.assertRaises(CommandError):
+            call_command('export_events', created_before='soon')
+
+
+class EventRegistrationConcurrencyTests(TransactionTestCase):
+    def test_concurrent_registrations_never_oversell(self):
+        event = Event.objects.create(
+            name='Popular event', description='Description', location='Jakarta', status='open', quota=10, category='tech'
+        )
+        users = [User.objects.create(username=f'attendee{i}', email=f'attendee{i}@example.com') for i in range(40)]
+
+        def attempt(user):
+            try:
+                register(event, user.pk)
+                return 'registered'
+            except EventFullyBooked:
+                return 'full'
+            finally:
+                connections.close_all()
+
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            results = list(executor.map(attempt, users))
+
+        self.assertEqual(results.count('registered'), 10)
+        self.assertEqual(EventRegistration.objects.filter(event=event).count(), 10)
+        self.assertEqual(sum(EventSeatShard.objects.filter(event=event).values_list('remaining', flat=True)), 0)
+
+        event.quota = 11
+        event.save()
+        rebalance_seat_shards(event)
+        with self.assertRaises(AlreadyRegistered):
+            register(event, users[results.index('registered')].pk)
+        self.assertEqual(sum(EventSeatShard.objects.filter(event=event).values_list('remaining', flat=True)), 1)
+
+    def test_cancelling_after_a_quota_cut_frees_no_seat(self):
+        event = Event.objects.create(
+            name='Shrinking event', description='Description', location='Jakarta', status='open', quota=5, category='tech'
+        )
+        users = [User.objects.create(username=f'attendee{i}', email=f'attendee{i}@example.com') for i in range(6)]
+        for user in users[:5]:
+            register(event, user.pk)
+
+        event.quota = 3
+        event.save()
+        rebalance_seat_shards(event)
+        self.assertTrue(cancel(event, users[0].pk))
+        self.assertEqual(remaining_seats(event), 0)
+        with self.assertRaises(EventFullyBooked):
+            register(event, users[5].pk)
+
+        cancel(event, users[1].pk)
+        self.assertTrue(cancel(event, users[2].pk))
+        self.assertEqual(remaining_seats(event), 1)
+        register(event, users[5].pk)
+        self.assertEqual(EventRegistration.objects.filter(event=event).count(), 3)
+
+
+class ReplicaRoutingTests(TransactionTestCase):
+    def setUp(self):
+        routers._lag_checks.clear()
+        self.router = routers.ReplicaRouter(replicas=['replica_1'])
+        self.factory = RequestFactory()
+
+    def test_reads_fall_back_to_primary_when_replica_lags(self):
+        with mock.patch.object(routers, 'replica_lag', return_value=0.5):
+            self.assertEqual(self.router.db_for_read(Event), 'replica_1')
+        routers._lag_checks.clear()
+        with mock.patch.object(routers, 'replica_lag', return_value=60):
+            self.assertEqual(self.router.db_for_read(Event), 'default')
+        routers._lag_checks.clear()
+        with mock.patch.object(routers, 'replica_lag', return_value=None):
+            self.assertEqual(self.router.db_for_read(Event), 'default')
+        self.assertEqual(self.router.db_for_write(Event), 'default')
+
+    def test_transactions_and_row_locks_use_the_primary(self):
+        event = Event.objects.create(
+            name='Event', description='Description', location='Jakarta', status='open', quota=10, category='tech'
+        )
+        attendee = User.objects.create(username='attendee', email='attendee@example.com')
+        register(event, attendee.pk)
+        # 'replica_1' is not a configured database, so any read routed to it fails.
+        replicas = mock.patch.object(router.routers[0], 'replicas', ['replica_1'])
+        with replicas, mock.patch.object(routers, 'replica_lag', return_value=0):
+            self.assertEqual(Event.objects.all().db, 'replica_1')
+            self.assertEqual(Event.objects.select_for_update().db, 'default')
+            with transaction.atomic():
+                self.assertEqual(Event.objects.all().db, 'default')
+            rebalance_seat_shards(event)
+            self.assertTrue(cancel(event, attendee.pk))
+            with routers.primary():
+                self.assertEqual(Event.objects.all().db, 'default')
+                self.assertEqual(remaining_seats(event), 10)
+        self.assertFalse(routers.is_pinned())
+
+    def test_primary_reports_no_lag(self):
+        self.assertEqual(routers.replica_lag('default'), 0)
+
+    def test_client_reads_its_writes_from_primary(self):
+        routed = []
+
+        def get_response(request):
+            routed.append(self.router.db_for_read(Event))
+            return HttpResponse(status=201 if request.method == 'POST' else 200)
+
+        middleware = routers.ReplicaPinningMiddleware(get_response)
+        with mock.patch.object(routers, 'replica_lag', return_value=0):
+            middleware(self.factory.get('/api/events/'))
+            response = middleware(self.factory.post('/api/events/'))
+            self.factory.cookies = response.cookies
+            middleware(self.factory.get('/api/events/'))
+            self.factory.cookies = SimpleCookie()
+            middleware(self.factory.get('/api/events/', HTTP_X_PRIMARY_UNTIL=response[routers.PIN_HEADER]))
+            middleware(self.factory.get('/api/events/', HTTP_X_PRIMARY_UNTIL='1'))
+
+        self.assertEqual(routed, ['replica_1', 'default', 'default', 'default', 'replica_1'])
+        self.assertFalse(routers.is_pinned())
+
+    def test_clients_cannot_pin_themselves(self):
+        routed = []
+
+        def get_response(request):
+            routed.append(self.router.db_for_read(Event))
+            return HttpResponse()
+
+        middleware = routers.ReplicaPinningMiddleware(get_response)
+        forever = str(int(time.time()) + 365 * 24 * 3600)
+        with mock.patch.object(routers, 'replica_lag', return_value=0):
+            middleware(self.factory.get('/api/events/', HTTP_X_PRIMARY_UNTIL=forever))
+            self.factory.cookies[routers.PIN_COOKIE] = forever
+            middleware(self.factory.get('/api/events/'))
+        self.assertEqual(routed, ['replica_1', 'replica_1'])
+        self.factory.cookies = SimpleCookie()
+
+    async def test_async_requests_stay_async(self):
+        routed = []
+
+        async def get_response(request):
+            routed.append(self.router.db_for_read(Event))
+            return HttpResponse(status=201 if request.method == 'POST' else 200)
+
+        middleware = routers.ReplicaPinningMiddleware(get_response)
+        self.assertTrue(iscoroutinefunction(middleware))
+        with mock.patch.object(routers, 'replica_lag', return_value=0):
+            await middleware(self.factory.get('/api/events/'))
+            response = await middleware(self.factory.post('/api/events/'))
+            await middleware(self.factory.get('/api/events/', HTTP_X_PRIMARY_UNTIL=response[routers.PIN_HEADER]))
+        self.assertEqual(routed, ['replica_1', 'default', 'default'])
+        self.assertFalse(routers.is_pinned())
+
+
+class MetricsTests(EventTestMixin, APITestCase):
+    @override_settings(METRICS_ENABLED=True, METRICS_TOKEN='scrape')
+    def test_event_list_metrics(self):
+        self.create_events(3)
+        client = APIClient()
+        client.force_authenticate(self.user)
+        self.assertEqual(client.get(reverse('event-list')).status_code, 200)
+
+        self.assertEqual(client.get(reverse('metrics')).status_code, 401)
+        response = client.get(reverse('metrics'), HTTP_AUTHORIZATION='Bearer scrape')
+        body = response.content.decode()
+        labels = '{method="GET",route="api/events/"'
+        self.assertIn('http_requests_total{method="GET",route="api/events/",status="200"} ', body)
+        self.assertIn(f'http_request_db_queries_bucket{labels},le="1"}} ', body)
+        self.assertIn(f'http_request_duration_seconds_count{labels}}} ', body)
+        self.assertIn(f'http_response_size_bytes_count{labels}}} ', body)
+
+    def test_metrics_disabled(self):
+        self.assertEqual(self.client.get(reverse('metrics')).status_code, 404)
+
+
+
+@override_settings(METRICS_ENABLED=True, METRICS_TOKEN='')
+class AsyncMetricsTests(TransactionTestCase):
+    async def test_async_requests_are_measured_without_a_thread(self):
+        get_response = mock.AsyncMock(return_value=HttpResponse())
+        self.assertTrue(iscoroutinefunction(MetricsMiddleware(get_response)))
+
+        user = await User.objects.acreate(username='member', email='member@example.com')
+        # As under ASGI, the request opens its own connection.
+        await sync_to_async(connections.close_all)()
+        response = await self.async_client.get(
+            reverse('async-event-list'), headers={'Authorization': f'Bearer {AccessToken.for_user(user)}'}
+        )
+        self.assertEqual(response.status_code, 200)
+        body = (await self.async_client.get(reverse('metrics'))).content.decode()
+        # The user and the page, run by the async ORM in sync_to_async threads.
+        self.assertIn('http_request_db_queries_sum{method="GET",route="api/async/events/"} 2', body)
+
+
+@override_settings(EVENT_CACHE={'TIMEOUT': 60})
+class AsyncEventViewTests(EventTestMixin, APITestCase):
+    def setUp(self):
+        super().setUp()
+        self.event = self.create_events(3)[0]
+        self.headers = {'Authorization': f'Bearer {AccessToken.for_user(self.user)}'}
+
+    def rename(self, name):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.patch(reverse('event-detail', kwargs={'pk': self.event.pk}), {'name': name})
+
+    async def get(self, name, data=None, headers=None, **kwargs):
+        sync_response = await sync_to_async(self.client.get)(reverse(name, kwargs=kwargs), data, headers=headers)
+        async_response = await self.async_client.get(
+            reverse(f'async-{name}', kwargs=kwargs), data, headers={**self.headers, **(headers or {})}
+        )
+        return sync_response, async_response
+
+    async def test_responses_match_the_sync_views(self):
+        for name, data, kwargs in (
+            ('event-list', {'category': 'tech'}, {}),
+            ('event-detail', None, {'pk': self.event.pk}),
+            ('event-detail', None, {'pk': self.user.pk}),
+        ):
+            sync_response, async_response = await self.get(name, data, **kwargs)
+            self.assertEqual(async_response.status_code, sync_response.status_code)
+            self.assertEqual(async_response.content, sync_response.content)
+            self.assertEqual(async_response.get('ETag'), sync_response.get('ETag'))
+
+        # Only the next link, which points back at the requested route, differs.
+        sync_response, async_response = await self.get('event-list', {'page_size': 2})
+        sync_page, async_page = sync_response.json(), async_response.json()
+        self.assertEqual(async_page['events'], sync_page['events'])
+        self.assertEqual(async_page['next'], sync_page['next'].replace('/api/events/', '/api/async/events/'))
+
+        response = await self.async_client.get(reverse('async-event-list'))
+        self.assertEqual(response.status_code, 401)
+        self.assertIn('WWW-Authenticate', response)
+
+    async def test_if_none_match_is_answered_with_304(self):
+        for name, kwargs in (('event-list', {}), ('event-detail', {'pk': self.event.pk})):
+            _, response = await self.get(name, **kwargs)
+            etag = response['ETag']
+
+            _, response = await self.get(name, headers={'If-None-Match': etag}, **kwargs)
+            self.assertEqual((response.status_code, response.content), (304, b''))
+
+            await sync_to_async(self.rename)(f'Renamed for {name}')
+            _, response = await self.get(name, headers={'If-None-Match': etag}, **kwargs)
+            self.assertEqual(response.status_code, 200)
+            self.assertNotEqual(response['ETag'], etag)
+
+
+class BenchmarkCommandTests(TransactionTestCase):
+    @override_settings(ALLOWED_HOSTS=['localhost'])
+    def test_bench_api_reports_every_scenario(self):
+        output = io.StringIO()
+        call_command(
+            'bench_api', users=5, events=5, requests=2, warmup=0, format='json', stdout=output
+        )
+        results = json.loads(output.getvalue())['results']
+        self.assertEqual(set(results), {
+            'login', 'event_list', 'event_detail', 'event_create', 'event_update', 'user_list', 'role_assign',
+        })
+        self.assertEqual(results['event_list']['requests'], 2)
+        self.assertFalse(User.objects.filter(username__startswith='bench-').exists())
+
+    def test_bench_uuid_inserts_drops_its_tables(self):
+        output = io.StringIO()
+        call_command('bench_uuid_inserts', events=50, batch_size=20, stdout=output)
+        self.assertIn('events pkey', output.getvalue())
+        self.assertNotIn('bench_uuid4_events', connection.introspection.table_names())
+
+
+class TimeOrderedKeyTests(TestCase):
+    def test_new_rows_get_increasing_uuid7_keys(self):
+        events = [Event.objects.create(name=f'Event {i}', location='Jakarta', status='open', quota=1) for i in range(20)]
+        self.assertTrue(all(event.pk.version == 7 for event in events))
+        self.assertEqual([event.pk for event in events], sorted(event.pk for event in events))
+        self.assertEqual(list(Event.objects.order_by('pk')), events)
@@ -0,0 +1,151 @@
+from datetime import datetime
+
+from django.db import IntegrityError, transaction
+from django.db.models import Subquery
+from django.http import Http404
+from django.utils import timezone
+from django.utils.cache import quote_etag
+from django.utils.http import parse_etags
+from rest_framework import serializers, status
+from rest_framework.exceptions import APIException
+
+from .cache import invalidate_event
+from .models import Event, EventOrganizer, EventSession
+from .registrations import rebalance_seat_shards
+
+EVENT_FIELDS = ('name', 'status', 'category', 'description', 'location', 'quota')
+
+SESSION_TIME_CONSTRAINT = 'chk_event_session_time'
+
+
+class PreconditionFailed(APIException):
+    status_code = status.HTTP_412_PRECONDITION_FAILED
+    default_detail = 'The event has changed since it was read.'
+    default_code = 'precondition_failed'
+
+
+def event_etag(updated_at):
+    """
+    The ETag of an event: its updated_at, which every write to it moves forward.
+    """
+    return quote_etag(updated_at.isoformat())
+
+
+def parse_if_match(header):
+    """
+    The updated_at values an If-Match header accepts, '*' for any, or None
+    when the header is absent. Tags that are not event versions match nothing.
+    """
+    if not header:
+        return None
+    etags = parse_etags(header)
+    if '*' in etags:
+        return '*'
+    versions = []
+    for etag in etags:
+        try:
+            versions.append(datetime.fromisoformat(etag.strip('"')))
+        except ValueError:
+            pass
+    return versions
+
+
+def patch_event(pk, data, if_match=None):
+    """
+    Applies a validated EventPatchSerializer payload in one transaction and
+    returns the new updated_at.
+
+    The event row is written with a single UPDATE of the given columns,
+    conditioned on its version when If-Match was sent, so a concurrent change
+    is detected without locking the row beforehand.
+    """
+    now = timezone.now()
+    fields = {name: data[name] for name in EVENT_FIELDS if name in data}
+
+    try:
+        with transaction.atomic():
+            events = Event.objects.filter(pk=pk)
+            if if_match is not None and if_match != '*':
+                events = events.filter(updated_at__in=if_match)
+            if not events.update(**fields, updated_at=now):
+                if Event.objects.filter(pk=pk).exists():
+                    raise PreconditionFailed()
+                raise Http404
+
+            if 'quota' in fields:
+                rebalance_seat_shards(Event(pk=pk, quota=fields['quota']))
+            if 'sessions' in data:
+                sync_sessions(pk, data['sessions'], now)
+            elif 'start_time' in data or 'end_time' in data:
+                write_first_session(pk, data.get('start_time'), data.get('end_time'), now)
+            if 'organizer_id' in data:
+                replace_organizer(pk, data['organizer_id'])
+    except IntegrityError as exc:
+        # The serializers check the same-day rule in the current time zone; the
+        # constraint compares dates in the database's, which can disagree.
+        if getattr(getattr(exc.__cause__, 'diag', None), 'constraint_name', None) != SESSION_TIME_CONSTRAINT:
+            raise
+        raise serializers.ValidationError('end_time must be on the same day as start_time')
+
+    invalidate_event(pk)
+    return now
+
+
+def write_first_session(event_id, start_time, end_time, now):
+    """
+    Moves the event's first session, creating it when the event has none.
+    """
+    sessions = EventSession.objects.filter(event_id=event_id).order_by('start_time', 'event_session_id')
+    if start_time and end_time:
+        first = EventSession.objects.filter(pk=Subquery(sessions.values('pk')[:1]))
+        if not first.update(start_time=start_time, end_time=end_time, updated_at=now):
+            EventSession.objects.create(event_id=event_id, start_time=start_time, end_time=end_time)
+        return
+
+    session = sessions.first()
+    if session is None:
+        raise serializers.ValidationError('start_time and end_time are required for an event without a session')
+    session.start_time = start_time or session.start_time
+    session.end_time = end_time or session.end_time
+    if session.end_time <= session.start_time:
+        raise serializers.ValidationError('end_time must be greater than start_time')
+    if timezone.localtime(session.end_time).date() != timezone.localtime(session.start_time).date():
+        raise serializers.ValidationError('end_time must be on the same day as start_time')
+    session.save(update_fields=['start_time', 'end_time', 'updated_at'])
+
+
+def sync_sessions(event_id, sessions, now):
+    """
+    Makes the event's sessions match the given list. Items with the id of an
+    existing session update it, items without one are inserted and sessions
+    left out are deleted, with one statement for each kind of change.
+    """
+    existing = EventSession.objects.filter(event_id=event_id).in_bulk()
+    unknown = [
+        str(item['event_session_id']) for item in sessions
+        if item.get('event_session_id') and item['event_session_id'] not in existing
+    ]
+    if unknown:
+        raise serializers.ValidationError({'sessions': [f'Unknown session {pk}.' for pk in unknown]})
+
+    created, changed = [], []
+    for item in sessions:
+        session = existing.pop(item.get('event_session_id'), None)
+        if session is None:
+            created.append(EventSession(event_id=event_id, start_time=item['start_time'], end_time=item['end_time']))
+        elif (session.start_time, session.end_time) != (item['start_time'], item['end_time']):
+            session.start_time, session.end_time, session.updated_at = item['start_time'], item['end_time'], now
+            changed.append(session)
+
+    if existing:
+        EventSession.objects.filter(pk__in=existing).delete()
+    if changed:
+        EventSession.objects.bulk_update(changed, ['start_time', 'end_time', 'updated_at'])
+    if created:
+        EventSession.objects.bulk_create(created)
+
+
+def replace_organizer(event_id, user):
+    EventOrganizer.objects.filter(event_id=event_id).exclude(user=user).delete()
+    # INSERT ... ON CONFLICT DO NOTHING keeps an existing row for this user.
+    EventOrganizer.objects.bulk_create([EventOrganizer(event_id=event_id, user=user)], ignore_conflicts=True)
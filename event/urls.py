@@ -4,4 +4,8 @@ from . import views
 urlpatterns = [
   path('events/', views.EventListCreateView.as_view(), name='event-list'),
   path('events/<uuid:pk>/', views.EventDetailView.as_view(), name='event-detail'),
+  path('events/<uuid:pk>/registrations/', views.EventRegistrationView.as_view(), name='event-registrations'),
+  path('events/window/', views.EventWindowView.as_view(), name='event-window'),
+  path('events/bulk/', views.EventBulkCreateView.as_view(), name='event-bulk'),
+  path('events/export/', views.EventExportView.as_view(), name='event-export'),
 ]
\ No newline at end of file
@@ -1,19 +1,33 @@
-from django.http import Http404
+from collections.abc import Iterator
+
+from django.http import Http404, StreamingHttpResponse
 from django.shortcuts import get_object_or_404
 from rest_framework import status
+from rest_framework.parsers import JSONParser
 from rest_framework.response import Response
 from rest_framework.permissions import  IsAuthenticated
 from rest_framework.views import APIView
-from rest_framework_simplejwt.authentication import JWTAuthentication
 
 from auth.permissions import IsAdminOrSuperUser
-from .models import Event
-from .serializers import EventWriteSerializer, EventReadSerializer
+from dico_event_be.pagination import KeysetPagination
+from jobs.queue import TooManyRows, enqueue_rows
+from jobs.serializers import JobSerializer
+from .bulk import bulk_create_events
+from .cache import cached_response
+from .deletion import delete_event
+from .export import EXPORT_FORMATS, export_queryset
+from .models import Event, EventSession
+from .parsers import NDJSONParser
+from .registrations import cancel, register, remaining_seats
+from .rendering import EventLinkBuilder, attach_sessions, event_item, event_rows, event_window_page, render_event_list
+from .serializers import (
+    EventWriteSerializer, EventPatchSerializer, EventReadSerializer, EventFilterSerializer, EventWindowSerializer,
+    EventRegistrationSerializer
+)
+from .updates import event_etag, parse_if_match, patch_event
 
 
 class EventListCreateView(APIView):
-    authentication_classes = [JWTAuthentication]
-
     def get_permissions(self):
         if self.request.method == 'POST':
             return [IsAdminOrSuperUser(), IsAuthenticated()]
@@ -21,9 +35,23 @@ class EventListCreateView(APIView):
         return [IsAuthenticated()]
 
     def get(self, request):
-        events = Event.objects.all().order_by('-created_at')[:10].prefetch_related('sessions')
-        serializer = EventReadSerializer(events, many=True, context={'request': request})
-        return Response({ 'events': serializer.data }, status=status.HTTP_200_OK)
+        filters = EventFilterSerializer(data=request.query_params)
+        filters.is_valid(raise_exception=True)
+        queryset = filters.filter_queryset(Event.objects.all())
+
+        return cached_response(
+            request,
+            lambda: self.list_events(queryset),
+            render_json=lambda: render_event_list(request, queryset)
+        )
+
+    def list_events(self, queryset=None):
+        if queryset is None:
+            queryset = Event.objects.all()
+        paginator = KeysetPagination(ordering=('-created_at', '-id'))
+        events = paginator.paginate_queryset(queryset.with_sessions(), self.request)
+        serializer = EventReadSerializer(events, many=True, context={'request': self.request})
+        return paginator.get_paginated_data('events', serializer.data)
 
     def post(self, request):
         serializer = EventWriteSerializer(data=request.data)
@@ -38,8 +66,6 @@ class EventListCreateView(APIView):
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
 class EventDetailView(APIView):
-    authentication_classes = [JWTAuthentication]
-
     def get_permissions(self):
         if self.request.method != 'GET':
             return [IsAdminOrSuperUser(), IsAuthenticated()]
@@ -47,16 +73,18 @@ class EventDetailView(APIView):
 
     def get_object(self, pk):
         try:
-            event = Event.objects.prefetch_related('sessions').get(pk=pk)
+            event = Event.objects.with_sessions().get(pk=pk)
             self.check_object_permissions(self.request, event)
             return event
         except Event.DoesNotExist:
             raise Http404
 
     def get(self, request, pk):
-        event = self.get_object(pk)
-        serializer = EventReadSerializer(event)
-        return Response(serializer.data, status=status.HTTP_200_OK)
+        def render():
+            self.event = self.get_object(pk)
+            return EventReadSerializer(self.event).data
+
+        return cached_response(request, render, event_id=pk, etag=lambda: event_etag(self.event.updated_at))
 
     def put(self, request, pk):
         event = self.get_object(pk=pk)
@@ -69,11 +97,118 @@ class EventDetailView(APIView):
         serializer.is_valid(raise_exception=True)
         event = serializer.save()
 
-        return Response(
+        if getattr(event, '_prefetched_objects_cache', None):
+            # The serializer rewrote the session, so the prefetched one is stale.
+            event._prefetched_objects_cache = {}
+
+        response = Response(
             EventReadSerializer(event, context={'request': request}).data, status=status.HTTP_200_OK
         )
+        response['ETag'] = event_etag(event.updated_at)
+        return response
+
+    def patch(self, request, pk):
+        serializer = EventPatchSerializer(data=request.data, partial=True)
+        serializer.is_valid(raise_exception=True)
+        updated_at = patch_event(
+            pk, serializer.validated_data, if_match=parse_if_match(request.headers.get('If-Match'))
+        )
+
+        rows = attach_sessions(event_rows(Event.objects.filter(pk=pk)))
+        if not rows:
+            # Deleted between the update and this read.
+            raise Http404
+        response = Response(event_item(rows[0], EventLinkBuilder(request)), status=status.HTTP_200_OK)
+        response['ETag'] = event_etag(updated_at)
+        return response
 
     def delete(self, request, pk):
-        event = self.get_object(pk=pk)
-        event.delete()
+        delete_event(pk)
         return Response(status=status.HTTP_204_NO_CONTENT)
+
+
+class EventRegistrationView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request, pk):
+        event = get_object_or_404(Event, pk=pk)
+        return Response({
+            'event_id': str(event.pk),
+            'quota': event.quota,
+            'remaining': remaining_seats(event),
+        }, status=status.HTTP_200_OK)
+
+    def post(self, request, pk):
+        event = get_object_or_404(Event, pk=pk)
+        registration = register(event, request.user.pk)
+        return Response(EventRegistrationSerializer(registration).data, status=status.HTTP_201_CREATED)
+
+    def delete(self, request, pk):
+        event = get_object_or_404(Event, pk=pk)
+        if not cancel(event, request.user.pk):
+            raise Http404
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+
+class EventWindowView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        window = EventWindowSerializer(data=request.query_params)
+        window.is_valid(raise_exception=True)
+        sessions = window.filter_queryset(EventSession.objects.filter(event__deleted_at__isnull=True))
+        return cached_response(request, lambda: event_window_page(request, sessions))
+
+
+class EventBulkCreateView(APIView):
+    permission_classes = [IsAuthenticated, IsAdminOrSuperUser]
+    parser_classes = [JSONParser, NDJSONParser]
+
+    def post(self, request):
+        rows = request.data
+        if not isinstance(rows, (list, Iterator)):
+            return Response({'detail': 'Expected a list of events.'}, status=status.HTTP_400_BAD_REQUEST)
+
+        if request.query_params.get('async') == 'true':
+            # The import runs on a job worker; the response points at the job to poll.
+            try:
+                job = enqueue_rows('events.bulk_import', rows, user_id=request.user.pk)
+            except TooManyRows as exc:
+                return Response({'detail': str(exc)}, status=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE)
+            return Response(JobSerializer(job, context={'request': request}).data, status=status.HTTP_202_ACCEPTED)
+
+        created, errors = bulk_create_events(rows)
+        if not errors:
+            response_status = status.HTTP_201_CREATED
+        elif created:
+            response_status = status.HTTP_207_MULTI_STATUS
+        else:
+            response_status = status.HTTP_400_BAD_REQUEST
+        return Response({'created': created, 'errors': errors}, status=response_status)
+
+
+class EventExportView(APIView):
+    permission_classes = [IsAuthenticated, IsAdminOrSuperUser]
+
+    def perform_content_negotiation(self, request, force=False):
+        # The body is NDJSON or CSV regardless of Accept; only errors go through a renderer.
+        return super().perform_content_negotiation(request, force=True)
+
+    def get(self, request):
+        output = request.query_params.get('output', 'ndjson')
+        if output not in EXPORT_FORMATS:
+            return Response(
+                {'output': [f'Must be one of: {", ".join(EXPORT_FORMATS)}.']},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        filters = EventFilterSerializer(data=request.query_params)
+        filters.is_valid(raise_exception=True)
+
+        export, content_type = EXPORT_FORMATS[output]
+        response = StreamingHttpResponse(
+            export(export_queryset(filters.filter_queryset(Event.objects.all()))),
+            content_type=content_type
+        )
+        response['Content-Disposition'] = f'attachment; filename="events.{output}"'
+        return response
@@ -0,0 +1,28 @@
+import signal
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from jobs.worker import POOLS, Worker
+
+
+class Command(BaseCommand):
+    help = (
+        'Runs background jobs from the jobs table on a thread or process pool until stopped with '
+        'SIGINT or SIGTERM, which lets the running jobs finish first.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--concurrency', type=int, default=settings.JOB_WORKER_CONCURRENCY)
+        parser.add_argument('--pool', choices=POOLS, default=settings.JOB_WORKER_POOL)
+        parser.add_argument('--poll-interval', type=float, default=settings.JOB_POLL_INTERVAL)
+        parser.add_argument('--burst', action='store_true', help='Exit once no job is due.')
+
+    def handle(self, *args, **options):
+        worker = Worker(options['concurrency'], options['pool'], options['poll_interval'])
+        signal.signal(signal.SIGINT, worker.stop)
+        signal.signal(signal.SIGTERM, worker.stop)
+
+        self.stdout.write(f"Worker {worker.id}: {worker.concurrency} {worker.pool}(s)")
+        worker.run(burst=options['burst'])
+        self.stdout.write(f'{worker.succeeded} job(s) succeeded, {worker.failed} failed.')
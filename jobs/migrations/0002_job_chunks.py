@@ -0,0 +1,31 @@
+# Generated by Django 4.2 on 2026-10-18 17:05
+
+import dico_event_be.uuids
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('jobs', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='JobChunk',
+            fields=[
+                ('id', models.UUIDField(default=dico_event_be.uuids.uuid7, editable=False, primary_key=True, serialize=False, unique=True)),
+                ('position', models.PositiveIntegerField()),
+                ('rows', models.JSONField()),
+                ('job', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='chunks', to='jobs.job')),
+            ],
+            options={
+                'db_table': 'job_chunks',
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='jobchunk',
+            constraint=models.UniqueConstraint(fields=('job', 'position'), name='uq_job_chunks_job_position'),
+        ),
+    ]
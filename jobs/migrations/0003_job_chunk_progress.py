@@ -0,0 +1,22 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('jobs', '0002_job_chunks'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='jobchunk',
+            name='first_row',
+            field=models.PositiveIntegerField(default=0),
+            preserve_default=False,
+        ),
+        migrations.AddField(
+            model_name='jobchunk',
+            name='result',
+            field=models.JSONField(blank=True, null=True),
+        ),
+    ]
@@ -0,0 +1,65 @@
+from django.conf import settings
+from django.db import models
+from django.utils import timezone
+
+from dico_event_be.uuids import uuid7
+
+
+class Job(models.Model):
+    QUEUED = 'queued'
+    RUNNING = 'running'
+    SUCCEEDED = 'succeeded'
+    FAILED = 'failed'
+    STATUS_CHOICES = [(QUEUED, 'Queued'), (RUNNING, 'Running'), (SUCCEEDED, 'Succeeded'), (FAILED, 'Failed')]
+
+    id = models.UUIDField(default=uuid7, unique=True, primary_key=True, editable=False)
+    name = models.CharField(max_length=100)
+    payload = models.JSONField(default=dict)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default=QUEUED)
+    attempts = models.PositiveIntegerField(default=0)
+    max_attempts = models.PositiveIntegerField()
+    run_at = models.DateTimeField(default=timezone.now)
+    # The worker running the job and how long its claim holds without being renewed.
+    locked_by = models.CharField(max_length=255, blank=True)
+    locked_until = models.DateTimeField(null=True, blank=True)
+    result = models.JSONField(null=True, blank=True)
+    error = models.TextField(blank=True)
+    created_by = models.ForeignKey(settings.AUTH_USER_MODEL, null=True, blank=True, on_delete=models.SET_NULL)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return f'{self.name} ({self.status})'
+
+    class Meta:
+        db_table = 'jobs'
+        indexes = [
+            models.Index(fields=['run_at'], name='idx_jobs_queued_run_at', condition=models.Q(status='queued')),
+            models.Index(
+                fields=['locked_until'], name='idx_jobs_running_locked_until', condition=models.Q(status='running')
+            ),
+            models.Index(fields=['created_by', '-created_at', '-id'], name='idx_jobs_created_by'),
+            models.Index(fields=['-created_at', '-id'], name='idx_jobs_created_at_id'),
+        ]
+
+
+class JobChunk(models.Model):
+    """
+    A slice of the rows a job reads, staged by jobs.queue.enqueue_rows().
+    """
+    id = models.UUIDField(default=uuid7, unique=True, primary_key=True, editable=False)
+    job = models.ForeignKey(Job, related_name='chunks', on_delete=models.CASCADE)
+    position = models.PositiveIntegerField()
+    # The index of the chunk's first row in the job's input.
+    first_row = models.PositiveIntegerField()
+    rows = models.JSONField()
+    # What processing the chunk returned; null until an attempt has processed it.
+    result = models.JSONField(null=True, blank=True)
+
+    class Meta:
+        db_table = 'job_chunks'
+        constraints = [
+            models.UniqueConstraint(fields=['job', 'position'], name='uq_job_chunks_job_position'),
+        ]
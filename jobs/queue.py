@@ -0,0 +1,176 @@
+"""
+A job queue kept in the jobs table.
+
+Workers claim jobs with SELECT ... FOR UPDATE SKIP LOCKED, so several
+workers can poll the same table without handing out a job twice or waiting
+on each other's locks. A claim is a lease: the worker renews it while the
+job runs, and a job whose lease ran out, because its worker died, is
+claimed again. Failed attempts are retried with exponential backoff.
+"""
+import random
+import traceback
+from datetime import timedelta
+from itertools import islice
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from dico_event_be.uuids import uuid7
+from .models import Job, JobChunk
+from .registry import get_task
+
+ROW_CHUNK_SIZE = 500
+
+
+class TooManyRows(Exception):
+    def __init__(self, max_rows):
+        super().__init__(f'A job can read at most {max_rows} rows.')
+        self.max_rows = max_rows
+
+
+def enqueue(name, payload=None, *, user_id=None, run_at=None, max_attempts=None, job_id=None):
+    get_task(name)
+    return Job.objects.create(
+        id=job_id or uuid7(),
+        name=name,
+        payload=payload or {},
+        created_by_id=user_id,
+        run_at=run_at or timezone.now(),
+        max_attempts=max_attempts or settings.JOB_MAX_ATTEMPTS,
+    )
+
+
+def enqueue_rows(name, rows, payload=None, *, user_id=None, max_rows=None, chunk_size=ROW_CHUNK_SIZE):
+    """
+    Enqueues a job that reads a stream of rows. The rows are staged in
+    job_chunks as they arrive, so neither the caller nor the jobs row holds
+    them all; the task gets job_id in its payload and reads them back with
+    job_rows() or process_chunks(). Raises TooManyRows, staging nothing, when there are more than
+    max_rows (JOB_INPUT_MAX_ROWS by default).
+    """
+    if max_rows is None:
+        max_rows = settings.JOB_INPUT_MAX_ROWS
+    rows = iter(rows)
+    job_id = uuid7()
+    # The job cannot be claimed before its rows are committed with it.
+    with transaction.atomic():
+        job = enqueue(name, {**(payload or {}), 'job_id': str(job_id)}, user_id=user_id, job_id=job_id)
+        staged = 0
+        for position, chunk in enumerate(iter(lambda: list(islice(rows, chunk_size)), [])):
+            if staged + len(chunk) > max_rows:
+                raise TooManyRows(max_rows)
+            JobChunk.objects.create(job=job, position=position, first_row=staged, rows=chunk)
+            staged += len(chunk)
+    return job
+
+
+def job_rows(job_id):
+    """
+    The rows staged for a job by enqueue_rows(), read one chunk at a time.
+    """
+    chunks = JobChunk.objects.filter(job_id=job_id)
+    for position in range(chunks.count()):
+        yield from chunks.values_list('rows', flat=True).get(position=position)
+
+
+def process_chunks(job_id, process):
+    """
+    Calls process(rows, first_row) on each chunk staged for a job that no
+    earlier attempt has processed, and stores what it returns on the chunk in
+    the same transaction as process() writes, so a retried job carries on from
+    the chunk the failed attempt stopped at instead of repeating its writes.
+    Returns the results of every chunk in order.
+    """
+    chunks = JobChunk.objects.filter(job_id=job_id)
+    for pk in chunks.filter(result__isnull=True).order_by('position').values_list('pk', flat=True):
+        with transaction.atomic():
+            # The lock keeps an attempt whose lease expired from processing the chunk twice.
+            chunk = JobChunk.objects.select_for_update().get(pk=pk)
+            if chunk.result is None:
+                chunk.result = process(chunk.rows, chunk.first_row)
+                chunk.save(update_fields=['result'])
+    return list(chunks.order_by('position').values_list('result', flat=True))
+
+
+def claim_jobs(worker_id, limit):
+    """
+    Marks up to limit due jobs as running on worker_id and returns them.
+    """
+    now = timezone.now()
+    with transaction.atomic():
+        jobs = list(
+            Job.objects.select_for_update(skip_locked=True)
+            .filter(Q(status=Job.QUEUED, run_at__lte=now) | Q(status=Job.RUNNING, locked_until__lt=now))
+            .order_by('run_at')[:limit]
+        )
+        if not jobs:
+            return []
+        Job.objects.filter(pk__in=[job.pk for job in jobs]).update(
+            status=Job.RUNNING,
+            attempts=F('attempts') + 1,
+            locked_by=worker_id,
+            locked_until=now + timedelta(seconds=settings.JOB_LEASE_SECONDS),
+            started_at=now,
+            updated_at=now,
+        )
+    for job in jobs:
+        job.status, job.attempts, job.locked_by = Job.RUNNING, job.attempts + 1, worker_id
+    return jobs
+
+
+def renew_leases(worker_id, job_ids):
+    now = timezone.now()
+    return Job.objects.filter(pk__in=job_ids, status=Job.RUNNING, locked_by=worker_id).update(
+        locked_until=now + timedelta(seconds=settings.JOB_LEASE_SECONDS), updated_at=now
+    )
+
+
+def run_job(job):
+    """
+    Runs a claimed job and records its outcome. Updates are conditioned on
+    the claim, so a worker that lost its lease cannot overwrite the outcome
+    of the worker that took the job over.
+    """
+    claimed = Job.objects.filter(pk=job.pk, status=Job.RUNNING, locked_by=job.locked_by)
+    if job.attempts > job.max_attempts:
+        # Claimed again after its last attempt lost its worker.
+        _finish(job, claimed, timezone.now(), status=Job.FAILED, error='The worker running the last attempt stopped.')
+        return False
+
+    try:
+        result = get_task(job.name)(**job.payload)
+    except Exception:
+        now = timezone.now()
+        error = traceback.format_exc()
+        if job.attempts < job.max_attempts:
+            claimed.update(
+                status=Job.QUEUED, run_at=now + retry_delay(job.attempts), error=error,
+                locked_by='', locked_until=None, updated_at=now,
+            )
+        else:
+            _finish(job, claimed, now, status=Job.FAILED, error=error)
+        return False
+
+    _finish(job, claimed, timezone.now(), status=Job.SUCCEEDED, result=result)
+    return True
+
+
+def _finish(job, claimed, now, **fields):
+    """
+    Records the final outcome of a job and drops the rows staged for it.
+    """
+    with transaction.atomic():
+        if claimed.update(**fields, locked_by='', locked_until=None, finished_at=now, updated_at=now):
+            JobChunk.objects.filter(job_id=job.pk).delete()
+
+
+def retry_delay(attempts):
+    """
+    The wait before the next attempt: JOB_RETRY_BASE_DELAY doubled for every
+    failed attempt, capped at JOB_RETRY_MAX_DELAY, with up to 10% jitter so
+    jobs that failed together do not retry together.
+    """
+    delay = min(settings.JOB_RETRY_BASE_DELAY * 2 ** (attempts - 1), settings.JOB_RETRY_MAX_DELAY)
+    return timedelta(seconds=delay * random.uniform(0.9, 1.0))
@@ -0,0 +1,25 @@
+"""
+The tasks a job can run, registered by name from each app's jobs.py.
+"""
+TASKS = {}
+
+
+def task(name):
+    """
+    Registers the decorated function as the task called name. It is called
+    with the job's payload as keyword arguments and returns a JSON-serializable
+    result.
+    """
+    def decorator(func):
+        if name in TASKS and TASKS[name] is not func:
+            raise ValueError(f'Task {name!r} is already registered.')
+        TASKS[name] = func
+        return func
+    return decorator
+
+
+def get_task(name):
+    try:
+        return TASKS[name]
+    except KeyError:
+        raise LookupError(f'Unknown task {name!r}.') from None
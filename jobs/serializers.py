@@ -0,0 +1,48 @@
+from rest_framework import serializers
+from rest_framework.reverse import reverse
+
+from .models import Job
+from .registry import TASKS
+
+
+class JobSerializer(serializers.ModelSerializer):
+    _links = serializers.SerializerMethodField()
+
+    class Meta:
+        model = Job
+        fields = [
+            'id',
+            'name',
+            'status',
+            'attempts',
+            'max_attempts',
+            'run_at',
+            'started_at',
+            'finished_at',
+            'result',
+            'error',
+            'created_at',
+            '_links',
+        ]
+
+    def get__links(self, obj):
+        request = self.context.get('request')
+        return [
+            {
+                "rel": "self",
+                "href": reverse('job-detail', kwargs={'pk': obj.pk}, request=request),
+                "action": "GET",
+                "types": ["application/json"]
+            }
+        ]
+
+
+class JobCreateSerializer(serializers.Serializer):
+    name = serializers.CharField()
+    payload = serializers.DictField(required=False)
+    run_at = serializers.DateTimeField(required=False)
+
+    def validate_name(self, name):
+        if name not in TASKS:
+            raise serializers.ValidationError(f'Must be one of: {", ".join(sorted(TASKS))}.')
+        return name
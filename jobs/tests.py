@@ -0,0 +1,216 @@
+import threading
+from datetime import timedelta
+from unittest import mock
+
+from django.db import connection, router, transaction
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient, APITestCase
+
+from auth.models import User
+from dico_event_be import routers
+from event import jobs as event_jobs
+from event.models import Event
+from .models import Job, JobChunk
+from .queue import TooManyRows, claim_jobs, enqueue, enqueue_rows, job_rows, retry_delay
+from .registry import task
+from .worker import Worker
+
+attempts = {}
+
+
+@task('tests.echo')
+def echo(**payload):
+    return payload
+
+
+@task('tests.rows')
+def rows(job_id):
+    return list(job_rows(job_id))
+
+
+@task('tests.flaky')
+def flaky(key, failures):
+    attempts[key] = attempts.get(key, 0) + 1
+    if attempts[key] <= failures:
+        raise RuntimeError(f'attempt {attempts[key]} failed')
+    return attempts[key]
+
+
+class JobQueueTests(TestCase):
+    def test_claims_due_jobs_and_expired_leases(self):
+        due = enqueue('tests.echo')
+        enqueue('tests.echo', run_at=timezone.now() + timedelta(hours=1))
+        abandoned = enqueue('tests.echo')
+        Job.objects.filter(pk=abandoned.pk).update(
+            status=Job.RUNNING, attempts=1, locked_by='gone', locked_until=timezone.now() - timedelta(seconds=1)
+        )
+
+        claimed = claim_jobs('worker-1', 10)
+        self.assertEqual({job.pk for job in claimed}, {due.pk, abandoned.pk})
+        self.assertEqual(
+            dict(Job.objects.filter(status=Job.RUNNING).values_list('pk', 'attempts')), {due.pk: 1, abandoned.pk: 2}
+        )
+        self.assertEqual(claim_jobs('worker-2', 10), [])
+
+    def test_unknown_tasks_are_rejected(self):
+        with self.assertRaises(LookupError):
+            enqueue('tests.missing')
+
+    def test_rows_are_staged_in_chunks(self):
+        rows = ({'row': i} for i in range(5))
+        job = enqueue_rows('tests.echo', rows, {'extra': True}, max_rows=5, chunk_size=2)
+        self.assertEqual(job.payload, {'extra': True, 'job_id': str(job.pk)})
+        self.assertEqual(list(job.chunks.order_by('position').values_list('position', flat=True)), [0, 1, 2])
+        self.assertEqual(list(job_rows(job.pk)), [{'row': i} for i in range(5)])
+
+        with self.assertRaises(TooManyRows):
+            enqueue_rows('tests.echo', ({'row': i} for i in range(6)), max_rows=5, chunk_size=2)
+        self.assertEqual(Job.objects.count(), 1)
+        self.assertEqual(JobChunk.objects.count(), 3)
+
+    @override_settings(JOB_RETRY_BASE_DELAY=5, JOB_RETRY_MAX_DELAY=60)
+    def test_retry_delay_backs_off_exponentially(self):
+        delays = [retry_delay(attempt).total_seconds() for attempt in range(1, 6)]
+        for delay, expected in zip(delays, (5, 10, 20, 40, 60)):
+            self.assertTrue(expected * 0.9 <= delay <= expected)
+
+
+class JobSkipLockedTests(TransactionTestCase):
+    def test_locked_jobs_are_skipped(self):
+        first, second = enqueue('tests.echo'), enqueue('tests.echo')
+        claimed = []
+
+        def claim():
+            claimed.extend(claim_jobs('worker-2', 10))
+            connection.close()
+
+        with transaction.atomic():
+            Job.objects.select_for_update().get(pk=first.pk)
+            thread = threading.Thread(target=claim)
+            thread.start()
+            thread.join()
+        self.assertEqual([job.pk for job in claimed], [second.pk])
+
+
+@override_settings(JOB_RETRY_BASE_DELAY=0)
+class WorkerTests(TransactionTestCase):
+    def run_worker(self):
+        worker = Worker(concurrency=2, pool='thread', poll_interval=0.01)
+        worker.run(burst=True)
+        return worker
+
+    def test_failed_attempts_are_retried_until_max_attempts(self):
+        recovers = enqueue('tests.flaky', {'key': 'recovers', 'failures': 2}, max_attempts=3)
+        gives_up = enqueue('tests.flaky', {'key': 'gives_up', 'failures': 5}, max_attempts=2)
+        echo_job = enqueue('tests.echo', {'answer': 42})
+
+        worker = self.run_worker()
+        self.assertEqual((worker.succeeded, worker.failed), (2, 4))
+
+        recovers.refresh_from_db()
+        self.assertEqual((recovers.status, recovers.attempts, recovers.result), (Job.SUCCEEDED, 3, 3))
+        gives_up.refresh_from_db()
+        self.assertEqual((gives_up.status, gives_up.attempts), (Job.FAILED, 2))
+        self.assertIn('RuntimeError: attempt 2 failed', gives_up.error)
+        echo_job.refresh_from_db()
+        self.assertEqual(echo_job.result, {'answer': 42})
+        self.assertFalse(Job.objects.exclude(locked_until=None).exists())
+
+    def test_bulk_import_runs_as_a_job(self):
+        user = User.objects.create(username='superuser', email='superuser@example.com', is_superuser=True)
+        client = APIClient()
+        client.force_authenticate(user)
+        start_time = timezone.now().replace(hour=9, minute=0, second=0, microsecond=0)
+        rows = [
+            {
+                'name': f'Imported {i}', 'description': 'Description', 'location': 'Jakarta', 'status': 'open',
+                'category': 'tech', 'quota': 10, 'organizer_id': str(user.pk),
+                'start_time': start_time.isoformat(), 'end_time': (start_time + timedelta(hours=1)).isoformat(),
+            }
+            for i in range(3)
+        ]
+
+        response = client.post(reverse('event-bulk') + '?async=true', rows, format='json')
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(response.json()['status'], Job.QUEUED)
+        self.assertFalse(Event.objects.exists())
+        self.assertEqual(JobChunk.objects.get().rows[0]['name'], 'Imported 0')
+
+        self.run_worker()
+        job = client.get(reverse('job-detail', kwargs={'pk': response.json()['id']})).json()
+        self.assertEqual(job['status'], Job.SUCCEEDED)
+        self.assertEqual(len(job['result']['created']), 3)
+        self.assertEqual(Event.objects.count(), 3)
+        self.assertFalse(JobChunk.objects.exists())
+
+        with override_settings(JOB_INPUT_MAX_ROWS=2):
+            response = client.post(reverse('event-bulk') + '?async=true', rows, format='json')
+        self.assertEqual(response.status_code, 413)
+        self.assertEqual(Job.objects.count(), 1)
+
+    def test_retried_bulk_import_carries_on_from_the_failed_chunk(self):
+        user = User.objects.create(username='superuser', email='superuser@example.com', is_superuser=True)
+        start_time = timezone.now().replace(hour=9, minute=0, second=0, microsecond=0)
+        rows = [
+            {
+                'name': f'Imported {i}', 'description': 'Description', 'location': 'Jakarta', 'status': 'open',
+                'category': 'tech', 'quota': 10, 'organizer_id': str(user.pk),
+                'start_time': start_time.isoformat(), 'end_time': (start_time + timedelta(hours=1)).isoformat(),
+            }
+            for i in range(5)
+        ]
+        rows[3]['quota'] = 'many'
+        job = enqueue_rows('events.bulk_import', rows, chunk_size=2)
+        bulk_create_events = event_jobs.bulk_create_events
+        calls = []
+
+        def dies_on_the_second_chunk(rows, **kwargs):
+            calls.append(kwargs['start'])
+            if len(calls) == 2:
+                raise RuntimeError('worker died')
+            return bulk_create_events(rows, **kwargs)
+
+        with mock.patch.object(event_jobs, 'bulk_create_events', dies_on_the_second_chunk):
+            worker = self.run_worker()
+        self.assertEqual((worker.succeeded, worker.failed), (1, 1))
+        self.assertEqual(calls, [0, 2, 2, 4])
+
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts), (Job.SUCCEEDED, 2))
+        self.assertEqual(sorted(Event.objects.values_list('name', flat=True)), [f'Imported {i}' for i in (0, 1, 2, 4)])
+        created = Event.objects.order_by('name').values_list('pk', flat=True)
+        self.assertEqual(job.result['created'], [str(pk) for pk in created])
+        self.assertEqual([error['index'] for error in job.result['errors']], [3])
+        self.assertFalse(JobChunk.objects.exists())
+
+    def test_workers_read_from_the_primary(self):
+        job = enqueue_rows('tests.rows', [{'row': 1}])
+        # 'replica_1' is not a configured database, so any read routed to it fails.
+        replicas = mock.patch.object(router.routers[0], 'replicas', ['replica_1'])
+        with replicas, mock.patch.object(routers, 'replica_lag', return_value=0):
+            self.assertEqual(self.run_worker().succeeded, 1)
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.result), (Job.SUCCEEDED, [{'row': 1}]))
+
+
+class JobStatusTests(APITestCase):
+    def setUp(self):
+        self.superuser = User.objects.create(username='superuser', email='superuser@example.com', is_superuser=True)
+        self.member = User.objects.create(username='member', email='member@example.com')
+
+    def test_jobs_are_visible_to_superusers_and_their_creator(self):
+        self.client.force_authenticate(self.superuser)
+        response = self.client.post(reverse('job-list'), {'name': 'tests.echo', 'payload': {'a': 1}}, format='json')
+        self.assertEqual(response.status_code, 202)
+        url = response.json()['_links'][0]['href']
+        own = enqueue('tests.echo', user_id=self.member.pk)
+
+        self.assertEqual(self.client.post(reverse('job-list'), {'name': 'tests.missing'}).status_code, 400)
+        self.assertEqual(len(self.client.get(reverse('job-list')).json()['jobs']), 2)
+
+        self.client.force_authenticate(self.member)
+        self.assertEqual(self.client.get(url).status_code, 404)
+        self.assertEqual([job['id'] for job in self.client.get(reverse('job-list')).json()['jobs']], [str(own.pk)])
+        self.assertEqual(self.client.post(reverse('job-list'), {'name': 'tests.echo'}).status_code, 403)
@@ -0,0 +1,58 @@
+from django.http import Http404
+from rest_framework import status
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from auth.permissions import IsSuperUser
+from dico_event_be.pagination import KeysetPagination
+from .models import Job
+from .queue import enqueue
+from .serializers import JobCreateSerializer, JobSerializer
+
+
+def visible_jobs(request):
+    """
+    Superusers see every job, other users the jobs they started.
+    """
+    if request.user.is_superuser:
+        return Job.objects.all()
+    return Job.objects.filter(created_by_id=request.user.pk)
+
+
+class JobListCreateView(APIView):
+    def get_permissions(self):
+        if self.request.method == 'POST':
+            return [IsAuthenticated(), IsSuperUser()]
+        return [IsAuthenticated()]
+
+    def get(self, request):
+        paginator = KeysetPagination(ordering=('-created_at', '-id'))
+        jobs = visible_jobs(request)
+        if 'status' in request.query_params:
+            jobs = jobs.filter(status=request.query_params['status'])
+        jobs = paginator.paginate_queryset(jobs, request)
+        serializer = JobSerializer(jobs, many=True, context={'request': request})
+        return Response(paginator.get_paginated_data('jobs', serializer.data))
+
+    def post(self, request):
+        serializer = JobCreateSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        job = enqueue(
+            serializer.validated_data['name'],
+            serializer.validated_data.get('payload'),
+            user_id=request.user.pk,
+            run_at=serializer.validated_data.get('run_at'),
+        )
+        return Response(JobSerializer(job, context={'request': request}).data, status=status.HTTP_202_ACCEPTED)
+
+
+class JobDetailView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request, pk):
+        try:
+            job = visible_jobs(request).get(pk=pk)
+        except Job.DoesNotExist:
+            raise Http404
+        return Response(JobSerializer(job, context={'request': request}).data)
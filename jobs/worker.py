@@ -0,0 +1,98 @@
+import logging
+import multiprocessing
+import os
+import socket
+import threading
+import time
+import uuid
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, wait
+
+import django
+from django.conf import settings
+from django.db import connections
+
+from dico_event_be.routers import primary
+from .queue import claim_jobs, renew_leases, run_job
+
+logger = logging.getLogger(__name__)
+
+POOLS = ('thread', 'process')
+
+
+def execute(job):
+    # Jobs read what was just enqueued and written; a lagging replica may not have it yet.
+    try:
+        with primary():
+            return run_job(job)
+    finally:
+        # Pool threads and processes outlive the job; do not leave its connection open.
+        connections.close_all()
+
+
+class Worker:
+    """
+    Claims due jobs whenever a pool slot is free and runs them on a thread or
+    process pool, renewing the leases of running jobs as it goes. After stop()
+    it claims nothing more and returns once the running jobs have finished.
+    """
+
+    def __init__(self, concurrency=None, pool=None, poll_interval=None):
+        self.id = f'{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}'
+        self.concurrency = concurrency or settings.JOB_WORKER_CONCURRENCY
+        self.pool = pool or settings.JOB_WORKER_POOL
+        self.poll_interval = settings.JOB_POLL_INTERVAL if poll_interval is None else poll_interval
+        self.stopping = threading.Event()
+        self.succeeded = self.failed = 0
+
+    def stop(self, *args):
+        self.stopping.set()
+
+    def make_executor(self):
+        if self.pool == 'process':
+            # Spawned processes set Django up afresh instead of inheriting open connections.
+            return ProcessPoolExecutor(
+                max_workers=self.concurrency, mp_context=multiprocessing.get_context('spawn'),
+                initializer=django.setup,
+            )
+        return ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix='job')
+
+    def run(self, burst=False):
+        """
+        Runs jobs until stop() is called, or with burst until no job is due.
+        """
+        running = {}
+        renewed_at = time.monotonic()
+        with primary(), self.make_executor() as executor:
+            while running or not self.stopping.is_set():
+                jobs = []
+                if not self.stopping.is_set() and len(running) < self.concurrency:
+                    jobs = claim_jobs(self.id, self.concurrency - len(running))
+                    for job in jobs:
+                        logger.info('Running job %s (%s), attempt %s', job.pk, job.name, job.attempts)
+                        running[executor.submit(execute, job)] = job
+
+                if running and time.monotonic() - renewed_at > settings.JOB_LEASE_SECONDS / 3:
+                    renew_leases(self.id, [job.pk for job in running.values()])
+                    renewed_at = time.monotonic()
+
+                if burst and not jobs and not running:
+                    break
+                if running:
+                    done, _ = wait(running, timeout=self.poll_interval, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        self.finished(running.pop(future), future)
+                elif not jobs:
+                    self.stopping.wait(self.poll_interval)
+
+    def finished(self, job, future):
+        try:
+            succeeded = future.result()
+        except Exception:
+            logger.exception('Job %s (%s) could not be run', job.pk, job.name)
+            succeeded = False
+        if succeeded:
+            self.succeeded += 1
+            logger.info('Job %s (%s) succeeded', job.pk, job.name)
+        else:
+            self.failed += 1
+            logger.warning('Job %s (%s) failed on attempt %s', job.pk, job.name, job.attempts)